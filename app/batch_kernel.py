@@ -0,0 +1,220 @@
+"""
+Batch Kernel Module
+Scores a whole batch from per-category hit counts with score table lookups
+"""
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app import engine
+from app.engine import KEYWORD_WEIGHT, MAX_CATEGORY_SCORE, MAX_TEXT_LENGTH, SAFETY_METADATA, TRUNCATION_REASON, error_response
+from app.policy import BASELINE_POLICY_VERSION, CompiledPolicy
+
+logger = logging.getLogger(__name__)
+
+KernelResult = Tuple[List[float], List[float], List[str]]
+
+
+def _category_score_table(weight: float = KEYWORD_WEIGHT, max_hits: Optional[int] = None) -> List[float]:
+    """
+    Capped category score for 0, 1, 2, ... hits, accumulated exactly as
+    analyze_text does (repeated ``+= weight``, then the cap), so a table
+    lookup reproduces the scalar float bit for bit. The table ends at the
+    cap, or at ``max_hits`` for weights too small to reach it.
+    """
+    table = [0.0]
+    score = 0.0
+    while table[-1] < MAX_CATEGORY_SCORE and (max_hits is None or len(table) <= max_hits):
+        score += weight
+        table.append(min(score, MAX_CATEGORY_SCORE))
+    return table
+
+
+CATEGORY_SCORE_TABLE = _category_score_table()
+
+
+def score_counts(counts: Sequence[Sequence[int]], tables: Optional[Sequence[List[float]]] = None,
+                 confidence_multiplier: float = 1.0) -> KernelResult:
+    """
+    Computes (risk_score, confidence_score, risk_category) for every row of
+    an N x categories matrix of distinct-keyword hit counts, with columns in
+    scoring order (categories sorted by name). Results equal analyze_text's
+    for the same hits, including rounding.
+
+    ``tables`` holds one category score table per column (see
+    _category_score_table) for a scoring policy; by default every column
+    uses CATEGORY_SCORE_TABLE.
+    """
+    scores, confidences, categories = [], [], []
+
+    for row in counts:
+        if tables is None:
+            tables = [CATEGORY_SCORE_TABLE] * len(row)
+        total = 0.0
+        keyword_count = 0
+        category_count = 0
+        for hits, table in zip(row, tables):
+            if hits:
+                total += table[min(hits, len(table) - 1)]
+                keyword_count += hits
+                category_count += 1
+        total = min(total, 1.0)
+
+        confidence = 1.0
+        if keyword_count:
+            if keyword_count == 1:
+                confidence -= 0.3
+            if category_count > 1:
+                confidence -= 0.2
+            if keyword_count <= 2:
+                confidence -= 0.2
+
+        scores.append(round(total, 2))
+        confidences.append(round(max(0.0, min(confidence * confidence_multiplier, 1.0)), 2))
+        categories.append("LOW" if total < 0.3 else "MEDIUM" if total < 0.7 else "HIGH")
+
+    return scores, confidences, categories
+
+
+# =========================
+# Batch Scoring
+# =========================
+def score_texts(texts: Sequence[Any], correlation_ids: Optional[Sequence[str]] = None,
+                tenant: Optional[str] = None, policy: Optional[CompiledPolicy] = None) -> List[Dict[str, Any]]:
+    """
+    Same responses as ``analyze_texts`` for offline rescoring jobs. Each
+    text is matched the way analyze_text matches it (the tenant's overlay,
+    the clean-text prefilter, the configured matcher and the result cache),
+    then the whole batch is scored by score_counts with the active scoring
+    policy (or ``policy``). An unknown tenant raises UnknownTenantError,
+    as in analyze_texts. The WARNING and ERROR
+    records analyze_text writes (truncation, category cap, score clamp,
+    unexpected failure) are written per item, and a failing item gets its
+    own INTERNAL_ERROR response. Per-keyword and per-request INFO records
+    are not written; one batch_scored record summarizes the batch.
+    """
+    if correlation_ids is None:
+        correlation_ids = ["UNKNOWN"] * len(texts)
+    elif len(correlation_ids) != len(texts):
+        raise ValueError("correlation_ids must have one entry per text")
+
+    if policy is None:
+        policy = engine.get_active_policy()
+    index = engine._resolve_index(tenant)
+    entries = index.entries
+    category_names = sorted({category for category, _ in entries})
+    category_ids = {category: i for i, category in enumerate(category_names)}
+    entry_columns = [category_ids[category] for category, _ in entries]
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+    rows, scored = [], []
+
+    for slot, (text, correlation_id) in enumerate(zip(texts, correlation_ids)):
+        try:
+            if not isinstance(text, str):
+                results[slot] = error_response("INVALID_TYPE", "Input must be a string", correlation_id)
+                continue
+            text = text.strip().lower()
+            if not text:
+                results[slot] = error_response("EMPTY_INPUT", "Text is empty", correlation_id)
+                continue
+            truncated = len(text) > MAX_TEXT_LENGTH
+            if truncated:
+                logger.warning(
+                    "Input truncated",
+                    extra={"correlation_id": correlation_id, "event_type": "input_truncated", "details": {"original_length": len(text), "max_length": MAX_TEXT_LENGTH}}
+                )
+                text = text[:MAX_TEXT_LENGTH]
+
+            matches = engine._match(text, index)
+            row = [0] * len(category_ids)
+            for entry_id in matches:
+                row[entry_columns[entry_id]] += 1
+
+            reasons = list(map(index.reasons.__getitem__, matches))
+            if truncated:
+                reasons.append(TRUNCATION_REASON)
+        except Exception:
+            results[slot] = _internal_error(correlation_id)
+            continue
+        rows.append(row)
+        scored.append((slot, reasons, len(text)))
+
+    weights = [policy.weight(category) for category in category_names]
+    capped_at = [_hits_to_cap(weight) for weight in weights]
+    tables = None
+    if policy.version != BASELINE_POLICY_VERSION:
+        max_hits = max((max(row) for row in rows), default=0)
+        tables = [_category_score_table(weight, max_hits) for weight in weights]
+    risk_scores, confidences, categories = score_counts(rows, tables, policy.confidence_multiplier)
+    for row, (slot, reasons, length), risk_score, confidence, category in zip(rows, scored, risk_scores, confidences, categories):
+        correlation_id = correlation_ids[slot]
+        try:
+            # Clamping to 1.0 needs a total above it; capping needs enough hits
+            if risk_score == 1.0 or any(hits >= cap for hits, cap in zip(row, capped_at)):
+                _warn_saturation(row, category_names, weights, correlation_id)
+        except Exception:
+            results[slot] = _internal_error(correlation_id)
+            continue
+        results[slot] = {
+            "risk_score": risk_score,
+            "confidence_score": confidence,
+            "risk_category": category,
+            "trigger_reasons": reasons,
+            "processed_length": length,
+            "safety_metadata": SAFETY_METADATA.copy(),
+            "errors": None
+        }
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            f"Batch scored | items={len(texts)}",
+            extra={"event_type": "batch_scored", "details": {"items": len(texts), "scored": len(scored), "index_version": index.version, "policy_version": policy.version}}
+        )
+    return results
+
+
+def _warn_saturation(row: Sequence[int], category_names: Sequence[str], weights: Sequence[float],
+                     correlation_id: str) -> None:
+    """
+    Writes the category_capped and score_clamped warnings analyze_text
+    writes for the same hits, redoing its scalar sums for one row.
+    """
+    total_score = 0.0
+    for category, hits, weight in zip(category_names, row, weights):
+        if not hits:
+            continue
+        category_score = 0.0
+        for _ in range(hits):
+            category_score += weight
+        if category_score > MAX_CATEGORY_SCORE:
+            logger.warning(
+                f"Category score capped for {category}",
+                extra={"correlation_id": correlation_id, "event_type": "category_capped", "details": {"category": category, "raw_score": category_score, "cap": MAX_CATEGORY_SCORE}}
+            )
+            category_score = MAX_CATEGORY_SCORE
+        total_score += category_score
+    if total_score > 1.0:
+        logger.warning(
+            "Total score clamped",
+            extra={"correlation_id": correlation_id, "event_type": "score_clamped", "details": {"raw_score": total_score, "cap": 1.0}}
+        )
+
+
+def _hits_to_cap(weight: float) -> float:
+    """Fewest hits whose summed weight exceeds MAX_CATEGORY_SCORE (inf if none)."""
+    if weight <= 0:
+        return float("inf")
+    hits, score = 0, 0.0
+    while score <= MAX_CATEGORY_SCORE:
+        score += weight
+        hits += 1
+    return hits
+
+
+def _internal_error(correlation_id: str) -> Dict[str, Any]:
+    logger.error(
+        "Unexpected runtime error during text analysis",
+        exc_info=True,
+        extra={"correlation_id": correlation_id, "event_type": "unhandled_exception"}
+    )
+    return error_response("INTERNAL_ERROR", "Unexpected processing error", correlation_id)
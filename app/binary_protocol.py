@@ -0,0 +1,339 @@
+"""
+Binary Protocol Module
+MessagePack frames for internal callers: the v3 request and response
+fields, without JSON text or pydantic models in between
+"""
+import argparse
+import json
+import struct
+import time
+from typing import Any, Dict, List, Optional
+from weakref import WeakKeyDictionary
+
+try:
+    import msgpack
+except ImportError:  # in requirements-optional.txt; the fallback below writes the same bytes, slower
+    msgpack = None
+
+from app.engine import TRUNCATION_REASON
+from app.keyword_index import REASON_FORMAT
+from app.response_encoding import BATCH_OUTPUT_LAYOUT, OUTPUT_LAYOUT, Layout, project
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = {"application/msgpack", "application/x-msgpack", "application/vnd.msgpack"}
+# Nesting a request frame may use; a v3 batch needs three levels
+MAX_FRAME_DEPTH = 32
+
+
+class FrameError(ValueError):
+    """Raised when a body is not one well-formed MessagePack frame"""
+
+
+def is_msgpack(content_type: Optional[str]) -> bool:
+    """Whether a Content-Type (or Accept) value names MessagePack"""
+    if not content_type:
+        return False
+    return content_type.split(";", 1)[0].strip().lower() in MSGPACK_MEDIA_TYPES
+
+
+# =========================
+# Frame Encoding
+# =========================
+# The subset of MessagePack the contracts need: nil, bool, int, float64,
+# str, bin, array and map. Same bytes as msgpack.packb's defaults
+# (use_bin_type, no single floats), so either side may lack the library.
+def _pack(value: Any, out: bytearray) -> None:
+    if value is None:
+        out.append(0xC0)
+    elif value is True:
+        out.append(0xC3)
+    elif value is False:
+        out.append(0xC2)
+    elif isinstance(value, int):
+        if 0 <= value < 0x80:
+            out.append(value)
+        elif -0x20 <= value < 0:
+            out.append(value & 0xFF)
+        elif value >= 0:
+            for limit, code, fmt in ((0xFF, 0xCC, ">B"), (0xFFFF, 0xCD, ">H"), (0xFFFFFFFF, 0xCE, ">I"), (0xFFFFFFFFFFFFFFFF, 0xCF, ">Q")):
+                if value <= limit:
+                    out.append(code)
+                    out += struct.pack(fmt, value)
+                    return
+            raise OverflowError("Integer value out of range")
+        else:
+            for limit, code, fmt in ((-0x80, 0xD0, ">b"), (-0x8000, 0xD1, ">h"), (-0x80000000, 0xD2, ">i"), (-0x8000000000000000, 0xD3, ">q")):
+                if value >= limit:
+                    out.append(code)
+                    out += struct.pack(fmt, value)
+                    return
+            raise OverflowError("Integer value out of range")
+    elif isinstance(value, float):
+        out.append(0xCB)
+        out += struct.pack(">d", value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        _pack_header(len(data), out, 0xA0, 32, (0xD9, 0xDA, 0xDB))
+        out += data
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        _pack_header(len(data), out, None, 0, (0xC4, 0xC5, 0xC6))
+        out += data
+    elif isinstance(value, (list, tuple)):
+        _pack_header(len(value), out, 0x90, 16, (None, 0xDC, 0xDD))
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        _pack_header(len(value), out, 0x80, 16, (None, 0xDE, 0xDF))
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    else:
+        raise TypeError(f"Cannot serialize {value!r}")
+
+
+def _pack_header(length: int, out: bytearray, fix: Optional[int], fix_limit: int, codes) -> None:
+    if length < fix_limit:
+        out.append(fix | length)
+    elif codes[0] is not None and length <= 0xFF:
+        out.append(codes[0])
+        out.append(length)
+    elif length <= 0xFFFF:
+        out.append(codes[1])
+        out += struct.pack(">H", length)
+    elif length <= 0xFFFFFFFF:
+        out.append(codes[2])
+        out += struct.pack(">I", length)
+    else:
+        raise ValueError("Object too large to serialize")
+
+
+def packb(value: Any) -> bytes:
+    """One MessagePack frame for ``value``."""
+    if msgpack is not None:
+        return msgpack.packb(value)
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+class _Unpacker:
+    _FIXED = {
+        0xCC: ">B", 0xCD: ">H", 0xCE: ">I", 0xCF: ">Q", 0xD0: ">b", 0xD1: ">h", 0xD2: ">i", 0xD3: ">q",
+        0xCA: ">f", 0xCB: ">d",
+    }
+    _SIZED = {0xD9: (">B", "str"), 0xDA: (">H", "str"), 0xDB: (">I", "str"), 0xC4: (">B", "bin"), 0xC5: (">H", "bin"),
+              0xC6: (">I", "bin"), 0xDC: (">H", "array"), 0xDD: (">I", "array"), 0xDE: (">H", "map"), 0xDF: (">I", "map")}
+
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def take(self, size: int) -> memoryview:
+        end = self.pos + size
+        if end > len(self.data):
+            raise FrameError("Frame is truncated")
+        chunk = self.data[self.pos:end]
+        self.pos = end
+        return chunk
+
+    def read(self, depth: int = 0) -> Any:
+        code = self.take(1)[0]
+        if code <= 0x7F:
+            return code
+        if code >= 0xE0:
+            return code - 0x100
+        if 0xA0 <= code <= 0xBF:
+            return self.container("str", code & 0x1F, depth)
+        if 0x90 <= code <= 0x9F:
+            return self.container("array", code & 0x0F, depth)
+        if 0x80 <= code <= 0x8F:
+            return self.container("map", code & 0x0F, depth)
+        if code == 0xC0:
+            return None
+        if code in (0xC2, 0xC3):
+            return code == 0xC3
+        fmt = self._FIXED.get(code)
+        if fmt is not None:
+            return struct.unpack(fmt, self.take(struct.calcsize(fmt)))[0]
+        sized = self._SIZED.get(code)
+        if sized is not None:
+            fmt, kind = sized
+            return self.container(kind, struct.unpack(fmt, self.take(struct.calcsize(fmt)))[0], depth)
+        raise FrameError(f"Unsupported MessagePack type 0x{code:02x}")
+
+    def container(self, kind: str, length: int, depth: int) -> Any:
+        if kind == "str":
+            try:
+                return str(self.take(length), "utf-8")
+            except UnicodeDecodeError as e:
+                raise FrameError("String is not valid UTF-8") from e
+        if kind == "bin":
+            return bytes(self.take(length))
+        if depth >= MAX_FRAME_DEPTH:
+            raise FrameError("Frame nested too deeply")
+        # Every item takes at least one byte; refuse lengths the frame cannot hold
+        if length > len(self.data) - self.pos:
+            raise FrameError("Frame is truncated")
+        if kind == "array":
+            return [self.read(depth + 1) for _ in range(length)]
+        result = {}
+        for _ in range(length):
+            key = self.read(depth + 1)
+            if not isinstance(key, (str, bytes)):
+                raise FrameError("Map keys must be strings")
+            result[key] = self.read(depth + 1)
+        return result
+
+
+def unpackb(data: bytes) -> Any:
+    """The value of one MessagePack frame. Raises FrameError for anything else."""
+    if msgpack is not None:
+        try:
+            return msgpack.unpackb(data)
+        except (ValueError, TypeError, msgpack.UnpackException) as e:
+            raise FrameError(str(e)) from e
+    unpacker = _Unpacker(data)
+    value = unpacker.read()
+    if unpacker.pos != len(unpacker.data):
+        raise FrameError("Extra data after the frame")
+    return value
+
+
+# =========================
+# Compact Reason IDs
+# =========================
+# With compact frames, trigger_reasons carries integer keyword entry ids
+# instead of strings. keyword_table() is the decode table for one index
+# version: each entry is [category id, keyword]. A reason the index does not
+# know stays a string, so expand_response() always rebuilds the exact list.
+TRUNCATION_ID = -1
+
+_reason_ids: "WeakKeyDictionary[Any, Dict[str, int]]" = WeakKeyDictionary()
+
+
+def reason_ids(index) -> Dict[str, int]:
+    """Reason string -> entry id for ``index``, built once per index."""
+    ids = _reason_ids.get(index)
+    if ids is None:
+        ids = {reason: entry_id for entry_id, reason in enumerate(index.reasons)}
+        ids[TRUNCATION_REASON] = TRUNCATION_ID
+        _reason_ids[index] = ids
+    return ids
+
+
+def keyword_table(index) -> Dict[str, Any]:
+    """The decode table for compact frames scored with ``index``."""
+    categories: List[str] = []
+    category_ids: Dict[str, int] = {}
+    entries = []
+    for category, keyword in index.entries:
+        if category not in category_ids:
+            category_ids[category] = len(categories)
+            categories.append(category)
+        entries.append([category_ids[category], keyword])
+    return {"index_version": index.version, "categories": categories, "entries": entries}
+
+
+def _compact(response: Optional[Dict[str, Any]], ids: Dict[str, int]) -> None:
+    if response is not None:
+        response["trigger_reasons"] = [ids.get(reason, reason) for reason in response["trigger_reasons"]]
+
+
+def encode_frame(content: Dict[str, Any], layout: Layout = OUTPUT_LAYOUT, index=None) -> bytes:
+    """
+    MessagePack body for a response that already passed the output
+    contract: the JSON body's fields and order, reasons compacted to ids
+    of ``index`` when one is given.
+    """
+    projected = project(content, layout)
+    if index is not None:
+        ids = reason_ids(index)
+        if layout is BATCH_OUTPUT_LAYOUT:
+            for response in projected["results"]:
+                _compact(response, ids)
+        elif layout is OUTPUT_LAYOUT:
+            _compact(projected, ids)
+    return packb(projected)
+
+
+def _expand(response: Optional[Dict[str, Any]], table: Dict[str, Any]) -> None:
+    if response is None:
+        return
+    categories, entries = table["categories"], table["entries"]
+    reasons = []
+    for reason in response["trigger_reasons"]:
+        if reason == TRUNCATION_ID:
+            reason = TRUNCATION_REASON
+        elif isinstance(reason, int):
+            category_id, keyword = entries[reason]
+            reason = REASON_FORMAT.format(categories[category_id], keyword)
+        reasons.append(reason)
+    response["trigger_reasons"] = reasons
+
+
+def expand_response(frame: Dict[str, Any], table: Dict[str, Any]) -> Dict[str, Any]:
+    """A decoded compact frame (single or batch) with reason strings restored, in place."""
+    if "results" in frame:
+        for response in frame["results"]:
+            _expand(response, table)
+    else:
+        _expand(frame, table)
+    return frame
+
+
+# =========================
+# Benchmark
+# =========================
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Times a request/response round trip per call for the JSON path (stdlib
+    json, plus pydantic models when installed) and for MessagePack frames,
+    full and compact, and reports body sizes.
+    """
+    import logging
+
+    from app.engine import KEYWORD_INDEX, analyze_text
+    from app.response_encoding import encode_response
+
+    parser = argparse.ArgumentParser(description="Benchmark the MessagePack protocol")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    logging.getLogger("app.engine").setLevel(logging.CRITICAL)
+    corpus = ["This is perfectly safe content.", "kill", "kill murder attack scam", "A" * 6000, "kill " * 30,
+              " ".join(["kill murder attack bomb scam fraud phishing malware cocaine suicide"] * 20)]
+    requests = [{"text": text} for text in corpus]
+    responses = [analyze_text(text) for text in corpus]
+
+    def json_path(request, response):
+        json.loads(json.dumps(request))
+        return encode_response(response)
+
+    paths = {
+        "json": json_path,
+        "msgpack": lambda request, response: (unpackb(packb(request)), encode_frame(response))[1],
+        "msgpack_compact": lambda request, response: (unpackb(packb(request)), encode_frame(response, index=KEYWORD_INDEX))[1],
+    }
+    try:
+        from app.schemas import InputSchema, OutputSchema
+    except ImportError:
+        pass
+    else:
+        paths["json_pydantic"] = lambda request, response: (
+            InputSchema(**json.loads(json.dumps(request))), encode_response(OutputSchema(**response).dict()))[1]
+
+    timings, sizes = {}, {}
+    for name, run in paths.items():
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            for request, response in zip(requests, responses):
+                run(request, response)
+        timings[name] = round((time.perf_counter() - started) / (args.iterations * len(corpus)) * 1e6, 2)
+        sizes[name] = sum(len(run(request, response)) for request, response in zip(requests, responses))
+    print(json.dumps({"us_per_call": timings, "response_bytes": sizes, "msgpack_library": msgpack is not None}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,266 @@
+"""
+Bulk Scoring CLI
+Streams NDJSON or plain-text lines through the engine and writes NDJSON
+
+    python -m app.bulk corpus.jsonl --output scored.jsonl --processes 8 \\
+        --checkpoint scored.ckpt [--resume]
+
+Every input line becomes one output line:
+
+    {"offset": <input byte offset>, "line": <1-based line>, "id": <record id or null>, "result": {<v3 response>}}
+
+Memory stays constant: at most one window of in-flight records is held,
+whatever the size of the input.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from collections import deque
+from typing import Any, BinaryIO, Deque, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from app.contract_enforcement import validate_input_contract, contract_error_response, ContractViolation
+from app.engine import analyze_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEXT_FIELD = "text"
+DEFAULT_ID_FIELD = "id"
+DEFAULT_CHECKPOINT_EVERY = 10000
+
+# (correlation_id, request) as handed to score_items
+Item = Tuple[str, Any]
+
+
+def score_items(items: List[Item]) -> List[Dict[str, Any]]:
+    """
+    Applies the /analyze contract to each request: input contract first,
+    then analyze_text. Top-level so ScoringPool workers can import it.
+    """
+    results = []
+    for correlation_id, request in items:
+        try:
+            text = validate_input_contract(request)
+        except ContractViolation as e:
+            results.append(contract_error_response(e.code, e.message))
+            continue
+        results.append(analyze_text(text, correlation_id=correlation_id))
+    return results
+
+
+# =========================
+# Input
+# =========================
+def _to_request(raw: bytes, ndjson: bool, text_field: str, id_field: str) -> Tuple[Any, Any]:
+    """Returns (record id, request dict) for one input line."""
+    # surrogateescape keeps undecodable bytes; the input contract then
+    # reports them as INVALID_ENCODING instead of the CLI crashing.
+    line = raw.decode("utf-8", "surrogateescape").rstrip("\r\n")
+    if not ndjson:
+        return None, {"text": line}
+
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None, line   # not an object -> INVALID_REQUEST from the contract
+    if isinstance(record, str):
+        return None, {"text": record}
+    if not isinstance(record, dict):
+        return None, record
+
+    request = {"text": record[text_field]} if text_field in record else {}
+    return record.get(id_field), request
+
+
+def read_requests(
+    stream: BinaryIO,
+    offset: int = 0,
+    line_no: int = 0,
+    input_format: str = "auto",
+    text_field: str = DEFAULT_TEXT_FIELD,
+    id_field: str = DEFAULT_ID_FIELD
+) -> Iterator[Tuple[int, int, int, Any, Any]]:
+    """
+    Yields (offset, next_offset, line_no, record_id, request) per non-blank
+    line, where offset is the byte position of the line in the input.
+    """
+    ndjson = None if input_format == "auto" else input_format == "ndjson"
+    for raw in iter(stream.readline, b""):
+        start, offset = offset, offset + len(raw)
+        line_no += 1
+        if not raw.strip():
+            continue
+        if ndjson is None:
+            # Sniff the first record: JSON objects mean NDJSON
+            ndjson = raw.lstrip().startswith(b"{")
+        record_id, request = _to_request(raw, ndjson, text_field, id_field)
+        yield start, offset, line_no, record_id, request
+
+
+# =========================
+# Checkpoints
+# =========================
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    """Written to a temp file and renamed, so a crash never leaves half a checkpoint."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# =========================
+# Pipeline
+# =========================
+def run_bulk(
+    source: BinaryIO,
+    sink: TextIO,
+    processes: int = 0,
+    chunk_size: int = 64,
+    input_format: str = "auto",
+    text_field: str = DEFAULT_TEXT_FIELD,
+    id_field: str = DEFAULT_ID_FIELD,
+    start_offset: int = 0,
+    start_line: int = 0,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+    input_name: Optional[str] = None
+) -> int:
+    """
+    Scores every line of source and writes one NDJSON record per line to
+    sink. With processes > 0 chunks are scored on a ScoringPool.
+    Returns the number of records written.
+    """
+    window: Deque[Tuple[int, int, int, Any]] = deque()
+
+    def items() -> Iterator[Item]:
+        for start, end, line_no, record_id, request in read_requests(
+            source, start_offset, start_line, input_format, text_field, id_field
+        ):
+            window.append((start, end, line_no, record_id))
+            yield (f"bulk-{line_no}", request)
+
+    pool = None
+    if processes > 0:
+        from app.scoring_pool import ScoringPool
+        pool = ScoringPool(processes=processes, chunk_size=chunk_size, scorer=score_items)
+        results = pool.imap(items())
+    else:
+        results = (score_items([item])[0] for item in items())
+
+    written = 0
+    end = start_offset
+    try:
+        for result in results:
+            start, end, line_no, record_id = window.popleft()
+            sink.write(json.dumps({"offset": start, "line": line_no, "id": record_id, "result": result}) + "\n")
+            written += 1
+
+            if checkpoint_path and written % checkpoint_every == 0:
+                _checkpoint(sink, checkpoint_path, input_name, end, line_no, written)
+
+        if checkpoint_path:
+            _checkpoint(sink, checkpoint_path, input_name, end, None, written)
+    finally:
+        if pool is not None:
+            pool.close()
+    return written
+
+
+def _checkpoint(sink: TextIO, path: str, input_name: Optional[str], offset: int, line_no: Optional[int], written: int) -> None:
+    # Output must be durable before the checkpoint claims it is
+    sink.flush()
+    try:
+        os.fsync(sink.fileno())
+        output_offset = sink.tell()
+    except (AttributeError, OSError, ValueError):
+        output_offset = None
+    state = {"input": input_name, "offset": offset, "output_offset": output_offset, "records": written}
+    if line_no is not None:
+        state["line"] = line_no
+    else:
+        state["complete"] = True
+    save_checkpoint(path, state)
+
+
+# =========================
+# CLI
+# =========================
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.bulk", description="Stream-score NDJSON or plain-text lines")
+    parser.add_argument("input", help="input file, or - for stdin")
+    parser.add_argument("--output", default="-", help="output NDJSON file, or - for stdout")
+    parser.add_argument("--format", dest="input_format", choices=["auto", "ndjson", "lines"], default="auto")
+    parser.add_argument("--text-field", default=DEFAULT_TEXT_FIELD, help="NDJSON field holding the text")
+    parser.add_argument("--id-field", default=DEFAULT_ID_FIELD, help="NDJSON field copied to the output id")
+    parser.add_argument("--processes", type=int, default=0, help="worker processes (0 = score in-process)")
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--checkpoint", help="checkpoint file for resume")
+    parser.add_argument("--checkpoint-every", type=int, default=DEFAULT_CHECKPOINT_EVERY)
+    parser.add_argument("--resume", action="store_true", help="continue from --checkpoint")
+    parser.add_argument("--verbose", action="store_true", help="keep per-request engine logs")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.getLogger("app.engine").setLevel(logging.WARNING)
+
+    offset, line_no = 0, 0
+    input_name = None if args.input == "-" else os.path.abspath(args.input)
+    output_mode = "w"
+    state: Dict[str, Any] = {}
+
+    if args.resume:
+        if not args.checkpoint or input_name is None:
+            parser.error("--resume needs --checkpoint and a seekable input file")
+        if os.path.exists(args.checkpoint):
+            state = load_checkpoint(args.checkpoint)
+            if state.get("input") != input_name:
+                parser.error(f"checkpoint was written for {state.get('input')}")
+            if state.get("complete"):
+                return 0
+            offset, line_no = state["offset"], state.get("line", 0)
+            output_mode = "a"
+
+    source = sys.stdin.buffer if input_name is None else open(input_name, "rb")
+    sink = sys.stdout if args.output == "-" else open(args.output, output_mode, encoding="utf-8")
+    try:
+        if offset:
+            source.seek(offset)
+        if output_mode == "a" and state.get("output_offset") is not None:
+            # Drop records written after the last checkpoint; they are rescored
+            sink.truncate(state["output_offset"])
+            sink.seek(state["output_offset"])
+
+        written = run_bulk(
+            source, sink,
+            processes=args.processes,
+            chunk_size=args.chunk_size,
+            input_format=args.input_format,
+            text_field=args.text_field,
+            id_field=args.id_field,
+            start_offset=offset,
+            start_line=line_no,
+            checkpoint_path=args.checkpoint,
+            checkpoint_every=args.checkpoint_every,
+            input_name=input_name
+        )
+        sink.flush()
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    logger.info(f"Bulk scoring complete | records={written}", extra={"event_type": "bulk_complete", "details": {"records": written}})
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
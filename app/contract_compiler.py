@@ -0,0 +1,412 @@
+"""
+Contract Compiler Module
+Turns contract schemas into specialized Python validation functions once,
+at load time, instead of interpreting the schema for every payload
+"""
+import argparse
+import json
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.contract_enforcement import (
+    MAX_TEXT_LENGTH, MAX_TRIGGER_REASONS, VALID_ERROR_CODES, VALID_RISK_CATEGORIES,
+    ContractViolation, validate_output_contract
+)
+
+# =========================
+# Schema Errors
+# =========================
+class SchemaValidationError(ValueError):
+    """A payload failed a compiled schema; ``message`` is worded as jsonschema words it"""
+    def __init__(self, message: str, path: Tuple = (), validator: str = ""):
+        self.message = message
+        self.path = path
+        self.validator = validator
+        super().__init__(message)
+
+
+# Keywords that only annotate a schema
+ANNOTATIONS = {"$schema", "$id", "title", "description"}
+
+_TYPE_CHECKS = {
+    "string": lambda value: isinstance(value, str),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "integer": lambda value: (isinstance(value, int) and not isinstance(value, bool))
+    or (isinstance(value, float) and value.is_integer()),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+}
+
+
+def _equal(one: Any, two: Any) -> bool:
+    """jsonschema equality: booleans never equal numbers"""
+    if isinstance(one, bool) or isinstance(two, bool):
+        return one is two
+    return one == two
+
+
+def _types(schema: Dict[str, Any]) -> List[str]:
+    expected = schema.get("type", [])
+    return [expected] if isinstance(expected, str) else list(expected)
+
+
+# =========================
+# Schema Interpreter
+# =========================
+# The reference semantics (draft-07 subset used by our contracts). Only runs
+# for payloads the compiled function rejected, to word the error.
+def iter_errors(instance: Any, schema: Dict[str, Any], path: Tuple = ()) -> Iterable[SchemaValidationError]:
+    """Every error of ``instance`` in schema keyword order, as jsonschema yields them"""
+    for keyword, value in schema.items():
+        if keyword == "type":
+            if not any(_TYPE_CHECKS[name](instance) for name in _types(schema)):
+                expected = ", ".join(repr(name) for name in _types(schema))
+                yield SchemaValidationError(f"{instance!r} is not of type {expected}", path, keyword)
+        elif keyword == "const":
+            if not _equal(instance, value):
+                yield SchemaValidationError(f"{value!r} was expected", path, keyword)
+        elif keyword == "enum":
+            if not any(_equal(instance, member) for member in value):
+                yield SchemaValidationError(f"{instance!r} is not one of {value!r}", path, keyword)
+        elif keyword == "pattern":
+            if isinstance(instance, str) and not re.search(value, instance):
+                yield SchemaValidationError(f"{instance!r} does not match {value!r}", path, keyword)
+        elif keyword == "minimum":
+            if _TYPE_CHECKS["number"](instance) and instance < value:
+                yield SchemaValidationError(f"{instance!r} is less than the minimum of {value!r}", path, keyword)
+        elif keyword == "maximum":
+            if _TYPE_CHECKS["number"](instance) and instance > value:
+                yield SchemaValidationError(f"{instance!r} is greater than the maximum of {value!r}", path, keyword)
+        elif keyword == "maxItems":
+            if isinstance(instance, list) and len(instance) > value:
+                yield SchemaValidationError(f"{instance!r} is too long", path, keyword)
+        elif keyword == "items":
+            if isinstance(instance, list):
+                for index, item in enumerate(instance):
+                    yield from iter_errors(item, value, path + (index,))
+        elif keyword == "required":
+            if isinstance(instance, dict):
+                for field in value:
+                    if field not in instance:
+                        yield SchemaValidationError(f"{field!r} is a required property", path, keyword)
+        elif keyword == "properties":
+            if isinstance(instance, dict):
+                for field, subschema in value.items():
+                    if field in instance:
+                        yield from iter_errors(instance[field], subschema, path + (field,))
+        elif keyword == "additionalProperties":
+            if isinstance(instance, dict) and value is False:
+                extras = [field for field in instance if field not in schema.get("properties", {})]
+                if extras:
+                    verb = "was" if len(extras) == 1 else "were"
+                    listed = ", ".join(repr(field) for field in extras)
+                    yield SchemaValidationError(f"Additional properties are not allowed ({listed} {verb} unexpected)", path, keyword)
+
+
+def best_error(instance: Any, schema: Dict[str, Any]) -> Optional[SchemaValidationError]:
+    """
+    The error jsonschema.validate raises (its best_match): the shallowest
+    one, preferring a value of the wrong type, else the first.
+    """
+    best, best_key = None, None
+    for error in iter_errors(instance, schema):
+        subschema, value = _located(instance, schema, error.path)
+        matches_type = "type" in subschema and any(_TYPE_CHECKS[name](value) for name in _types(subschema))
+        key = (-len(error.path), not matches_type)
+        if best_key is None or key > best_key:
+            best, best_key = error, key
+    return best
+
+
+def _located(instance: Any, schema: Dict[str, Any], path: Tuple) -> Tuple[Dict[str, Any], Any]:
+    for step in path:
+        schema = schema["items"] if isinstance(step, int) else schema["properties"][step]
+        instance = instance[step]
+    return schema, instance
+
+
+# =========================
+# Code Generation
+# =========================
+# Generated checks are never looser than the interpreter: anything they
+# reject goes to the interpreter, which has the final word (NaN, 1.0 for
+# "integer" and subclasses of str/int/dict are rejected here outright).
+_EXACT_TYPES = {
+    "string": "type({v}) is str",
+    "number": "(type({v}) is float or type({v}) is int)",
+    "integer": "type({v}) is int",
+    "boolean": "({v} is True or {v} is False)",
+    "null": "{v} is None",
+    "object": "type({v}) is dict",
+    "array": "type({v}) is list",
+}
+# Keywords for one type run on every value the interpreter counts as that type
+_TYPE_GUARDS = {
+    "string": "isinstance({v}, str)",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+}
+_KEYWORD_TYPES = {
+    "pattern": "string", "minimum": "number", "maximum": "number", "maxItems": "array", "items": "array",
+    "required": "object", "properties": "object", "additionalProperties": "object",
+}
+SUPPORTED_KEYWORDS = ANNOTATIONS | {"type", "const", "enum"} | set(_KEYWORD_TYPES)
+
+
+class _Generator:
+    def __init__(self):
+        self.lines: List[str] = []
+        self.constants: Dict[str, Any] = {"_MISSING": object(), "_equal": _equal}
+        self.counter = 0
+
+    def name(self, prefix: str, value: Any = None) -> str:
+        self.counter += 1
+        name = f"{prefix}{self.counter}"
+        if value is not None:
+            self.constants[name] = value
+        return name
+
+    def emit(self, depth: int, line: str) -> None:
+        self.lines.append("    " * depth + line)
+
+    def schema(self, schema: Dict[str, Any], var: str, depth: int) -> None:
+        unsupported = set(schema) - SUPPORTED_KEYWORDS
+        if unsupported:
+            raise ValueError(f"Unsupported schema keywords: {sorted(unsupported)}")
+        if schema.get("additionalProperties", False) is not False:
+            raise ValueError("additionalProperties must be false")
+
+        types = _types(schema)
+        if types:
+            self.emit(depth, f"if not ({' or '.join(_EXACT_TYPES[name].format(v=var) for name in types)}):")
+            self.emit(depth + 1, "return False")
+        if "const" in schema:
+            self.value_in([schema["const"]], var, depth, types)
+        if "enum" in schema:
+            self.value_in(schema["enum"], var, depth, types)
+
+        # Type-specific keywords apply only to values of that type
+        for kind in ("string", "number", "array", "object"):
+            keywords = [keyword for keyword in schema if _KEYWORD_TYPES.get(keyword) == kind]
+            if not keywords:
+                continue
+            inner = depth
+            if types != [kind] and not (kind == "number" and types == ["integer"]):
+                self.emit(depth, f"if {_TYPE_GUARDS[kind].format(v=var)}:")
+                inner = depth + 1
+            getattr(self, kind)(schema, var, inner)
+
+    def value_in(self, members: List[Any], var: str, depth: int, types: List[str]) -> None:
+        if all(isinstance(member, str) for member in members):
+            allowed = self.name("_set", frozenset(members))
+            if types == ["string"]:
+                self.emit(depth, f"if {var} not in {allowed}:")
+            else:
+                self.emit(depth, f"if not (type({var}) is str and {var} in {allowed}):")
+        elif len(members) == 1 and (members[0] is None or isinstance(members[0], bool)):
+            self.emit(depth, f"if {var} is not {members[0]!r}:")
+        else:
+            allowed = self.name("_members", tuple(members))
+            self.emit(depth, f"if not any(_equal({var}, member) for member in {allowed}):")
+        self.emit(depth + 1, "return False")
+
+    def string(self, schema: Dict[str, Any], var: str, depth: int) -> None:
+        pattern = self.name("_pattern", re.compile(schema["pattern"]))
+        self.emit(depth, f"if {pattern}.search({var}) is None:")
+        self.emit(depth + 1, "return False")
+
+    def number(self, schema: Dict[str, Any], var: str, depth: int) -> None:
+        bounds = var
+        if "minimum" in schema:
+            bounds = f"{schema['minimum']!r} <= {bounds}"
+        if "maximum" in schema:
+            bounds = f"{bounds} <= {schema['maximum']!r}"
+        # "not (a <= b)" also rejects NaN; the interpreter decides those
+        self.emit(depth, f"if not ({bounds}):")
+        self.emit(depth + 1, "return False")
+
+    def array(self, schema: Dict[str, Any], var: str, depth: int) -> None:
+        if "maxItems" in schema:
+            self.emit(depth, f"if len({var}) > {schema['maxItems']!r}:")
+            self.emit(depth + 1, "return False")
+        if "items" in schema:
+            item = self.name("item")
+            self.emit(depth, f"for {item} in {var}:")
+            self.schema(schema["items"], item, depth + 1)
+
+    def object(self, schema: Dict[str, Any], var: str, depth: int) -> None:
+        required = schema.get("required", [])
+        properties = schema.get("properties", {})
+        if schema.get("additionalProperties") is False and set(required) == set(properties):
+            # Exactly these fields: one comparison of the key view
+            self.emit(depth, f"if {var}.keys() != {self.name('_fields', frozenset(properties))}:")
+            self.emit(depth + 1, "return False")
+        elif required:
+            self.emit(depth, f"if not {self.name('_required', frozenset(required))} <= {var}.keys():")
+            self.emit(depth + 1, "return False")
+        if schema.get("additionalProperties") is False and set(required) != set(properties):
+            self.emit(depth, f"if not {var}.keys() <= {self.name('_allowed', frozenset(properties))}:")
+            self.emit(depth + 1, "return False")
+        for field, subschema in properties.items():
+            value = self.name("value")
+            if field in required:
+                self.emit(depth, f"{value} = {var}[{field!r}]")
+                self.schema(subschema, value, depth)
+            else:
+                self.emit(depth, f"{value} = {var}.get({field!r}, _MISSING)")
+                self.emit(depth, f"if {value} is not _MISSING:")
+                self.schema(subschema, value, depth + 1)
+
+
+def generate_source(schema: Dict[str, Any], name: str = "accepts") -> Tuple[str, Dict[str, Any]]:
+    """Python source of a predicate for ``schema``, and the constants it refers to"""
+    generator = _Generator()
+    generator.emit(0, f"def {name}(instance):")
+    generator.schema(schema, "instance", 1)
+    generator.emit(1, "return True")
+    return "\n".join(generator.lines) + "\n", generator.constants
+
+
+# =========================
+# Compiled Validators
+# =========================
+class CompiledValidator:
+    """
+    A contract compiled to a specialized predicate. Valid payloads cost one
+    call of generated code; rejected ones are explained by the reference
+    rules, so errors read exactly as before.
+    """
+    def __init__(self, name: str, schema: Dict[str, Any], explain: Callable[[Any], Optional[Exception]]):
+        self.name = name
+        self.schema = schema
+        self.source, namespace = generate_source(schema)
+        exec(compile(self.source, f"<contract {name}>", "exec"), namespace)
+        self.accepts: Callable[[Any], bool] = namespace["accepts"]
+        self._explain = explain
+
+    def error(self, instance: Any) -> Optional[Exception]:
+        """The error validate() would raise, or None"""
+        if self.accepts(instance):
+            return None
+        return self._explain(instance)
+
+    def validate(self, instance: Any) -> None:
+        error = self.error(instance)
+        if error is not None:
+            raise error
+
+    def validate_batch(self, instances: Iterable[Any]) -> List[Optional[Exception]]:
+        """One error (or None) per instance, in order"""
+        accepts, explain = self.accepts, self._explain
+        return [None if accepts(instance) else explain(instance) for instance in instances]
+
+
+def compile_schema(schema: Dict[str, Any], name: str = "schema") -> CompiledValidator:
+    """A JSON schema as a CompiledValidator raising SchemaValidationError"""
+    return CompiledValidator(name, schema, lambda instance: best_error(instance, schema))
+
+
+# =========================
+# Sealed v3 Output Contract
+# =========================
+# validate_output_contract's rules as a schema. The generated predicate is
+# the per-request check; the hand-written rules still word every rejection.
+OUTPUT_CONTRACT_V3_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": ["risk_score", "confidence_score", "risk_category", "trigger_reasons",
+                 "processed_length", "safety_metadata", "errors"],
+    "additionalProperties": False,
+    "properties": {
+        "risk_score": {"type": "number", "minimum": 0.0, "maximum": 1.0},
+        "confidence_score": {"type": "number", "minimum": 0.0, "maximum": 1.0},
+        "risk_category": {"type": "string", "enum": sorted(VALID_RISK_CATEGORIES)},
+        "trigger_reasons": {"type": "array", "maxItems": MAX_TRIGGER_REASONS, "items": {"type": "string"}},
+        "processed_length": {"type": "integer", "minimum": 0, "maximum": MAX_TEXT_LENGTH},
+        "safety_metadata": {
+            "type": "object",
+            "required": ["is_decision", "authority", "actionable"],
+            "additionalProperties": False,
+            "properties": {
+                "is_decision": {"const": False},
+                "authority": {"const": "NONE"},
+                "actionable": {"const": False},
+            },
+        },
+        "errors": {
+            "type": ["object", "null"],
+            "required": ["error_code", "message"],
+            "additionalProperties": False,
+            "properties": {
+                "error_code": {"type": "string", "enum": sorted(VALID_ERROR_CODES)},
+                "message": {"type": "string"},
+            },
+        },
+    },
+}
+
+
+def _output_contract_error(response: Any) -> Optional[ContractViolation]:
+    try:
+        validate_output_contract(response)
+    except ContractViolation as e:
+        return e
+    return None
+
+
+OUTPUT_CONTRACT_V3 = CompiledValidator("output_v3", OUTPUT_CONTRACT_V3_SCHEMA, _output_contract_error)
+
+
+# =========================
+# Benchmark
+# =========================
+def main(argv: Optional[List[str]] = None) -> int:
+    """Times the compiled validators against the interpreted rules they replace"""
+    import logging
+    import os
+
+    from app.engine import analyze_text
+
+    parser = argparse.ArgumentParser(description="Benchmark compiled contract validators")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    logging.getLogger("app.engine").setLevel(logging.CRITICAL)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(root, "enforcement_output_contract_v4.json"), encoding="utf-8") as f:
+        v4_schema = json.load(f)
+    v4 = compile_schema(v4_schema, "enforcement_v4")
+    payload = {
+        "enforcement_signal_id": "a" * 64, "risk_score": 0.4, "bounded_confidence": 0.8, "contradiction_flag": False,
+        "abstention_flag": False, "epistemic_source_hash": "b" * 64, "decision": None, "authority": "NONE",
+    }
+    response = analyze_text("kill murder attack scam")
+
+    paths = {
+        "v4_interpreted": lambda: best_error(payload, v4_schema),
+        "v4_compiled": lambda: v4.validate(payload),
+        "v3_interpreted": lambda: validate_output_contract(response),
+        "v3_compiled": lambda: OUTPUT_CONTRACT_V3.validate(response),
+    }
+    try:
+        import jsonschema
+    except ImportError:
+        pass
+    else:
+        paths["v4_jsonschema"] = lambda: jsonschema.validate(payload, v4_schema)
+
+    timings = {}
+    for name, run in paths.items():
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            run()
+        timings[name] = round((time.perf_counter() - started) / args.iterations * 1e6, 3)
+    print(json.dumps({"us_per_payload": timings}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,12 +8,16 @@ from typing import Dict, Any, List, Union
 # Contract constants (IMMUTABLE)
 MAX_TEXT_LENGTH = 5000
 MAX_TRIGGER_REASONS = 100
+MAX_BATCH_SIZE = 1000
+MAX_DOCUMENT_LENGTH = 1000000
 VALID_RISK_CATEGORIES = {"LOW", "MEDIUM", "HIGH"}
 VALID_ERROR_CODES = {
     "INVALID_TYPE", "EMPTY_INPUT", "EXCESSIVE_LENGTH", 
     "INVALID_ENCODING", "FORBIDDEN_FIELD", "MISSING_FIELD", "INTERNAL_ERROR",
     "INVALID_CONTEXT", "FORBIDDEN_ROLE", "DECISION_INJECTION"
 }
+# Batch envelope errors reject the whole request; they never appear per item
+VALID_BATCH_ERROR_CODES = {"INVALID_BATCH", "EMPTY_BATCH", "EXCESSIVE_BATCH_SIZE"}
 
 class ContractViolation(Exception):
     """Raised when contract is violated"""
@@ -81,6 +85,30 @@ def validate_input_contract(data: Any) -> str:
     
     return text
 
+def validate_batch_input_contract(data: Any) -> List[Any]:
+    """
+    Validates the batch envelope against sealed contract.
+    Returns the list of items; each item is validated separately
+    with validate_input_contract so one bad item cannot fail the batch.
+    Raises ContractViolation if the envelope itself is invalid.
+    """
+    if not isinstance(data, dict):
+        raise ContractViolation("INVALID_BATCH", "Request must be JSON object")
+
+    forbidden_fields = set(data.keys()) - {"items"}
+    if forbidden_fields:
+        raise ContractViolation("INVALID_BATCH", f"Forbidden fields: {list(forbidden_fields)}")
+
+    items = data.get("items")
+    if not isinstance(items, list):
+        raise ContractViolation("INVALID_BATCH", "Field 'items' must be an array")
+    if not items:
+        raise ContractViolation("EMPTY_BATCH", "Field 'items' is empty")
+    if len(items) > MAX_BATCH_SIZE:
+        raise ContractViolation("EXCESSIVE_BATCH_SIZE", f"Batch exceeds max {MAX_BATCH_SIZE} items")
+
+    return items
+
 def validate_output_contract(response: Dict[str, Any]) -> None:
     """
     Validates output against sealed contract.
@@ -180,6 +208,81 @@ def validate_output_contract(response: Dict[str, Any]) -> None:
         if not isinstance(message, str):
             raise ContractViolation("INVALID_ERROR_MESSAGE_TYPE", "error message must be string")
 
+def validate_document_input_contract(data: Any) -> str:
+    """
+    Same contract as /analyze, except that long text is scored in windows
+    rather than truncated, up to MAX_DOCUMENT_LENGTH characters.
+    """
+    text = validate_input_contract(data)
+    if len(text) > MAX_DOCUMENT_LENGTH:
+        raise ContractViolation("EXCESSIVE_LENGTH", f"Document exceeds max {MAX_DOCUMENT_LENGTH} characters")
+    return text
+
+def validate_document_output_contract(response: Dict[str, Any]) -> None:
+    """
+    Validates a long-document response: document-level score fields with
+    the same rules as the sealed contract, plus the per-window breakdown.
+    Raises ContractViolation if invalid.
+    """
+    required_fields = {
+        "risk_score", "confidence_score", "risk_category", "trigger_reasons",
+        "document_length", "window_size", "windows", "safety_metadata", "errors"
+    }
+    actual_fields = set(response.keys())
+    if actual_fields != required_fields:
+        raise ContractViolation("INVALID_DOCUMENT_STRUCTURE", f"Document response must have exactly {required_fields}")
+
+    # Document-level fields follow the sealed contract; processed_length is
+    # the only v3 field a document replaces (with document_length).
+    view = {field: response[field] for field in required_fields - {"document_length", "window_size", "windows"}}
+    view["processed_length"] = 0
+    view["trigger_reasons"] = []
+    validate_output_contract(view)
+
+    trigger_reasons = response["trigger_reasons"]
+    if not isinstance(trigger_reasons, list) or not all(isinstance(reason, str) for reason in trigger_reasons):
+        raise ContractViolation("INVALID_TRIGGER_REASONS_TYPE", "trigger_reasons must be array of strings")
+    if not isinstance(response["document_length"], int) or not (0 <= response["document_length"] <= MAX_DOCUMENT_LENGTH):
+        raise ContractViolation("INVALID_DOCUMENT_LENGTH", f"document_length must be 0-{MAX_DOCUMENT_LENGTH}")
+
+    windows = response["windows"]
+    if not isinstance(windows, list):
+        raise ContractViolation("INVALID_WINDOWS_TYPE", "windows must be array")
+    window_fields = {"index", "start", "end", "risk_score", "risk_category", "trigger_reasons"}
+    for i, window in enumerate(windows):
+        if not isinstance(window, dict) or set(window.keys()) != window_fields:
+            raise ContractViolation("INVALID_WINDOW_STRUCTURE", f"windows[{i}] must have exactly {window_fields}")
+        if not (0.0 <= window["risk_score"] <= 1.0):
+            raise ContractViolation("INVALID_RISK_SCORE_RANGE", f"windows[{i}].risk_score must be 0.0-1.0")
+        if window["risk_category"] not in VALID_RISK_CATEGORIES:
+            raise ContractViolation("INVALID_RISK_CATEGORY_VALUE", f"windows[{i}].risk_category must be one of {VALID_RISK_CATEGORIES}")
+
+def contract_error_response(code: str, message: str) -> Dict[str, Any]:
+    """Structured error payload matching the sealed v3 output contract."""
+    return {
+        "risk_score": 0.0,
+        "confidence_score": 0.0,
+        "risk_category": "LOW",
+        "trigger_reasons": [],
+        "processed_length": 0,
+        "safety_metadata": {
+            "is_decision": False,
+            "authority": "NONE",
+            "actionable": False
+        },
+        "errors": {
+            "error_code": code,
+            "message": message
+        }
+    }
+
+def document_contract_error_response(code: str, message: str) -> Dict[str, Any]:
+    """Structured error payload for the long-document endpoint."""
+    response = contract_error_response(code, message)
+    del response["processed_length"]
+    response.update({"document_length": 0, "window_size": MAX_TEXT_LENGTH, "windows": []})
+    return response
+
 def enforce_contracts(func):
     """
     Decorator to enforce input/output contracts on analysis function
@@ -199,21 +302,6 @@ def enforce_contracts(func):
             
         except ContractViolation as e:
             # Return contract violation as structured error
-            return {
-                "risk_score": 0.0,
-                "confidence_score": 0.0,
-                "risk_category": "LOW",
-                "trigger_reasons": [],
-                "processed_length": 0,
-                "safety_metadata": {
-                    "is_decision": False,
-                    "authority": "NONE",
-                    "actionable": False
-                },
-                "errors": {
-                    "error_code": e.code,
-                    "message": e.message
-                }
-            }
+            return contract_error_response(e.code, e.message)
     
     return wrapper
\ No newline at end of file
@@ -1,8 +1,22 @@
-import re
+import json
 import logging
+import os
+import threading
 import uuid
 import time
-from typing import Dict, Any
+from itertools import groupby
+from types import MappingProxyType
+from typing import Dict, Any, Callable, List, Optional, Sequence, Set, Tuple
+from weakref import WeakKeyDictionary
+
+from app.keyword_index import KeywordIndex, validate_table
+from app.matchers import DEFAULT_BACKEND, Matcher, build_matcher
+from app.metrics import CATEGORY_MATCHES_TOTAL, PREFILTER_TOTAL
+from app.policy import BASELINE_POLICY_VERSION, CompiledPolicy, PolicyRegistry, baseline_policy
+from policy_engine.policy_state import PolicyState
+from app.result_cache import ResultCache
+from app.single_flight import SingleFlight
+from app.tenant_index import DEFAULT_BUDGET_BYTES, TenantIndexCache, UnknownTenantError
 
 # =========================
 # Logging Setup (STEP 3.1)
@@ -16,6 +30,7 @@ logger = logging.getLogger(__name__)
 MAX_TEXT_LENGTH = 5000
 KEYWORD_WEIGHT = 0.2
 MAX_CATEGORY_SCORE = 0.6  # Prevents saturation from one category
+TRUNCATION_REASON = "Input text was truncated to safe maximum length"
 
 
 # =========================
@@ -125,6 +140,360 @@ RISK_KEYWORDS = {
     ]
 }
 
+# =========================
+# Keyword Index
+# =========================
+# Shared read-only by every request and thread. Replaced only as a whole by
+# reload_keyword_table (a single reference assignment), so each request
+# reads it once and finishes on the index it started with.
+KEYWORD_INDEX = KeywordIndex.from_table(RISK_KEYWORDS)
+
+BUILTIN_TABLE_VERSION = "builtin"
+# Label of the table each compiled index came from, by index version
+_table_versions: Dict[str, str] = {KEYWORD_INDEX.version: BUILTIN_TABLE_VERSION}
+
+
+def get_index_version(tenant: Optional[str] = None) -> str:
+    """Version (content hash) of the keyword index serving requests (for ``tenant``, its overlay)."""
+    index = KEYWORD_INDEX
+    tenants = _tenant_indexes
+    if tenant is not None and tenants is not None and tenant in tenants:
+        return tenants.version(tenant, index)
+    return index.version
+
+
+def get_table_version() -> str:
+    """Version label of the keyword table serving requests ("builtin" for RISK_KEYWORDS)."""
+    return _table_versions.get(KEYWORD_INDEX.version, BUILTIN_TABLE_VERSION)
+
+
+# =========================
+# Keyword Table Reload
+# =========================
+# RISK_KEYWORD_TABLE points at a versioned JSON table file:
+#   {"version": "2024-06-01", "categories": {"violence": ["kill", ...], ...}}
+_reload_lock = threading.Lock()
+
+
+def load_keyword_table(path: str) -> Tuple[str, Dict[str, List[str]]]:
+    """
+    Reads and validates a keyword table file. Returns (version, table).
+    Raises ValueError (or OSError) when the file cannot be used.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Keyword table is not valid JSON: {e}")
+
+    if not isinstance(data, dict):
+        raise ValueError("Keyword table must be a JSON object")
+    version = data.get("version")
+    if not isinstance(version, str) or not version.strip():
+        raise ValueError("Keyword table version must be a non-empty string")
+    return version, validate_table(data.get("categories"))
+
+
+def publish_keyword_index(index: KeywordIndex, table_label: str) -> None:
+    """Makes ``index`` the one new requests use; in-flight requests keep theirs."""
+    global KEYWORD_INDEX
+    _table_versions[index.version] = table_label
+    KEYWORD_INDEX = index
+
+
+def reload_keyword_table(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compiles the table file at ``path`` (default RISK_KEYWORD_TABLE) and
+    swaps it in. Compilation happens on the calling thread, before the swap,
+    so call it off the request path; concurrent reloads are serialized. An
+    invalid file raises ValueError and leaves the serving index untouched.
+    """
+    path = path or os.environ.get("RISK_KEYWORD_TABLE")
+    if not path:
+        raise ValueError("No keyword table configured (set RISK_KEYWORD_TABLE)")
+
+    with _reload_lock:
+        started = time.perf_counter()
+        label, table = load_keyword_table(path)
+        index = KeywordIndex.from_table(table)
+        compile_ms = (time.perf_counter() - started) * 1000
+        previous = KEYWORD_INDEX.version
+        publish_keyword_index(index, label)
+
+    logger.info(
+        f"Keyword table reloaded | version={label}",
+        extra={"event_type": "keyword_table_reloaded", "details": {"path": path, "table_version": label, "index_version": index.version, "previous_index_version": previous, "keywords": len(index), "compile_ms": compile_ms}}
+    )
+    return {"index_version": index.version, "table_version": label, "keywords": len(index), "compile_ms": round(compile_ms, 3)}
+
+
+if os.environ.get("RISK_KEYWORD_TABLE"):
+    try:
+        reload_keyword_table()
+    except (OSError, ValueError) as e:
+        logger.warning(f"Keyword table unusable, serving built-in keywords: {e}", extra={"event_type": "keyword_table_invalid", "details": {"path": os.environ["RISK_KEYWORD_TABLE"], "why": str(e)}})
+
+
+# =========================
+# Decision Trace Mode
+# =========================
+# "keyword": one keyword_detected record per hit (logging schema v1)
+# "summary": hits are buffered and written as a single decision_trace
+#            record per request (logging schema v2)
+TRACE_MODES = ("keyword", "summary")
+_trace_mode = "keyword"
+
+
+def set_trace_mode(mode: str) -> None:
+    """Selects how keyword hits are written to the log stream."""
+    global _trace_mode
+    if mode not in TRACE_MODES:
+        raise ValueError(f"trace mode must be one of {TRACE_MODES}")
+    _trace_mode = mode
+
+
+def get_trace_mode() -> str:
+    return _trace_mode
+
+
+# =========================
+# Matcher Backend
+# =========================
+# Which app.matchers backend finds keywords for analyze_text and document
+# windows. Every backend returns the same entry ids (see the differential
+# check in app.matchers), so this only changes speed. "token" is the
+# compiled index itself; other backends are built once per index and
+# dropped with it. The ASCII bytes path always uses the index.
+_matcher_state = (DEFAULT_BACKEND, WeakKeyDictionary())
+
+
+def set_matcher_backend(name: str) -> None:
+    """Selects the matcher backend by name (see app.matchers.MATCHER_BACKENDS)."""
+    global _matcher_state
+    build_matcher(name, KEYWORD_INDEX)
+    _matcher_state = (name, WeakKeyDictionary())
+
+
+def get_matcher_backend() -> str:
+    return _matcher_state[0]
+
+
+def _matcher_for(index) -> Matcher:
+    backend, matchers = _matcher_state
+    if backend == DEFAULT_BACKEND:
+        return index
+    matcher = matchers.get(index)
+    if matcher is None:
+        matcher = matchers[index] = build_matcher(backend, index)
+    return matcher
+
+
+if os.environ.get("RISK_MATCHER"):
+    try:
+        set_matcher_backend(os.environ["RISK_MATCHER"])
+    except ValueError as e:
+        logger.warning(f"Matcher backend unusable, using {DEFAULT_BACKEND}: {e}", extra={"event_type": "matcher_backend_invalid", "details": {"why": str(e)}})
+
+
+# =========================
+# Result Cache (optional, off by default)
+# =========================
+_result_cache: Optional[ResultCache] = None
+
+
+def configure_result_cache(cache: Optional[ResultCache]) -> None:
+    """Installs a ResultCache for keyword scans, or disables caching with None."""
+    global _result_cache
+    _result_cache = cache
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    return _result_cache
+
+
+# =========================
+# In-Flight Coalescing (on by default)
+# =========================
+# Concurrent requests for the same normalized text share one keyword scan;
+# each still scores, logs and builds its response under its own correlation_id.
+_single_flight: Optional[SingleFlight] = SingleFlight()
+
+
+def configure_single_flight(flights: Optional[SingleFlight]) -> None:
+    """Installs a SingleFlight for keyword scans, or disables coalescing with None."""
+    global _single_flight
+    _single_flight = flights
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    return _single_flight
+
+
+# =========================
+# Tenant Overlays (optional, off by default)
+# =========================
+# RISK_TENANT_KEYWORDS points at {"tenants": {"<tenant>": {"<category>": [...]}}};
+# RISK_TENANT_INDEX_BUDGET_MB bounds the compiled overlays kept in memory.
+_tenant_indexes: Optional[TenantIndexCache] = None
+
+
+def configure_tenant_indexes(tenants: Optional[TenantIndexCache]) -> None:
+    """Installs per-tenant keyword overlays, or disables them with None."""
+    global _tenant_indexes
+    _tenant_indexes = tenants
+
+
+def get_tenant_indexes() -> Optional[TenantIndexCache]:
+    return _tenant_indexes
+
+
+def _lookup_index(tenant: Optional[str]):
+    """The index serving ``tenant``: the base index, or the tenant's overlay on it (None if unknown)."""
+    index = KEYWORD_INDEX
+    if tenant is None:
+        return index
+    tenants = _tenant_indexes
+    if tenants is None or tenant not in tenants:
+        return None
+    return tenants.get(tenant, index)
+
+
+# Version of the index the current analyze_* call on this thread scores
+# with, reported by scored_index_version
+_scoring = threading.local()
+
+
+def _resolve_index(tenant: Optional[str]):
+    """
+    _lookup_index for a request about to be scored; notes the index it
+    gets. An unknown tenant raises UnknownTenantError: it is an error of
+    the service, not a v3 response.
+    """
+    index = _lookup_index(tenant)
+    if index is None:
+        _scoring.index_version = None
+        raise UnknownTenantError(f"Unknown tenant {tenant!r}")
+    _scoring.index_version = index.version
+    return index
+
+
+def get_keyword_index(tenant: Optional[str] = None):
+    """The keyword index serving requests (for ``tenant``, its overlay; None if the tenant is unknown)."""
+    return _lookup_index(tenant)
+
+
+def scored_index_version(fn: Callable, *args) -> Tuple[Any, Optional[str]]:
+    """
+    Runs an analyze_* function and returns (its response, the version of
+    the keyword index it scored with). The version is None when the call
+    ended before it read an index (invalid or empty input, unknown
+    tenant). Runs where ``fn`` runs, so a process worker reports its own
+    index; a reload after the call read the index does not change it.
+    """
+    _scoring.index_version = None
+    result = fn(*args)
+    return result, _scoring.index_version
+
+
+if os.environ.get("RISK_TENANT_KEYWORDS"):
+    try:
+        configure_tenant_indexes(TenantIndexCache.from_file(
+            os.environ["RISK_TENANT_KEYWORDS"],
+            int(float(os.environ.get("RISK_TENANT_INDEX_BUDGET_MB", DEFAULT_BUDGET_BYTES / 2 ** 20)) * 2 ** 20)
+        ))
+    except (OSError, ValueError) as e:
+        logger.warning(f"Tenant keyword file unusable, tenant overlays disabled: {e}", extra={"event_type": "tenant_keywords_invalid", "details": {"path": os.environ["RISK_TENANT_KEYWORDS"], "why": str(e)}})
+
+
+# =========================
+# Scoring Policy
+# =========================
+# The active policy is read once per request (a single attribute read, no
+# lock) and used for the whole request; promote_policy swaps it. The
+# baseline policy names every category at KEYWORD_WEIGHT.
+def known_categories() -> Set[str]:
+    """Categories a policy may weight: the keyword table's and the tenants' extras."""
+    categories = {category for category, _ in KEYWORD_INDEX.entries}
+    tenants = _tenant_indexes
+    if tenants is not None:
+        for table in tenants.tables.values():
+            categories.update(table)
+    return categories
+
+
+POLICY_REGISTRY = PolicyRegistry(baseline_policy(known_categories(), KEYWORD_WEIGHT))
+
+
+def get_active_policy() -> CompiledPolicy:
+    return POLICY_REGISTRY.active
+
+
+def get_active_policy_state() -> PolicyState:
+    """
+    The active policy as a PolicyState, every known category included, so
+    learning_step can update it on the engine's weight scale.
+    """
+    return POLICY_REGISTRY.active.to_state(known_categories())
+
+
+def promote_policy(state, expected_version: Optional[int] = None) -> CompiledPolicy:
+    """
+    Makes a PolicyState (e.g. from learning_step) the active scoring policy;
+    see PolicyRegistry.promote. Only categories of the keyword table or a
+    tenant's extras may be weighted.
+    """
+    return POLICY_REGISTRY.promote(state, expected_version, known_categories())
+
+
+# =========================
+# Result Objects
+# =========================
+# Shared by every result and never mutated. Each v3 dict gets its own copy,
+# because callers own (and may modify) the dict they are handed.
+SAFETY_METADATA = MappingProxyType({
+    "is_decision": False,
+    "authority": "NONE",
+    "actionable": False
+})
+
+
+class ScoreResult:
+    """
+    Compact scoring result: the scores plus the matched keyword entry ids.
+    Reason strings are not formatted per request; they are looked up in
+    the index's interned ``reasons`` when the v3 dict is built by to_dict.
+    """
+
+    __slots__ = ("risk_score", "confidence_score", "risk_category", "entry_ids", "reasons", "processed_length", "truncated")
+
+    def __init__(self, risk_score: float, confidence_score: float, risk_category: str, entry_ids: Sequence[int],
+                 reasons: Sequence[str], processed_length: int = 0, truncated: bool = False):
+        self.risk_score = risk_score
+        self.confidence_score = confidence_score
+        self.risk_category = risk_category
+        self.entry_ids = entry_ids
+        self.reasons = reasons
+        self.processed_length = processed_length
+        self.truncated = truncated
+
+    def trigger_reasons(self) -> List[str]:
+        trigger_reasons = list(map(self.reasons.__getitem__, self.entry_ids))
+        if self.truncated:
+            trigger_reasons.append(TRUNCATION_REASON)
+        return trigger_reasons
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The v3 response."""
+        return {
+            "risk_score": self.risk_score,
+            "confidence_score": self.confidence_score,
+            "risk_category": self.risk_category,
+            "trigger_reasons": self.trigger_reasons(),
+            "processed_length": self.processed_length,
+            "safety_metadata": SAFETY_METADATA.copy(),
+            "errors": None
+        }
+
 
 # =========================
 # Error Response Helper
@@ -154,18 +523,26 @@ def error_response(code: str, message: str, correlation_id: str = "UNKNOWN") ->
 # =========================
 # Core Analysis Function
 # =========================
-def analyze_text(text: str, correlation_id: str = "UNKNOWN") -> Dict[str, Any]:
+def analyze_text(text: str, correlation_id: str = "UNKNOWN", tenant: Optional[str] = None, policy: Optional[CompiledPolicy] = None, index: Optional[KeywordIndex] = None) -> Dict[str, Any]:
     try:
         start_time = time.time()
-        
-        logger.info("Request started", extra={"correlation_id": correlation_id, "event_type": "analysis_start"})
+
+        # Resolved once per request: when INFO is disabled none of the
+        # INFO records below build their message or extra dict at all.
+        log_info = logger.isEnabledFor(logging.INFO)
+        # Read once; the request is scored with the policy its records name
+        policy = policy or POLICY_REGISTRY.active
+
+        if log_info:
+            logger.info("Request started", extra={"correlation_id": correlation_id, "event_type": "analysis_start", "details": {"policy_version": policy.version}})
         # =========================
         # F-02: INVALID TYPE
         # =========================
         if not isinstance(text, str):
             return error_response("INVALID_TYPE", "Input must be a string", correlation_id)
 
-        logger.info(f"Received text for analysis | len={len(text)}", extra={"correlation_id": correlation_id, "event_type": "input_received", "details": {"raw_length": len(text)}})
+        if log_info:
+            logger.info(f"Received text for analysis | len={len(text)}", extra={"correlation_id": correlation_id, "event_type": "input_received", "details": {"raw_length": len(text)}})
 
         # Normalize input
         text = text.strip().lower()
@@ -188,119 +565,258 @@ def analyze_text(text: str, correlation_id: str = "UNKNOWN") -> Dict[str, Any]:
             text = text[:MAX_TEXT_LENGTH]
             truncated = True
 
-        total_score = 0.0
-        reasons = []
-
-        keyword_count = 0
-        matched_categories = set()
-
         # =========================
         # CORE MATCHING LOGIC
         # =========================
-        for category, keywords in sorted(RISK_KEYWORDS.items()):
-            category_score = 0.0
-
-            for keyword in keywords:
-                pattern = r"\b" + re.escape(keyword) + r"\b"
-                if re.search(pattern, text):
-                    logger.info(
-                        f"Keyword detected: {keyword}",
-                        extra={"correlation_id": correlation_id, "event_type": "keyword_detected", "details": {"category": category, "keyword": keyword}}
-                    )
-                    category_score += KEYWORD_WEIGHT
-                    keyword_count += 1
-                    matched_categories.add(category)
-                    reasons.append(f"Detected {category} keyword: {keyword}")
-
-            # =========================
-            # F-04: CATEGORY SATURATION
-            # =========================
-            if category_score > MAX_CATEGORY_SCORE:
-                logger.warning(
-                    f"Category score capped for {category}",
-                    extra={"correlation_id": correlation_id, "event_type": "category_capped", "details": {"category": category, "raw_score": category_score, "cap": MAX_CATEGORY_SCORE}}
+        # Single pass over the text; hits come back in scoring order
+        # (categories sorted by name, keywords in table order). The index
+        # is read once, so a reload mid-request cannot mix two tables.
+        # analyze_texts passes the index it read for the whole batch.
+        if index is None:
+            index = _resolve_index(tenant)
+        matches = _match(text, index)
+
+        return _score_matches(matches, len(text), truncated, correlation_id, start_time, log_info, index, policy).to_dict()
+
+    except UnknownTenantError:
+        raise
+    # =========================
+    # F-07: UNEXPECTED FAILURE
+    # =========================
+    except Exception:
+        logger.error(
+            "Unexpected runtime error during text analysis",
+            exc_info=True,
+            extra={"correlation_id": correlation_id, "event_type": "unhandled_exception"}
+        )
+        return error_response(
+            "INTERNAL_ERROR",
+            "Unexpected processing error",
+            correlation_id
+        )
+
+
+def _match(text: str, index: KeywordIndex) -> Sequence[int]:
+    """Entry ids matched in a normalized text: the result cache, then _scan."""
+    cache = _result_cache
+    if cache is None:
+        return _scan(text, index)
+    cache_key = cache.key(text, index.version)
+    matches = cache.get(cache_key)
+    if matches is None:
+        matches = _scan(text, index)
+        cache.put(cache_key, matches)
+    return matches
+
+
+def _scan(text: str, index: KeywordIndex) -> Sequence[int]:
+    """_find_matches, shared with identical scans already running on other threads."""
+    flights = _single_flight
+    if flights is None:
+        return _find_matches(text, index)
+    matches, _ = flights.do((index.version, text), lambda: tuple(_find_matches(text, index)))
+    return matches
+
+
+def _find_matches(text: str, index: KeywordIndex) -> List[int]:
+    """Keyword scan behind the clean-text prefilter (most traffic matches nothing)."""
+    if index.may_match(text):
+        PREFILTER_TOTAL.inc("passed")
+        return _matcher_for(index).find(text)
+    PREFILTER_TOTAL.inc("rejected")
+    return []
+
+
+def _score_matches(matches: Sequence[int], processed_length: int, truncated: bool, correlation_id: str, start_time: float, log_info: bool, index: KeywordIndex, policy: CompiledPolicy) -> "ScoreResult":
+    """
+    Scores the keyword entries matched in a normalized text and writes the
+    decision records. Shared by analyze_text and analyze_bytes so both
+    produce the same response and the same log stream.
+    """
+    trace_summary = log_info and _trace_mode == "summary"
+    trace_keywords = log_info and not trace_summary
+
+    total_score = 0.0
+
+    keyword_count = 0
+    category_count = 0
+
+    # Decision trace buffers (summary mode only)
+    traced_keywords = {} if trace_summary else None
+    traced_weights = {} if trace_summary else None
+    capped_categories = [] if trace_summary else None
+
+    entries = index.entries
+    policy_weights = policy.weights
+    default_weight = policy.default_weight
+    for category, hits in groupby(matches, key=lambda entry_id: entries[entry_id][0]):
+        category_score = 0.0
+        weight = policy_weights.get(category, default_weight)
+        if trace_summary:
+            traced_weights[category] = weight
+
+        for entry_id in hits:
+            keyword = entries[entry_id][1]
+            if trace_keywords:
+                logger.info(
+                    f"Keyword detected: {keyword}",
+                    extra={"correlation_id": correlation_id, "event_type": "keyword_detected", "details": {"category": category, "keyword": keyword, "weight": weight}}
                 )
-                category_score = MAX_CATEGORY_SCORE
+            elif trace_summary:
+                traced_keywords.setdefault(category, []).append(keyword)
+            category_score += weight
+            keyword_count += 1
 
-            total_score += category_score
+        category_count += 1
+        CATEGORY_MATCHES_TOTAL.inc(category)
 
         # =========================
-        # F-06: SCORE CLAMPING
+        # F-04: CATEGORY SATURATION
         # =========================
-        if total_score > 1.0:
+        if category_score > MAX_CATEGORY_SCORE:
             logger.warning(
-                "Total score clamped",
-                extra={"correlation_id": correlation_id, "event_type": "score_clamped", "details": {"raw_score": total_score, "cap": 1.0}}
+                f"Category score capped for {category}",
+                extra={"correlation_id": correlation_id, "event_type": "category_capped", "details": {"category": category, "raw_score": category_score, "cap": MAX_CATEGORY_SCORE}}
             )
-            total_score = 1.0
+            category_score = MAX_CATEGORY_SCORE
+            if trace_summary:
+                capped_categories.append(category)
 
-        # =========================
-        # RISK THRESHOLDS
-        # =========================
-        # Explicit interval definitions covering the entire domain [0.0, 1.0]
-        if total_score < 0.3:
-            risk_category = "LOW"
-        elif 0.3 <= total_score < 0.7:
-            risk_category = "MEDIUM"
-        else:
-            # Implies total_score >= 0.7
-            risk_category = "HIGH"
+        total_score += category_score
 
-        # =========================
-        # INVARIANT CHECK: Score/Category Consistency
-        # =========================
-        if total_score >= 0.7 and risk_category != "HIGH":
-             logger.error("Invariant violation detected", extra={"correlation_id": correlation_id, "event_type": "invariant_correction", "details": {"score": total_score, "category": risk_category, "correction": "HIGH"}})
-             risk_category = "HIGH"
-        
-        if total_score < 0.3 and risk_category == "HIGH":
-             logger.error("Invariant violation detected", extra={"correlation_id": correlation_id, "event_type": "invariant_correction", "details": {"score": total_score, "category": "HIGH", "correction": "LOW"}})
-             risk_category = "LOW"
+    # =========================
+    # F-06: SCORE CLAMPING
+    # =========================
+    if total_score > 1.0:
+        logger.warning(
+            "Total score clamped",
+            extra={"correlation_id": correlation_id, "event_type": "score_clamped", "details": {"raw_score": total_score, "cap": 1.0}}
+        )
+        total_score = 1.0
 
-        # =========================
-        # CONFIDENCE SCORE
-        # =========================
+    # =========================
+    # RISK THRESHOLDS
+    # =========================
+    # Explicit interval definitions covering the entire domain [0.0, 1.0]
+    if total_score < 0.3:
+        risk_category = "LOW"
+    elif 0.3 <= total_score < 0.7:
+        risk_category = "MEDIUM"
+    else:
+        # Implies total_score >= 0.7
+        risk_category = "HIGH"
+
+    # =========================
+    # INVARIANT CHECK: Score/Category Consistency
+    # =========================
+    if total_score >= 0.7 and risk_category != "HIGH":
+         logger.error("Invariant violation detected", extra={"correlation_id": correlation_id, "event_type": "invariant_correction", "details": {"score": total_score, "category": risk_category, "correction": "HIGH"}})
+         risk_category = "HIGH"
+    
+    if total_score < 0.3 and risk_category == "HIGH":
+         logger.error("Invariant violation detected", extra={"correlation_id": correlation_id, "event_type": "invariant_correction", "details": {"score": total_score, "category": "HIGH", "correction": "LOW"}})
+         risk_category = "LOW"
+
+    # =========================
+    # CONFIDENCE SCORE
+    # =========================
+    confidence = 1.0
+
+    if keyword_count == 0:
         confidence = 1.0
-        category_count = len(matched_categories)
+    else:
+        if keyword_count == 1:
+            confidence -= 0.3
+        if category_count > 1:
+            confidence -= 0.2
+        if keyword_count <= 2:
+            confidence -= 0.2
 
-        if keyword_count == 0:
-            confidence = 1.0
-        else:
-            if keyword_count == 1:
-                confidence -= 0.3
-            if category_count > 1:
-                confidence -= 0.2
-            if keyword_count <= 2:
-                confidence -= 0.2
+    confidence = max(0.0, min(confidence * policy.confidence_multiplier, 1.0))
 
-        confidence = max(0.0, min(confidence, 1.0))
+    if trace_summary:
+        logger.info(
+            "Decision trace",
+            extra={"correlation_id": correlation_id, "event_type": "decision_trace", "details": {"keywords": traced_keywords, "capped": capped_categories, "keyword_weight": KEYWORD_WEIGHT, "keyword_weights": traced_weights, "category_cap": MAX_CATEGORY_SCORE, "policy_version": policy.version}}
+        )
 
+    if log_info:
         processing_time = time.time() - start_time
         logger.info(
             f"Final decision: {risk_category}",
-            extra={"correlation_id": correlation_id, "event_type": "analysis_complete", "details": {"score": total_score, "confidence": confidence, "category": risk_category, "processing_time_ms": processing_time * 1000}}
+            extra={"correlation_id": correlation_id, "event_type": "analysis_complete", "details": {"score": total_score, "confidence": confidence, "category": risk_category, "processing_time_ms": processing_time * 1000, "index_version": index.version, "policy_version": policy.version}}
         )
 
-        if truncated:
-            reasons.append("Input text was truncated to safe maximum length")
+    return ScoreResult(round(total_score, 2), round(confidence, 2), risk_category, matches, index.reasons, processed_length, truncated)
 
-        return {
-            "risk_score": round(total_score, 2),
-            "confidence_score": round(confidence, 2),
-            "risk_category": risk_category,
-            "trigger_reasons": reasons,
-            "processed_length": len(text),
-            "safety_metadata": {
-                "is_decision": False,
-                "authority": "NONE",
-                "actionable": False
-            },
-            "errors": None
-        }
 
-    # =========================
-    # F-07: UNEXPECTED FAILURE
-    # =========================
+
+# =========================
+# Raw Bytes Analysis
+# =========================
+# Characters str.strip() removes, restricted to ASCII
+_ASCII_WHITESPACE = frozenset(b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f")
+
+
+def analyze_bytes(data: bytes, correlation_id: str = "UNKNOWN", tenant: Optional[str] = None, policy: Optional[CompiledPolicy] = None) -> Dict[str, Any]:
+    """
+    analyze_text for a UTF-8 encoded body, returning exactly what
+    analyze_text(data.decode("utf-8")) returns (response and log records).
+
+    ASCII input, the common case, is scored in place: stripping and
+    truncation become start/end offsets and matching is case-insensitive
+    on the bytes, so no decoded, stripped or lowered copy is made. Anything
+    else is decoded and handed to analyze_text. The result cache and
+    in-flight coalescing are keyed on normalized text and are only used
+    on that path.
+    """
+    if not isinstance(data, (bytes, bytearray)):
+        return analyze_text(data, correlation_id, tenant, policy)
+    if not data.isascii():
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            return error_response("INVALID_ENCODING", "Text contains invalid UTF-8 sequences", correlation_id)
+        return analyze_text(text, correlation_id, tenant, policy)
+
+    try:
+        start_time = time.time()
+        log_info = logger.isEnabledFor(logging.INFO)
+        policy = policy or POLICY_REGISTRY.active
+
+        if log_info:
+            logger.info("Request started", extra={"correlation_id": correlation_id, "event_type": "analysis_start", "details": {"policy_version": policy.version}})
+            logger.info(f"Received text for analysis | len={len(data)}", extra={"correlation_id": correlation_id, "event_type": "input_received", "details": {"raw_length": len(data)}})
+
+        start, end = 0, len(data)
+        while start < end and data[start] in _ASCII_WHITESPACE:
+            start += 1
+        while end > start and data[end - 1] in _ASCII_WHITESPACE:
+            end -= 1
+
+        if start == end:
+            return error_response("EMPTY_INPUT", "Text is empty", correlation_id)
+
+        truncated = False
+        if end - start > MAX_TEXT_LENGTH:
+            logger.warning(
+                "Input truncated",
+                extra={"correlation_id": correlation_id, "event_type": "input_truncated", "details": {"original_length": end - start, "max_length": MAX_TEXT_LENGTH}}
+            )
+            end = start + MAX_TEXT_LENGTH
+            truncated = True
+
+        index = _resolve_index(tenant)
+        if index.may_match_ascii(data, start, end):
+            PREFILTER_TOTAL.inc("passed")
+            matches = index.find_ascii(data, start, end)
+        else:
+            PREFILTER_TOTAL.inc("rejected")
+            matches = []
+        return _score_matches(matches, end - start, truncated, correlation_id, start_time, log_info, index, policy).to_dict()
+
+    except UnknownTenantError:
+        raise
     except Exception:
         logger.error(
             "Unexpected runtime error during text analysis",
@@ -313,3 +829,156 @@ def analyze_text(text: str, correlation_id: str = "UNKNOWN") -> Dict[str, Any]:
             correlation_id
         )
 
+
+# =========================
+# Batch Analysis Function
+# =========================
+def analyze_texts(texts: Sequence[Any], correlation_ids: Optional[Sequence[str]] = None, tenant: Optional[str] = None, policy: Optional[CompiledPolicy] = None) -> List[Dict[str, Any]]:
+    """
+    Scores every text in order with analyze_text semantics.
+    The compiled KEYWORD_INDEX (or the tenant's overlay) and the scoring
+    policy are shared by the whole batch; each item gets its own response
+    (including its own errors) and correlation_id. An unknown tenant
+    raises UnknownTenantError for the whole batch.
+    """
+    if correlation_ids is None:
+        correlation_ids = ["UNKNOWN"] * len(texts)
+    elif len(correlation_ids) != len(texts):
+        raise ValueError("correlation_ids must have one entry per text")
+
+    policy = policy or POLICY_REGISTRY.active
+    index = _resolve_index(tenant)
+    return [analyze_text(text, correlation_id, tenant, policy, index) for text, correlation_id in zip(texts, correlation_ids)]
+
+
+# =========================
+# Long-Document Analysis
+# =========================
+def _score_entries(entry_ids: Sequence[int], index: Optional[KeywordIndex] = None, policy: Optional[CompiledPolicy] = None) -> ScoreResult:
+    """
+    Scores sorted keyword entry ids exactly as analyze_text does (per-
+    category cap, clamp, thresholds, confidence), without the logging.
+    """
+    if index is None:
+        index = KEYWORD_INDEX
+    if policy is None:
+        policy = POLICY_REGISTRY.active
+    entries = index.entries
+    policy_weights = policy.weights
+    total_score = 0.0
+    keyword_count = 0
+    categories = 0
+
+    for category, hits in groupby(entry_ids, key=lambda entry_id: entries[entry_id][0]):
+        category_score = 0.0
+        weight = policy_weights.get(category, policy.default_weight)
+        for _ in hits:
+            category_score += weight
+            keyword_count += 1
+        total_score += min(category_score, MAX_CATEGORY_SCORE)
+        categories += 1
+
+    total_score = min(total_score, 1.0)
+    if total_score < 0.3:
+        risk_category = "LOW"
+    elif total_score < 0.7:
+        risk_category = "MEDIUM"
+    else:
+        risk_category = "HIGH"
+
+    confidence = 1.0
+    if keyword_count:
+        if keyword_count == 1:
+            confidence -= 0.3
+        if categories > 1:
+            confidence -= 0.2
+        if keyword_count <= 2:
+            confidence -= 0.2
+
+    return ScoreResult(round(total_score, 2), round(max(0.0, min(confidence * policy.confidence_multiplier, 1.0)), 2), risk_category, entry_ids, index.reasons)
+
+
+def document_error_response(code: str, message: str, correlation_id: str = "UNKNOWN") -> Dict[str, Any]:
+    response = error_response(code, message, correlation_id)
+    del response["processed_length"]
+    response.update({"document_length": 0, "window_size": MAX_TEXT_LENGTH, "windows": []})
+    return response
+
+
+def analyze_document(text: str, correlation_id: str = "UNKNOWN", window_size: int = MAX_TEXT_LENGTH, tenant: Optional[str] = None, policy: Optional[CompiledPolicy] = None) -> Dict[str, Any]:
+    """
+    Scores a document of any length in consecutive windows of window_size
+    characters instead of truncating it to MAX_TEXT_LENGTH.
+
+    Each window owns the keyword occurrences that start inside it and reads
+    up to the longest keyword past its end, so a keyword spanning a window
+    boundary is counted once, by the window it starts in. Only the matched
+    entry ids are carried between windows, so the extra memory is bounded
+    by the keyword table, and total work is linear in the document length.
+
+    The document score applies the usual category caps to the set of
+    keywords found anywhere in the document; a document no longer than one
+    window scores exactly like analyze_text.
+    """
+    if window_size <= 0:
+        raise ValueError("window_size must be positive")
+    try:
+        start_time = time.time()
+
+        if not isinstance(text, str):
+            return document_error_response("INVALID_TYPE", "Input must be a string", correlation_id)
+        text = text.strip().lower()
+        if not text:
+            return document_error_response("EMPTY_INPUT", "Text is empty", correlation_id)
+
+        keyword_index = _resolve_index(tenant)
+        policy = policy or POLICY_REGISTRY.active
+        matcher = _matcher_for(keyword_index)
+        windows = []
+        document_matches = set()
+        for index, start in enumerate(range(0, len(text), window_size)):
+            end = min(start + window_size, len(text))
+            matches = matcher.find(text, start, end)
+            document_matches.update(matches)
+            result = _score_entries(matches, keyword_index, policy)
+            windows.append({
+                "index": index,
+                "start": start,
+                "end": end,
+                "risk_score": result.risk_score,
+                "risk_category": result.risk_category,
+                "trigger_reasons": result.trigger_reasons()
+            })
+
+        document_matches = sorted(document_matches)
+        result = _score_entries(document_matches, keyword_index, policy)
+        for category, _ in groupby(document_matches, key=lambda entry_id: keyword_index.entries[entry_id][0]):
+            CATEGORY_MATCHES_TOTAL.inc(category)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f"Document decision: {result.risk_category}",
+                extra={"correlation_id": correlation_id, "event_type": "document_analysis_complete", "details": {"score": result.risk_score, "category": result.risk_category, "length": len(text), "windows": len(windows), "window_size": window_size, "processing_time_ms": (time.time() - start_time) * 1000, "index_version": keyword_index.version, "policy_version": policy.version}}
+            )
+
+        return {
+            "risk_score": result.risk_score,
+            "confidence_score": result.confidence_score,
+            "risk_category": result.risk_category,
+            "trigger_reasons": result.trigger_reasons(),
+            "document_length": len(text),
+            "window_size": window_size,
+            "windows": windows,
+            "safety_metadata": SAFETY_METADATA.copy(),
+            "errors": None
+        }
+
+    except UnknownTenantError:
+        raise
+    except Exception:
+        logger.error(
+            "Unexpected runtime error during document analysis",
+            exc_info=True,
+            extra={"correlation_id": correlation_id, "event_type": "unhandled_exception"}
+        )
+        return document_error_response("INTERNAL_ERROR", "Unexpected processing error", correlation_id)
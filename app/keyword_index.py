@@ -0,0 +1,350 @@
+"""
+Keyword Index Module
+Compiles a risk keyword table once into a single-pass matcher, and
+serializes it to a versioned, hash-checked index artifact that hands the
+exact table a process scores with to another process
+"""
+import hashlib
+import json
+import re
+import struct
+import sys
+from typing import Any, Dict, List, Optional, Pattern, Sequence, Tuple
+
+# Tokenizer shared by every index. Uses the same Unicode-aware definition
+# of a word character as the \b anchors in the keyword patterns, so a token
+# boundary here is exactly a \b boundary there.
+_WORD_PATTERN = re.compile(r"\w+")
+# On ASCII input the bytes \w class ([A-Za-z0-9_]) is exactly the Unicode
+# one, so the ASCII path sees the same tokens and boundaries.
+_ASCII_WORD_PATTERN = re.compile(rb"\w+")
+
+# trigger_reasons text for a matched (category, keyword) entry
+REASON_FORMAT = "Detected {} keyword: {}"
+
+# =========================
+# Index Artifact Layout
+# =========================
+# header  : magic (8s) | format version (I) | table version (16s, ascii hex)
+#           | payload sha256 (32s) | payload length (Q)
+# payload : UTF-8 JSON with "categories", "entries", "heads", "unanchored"
+INDEX_MAGIC = b"RKIDX\x00\x00\x00"
+INDEX_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sI16s32sQ")
+
+
+class IndexArtifactError(ValueError):
+    """Raised when an index artifact is malformed, corrupted or unsupported"""
+
+
+def table_version(table: Dict[str, List[str]]) -> str:
+    """
+    Content hash of a keyword table in scoring order. Changes whenever any
+    keyword, category or ordering changes; cheap enough to check at startup
+    without compiling the table.
+    """
+    entries = [(category, keyword) for category, keywords in sorted(table.items()) for keyword in keywords]
+    return hashlib.sha256(json.dumps(entries).encode("utf-8")).hexdigest()[:16]
+
+
+def validate_table(table: Any) -> Dict[str, List[str]]:
+    """
+    Checks that ``table`` maps category names to non-empty lists of
+    keywords the engine can match, and returns it. Raises ValueError.
+    """
+    if not isinstance(table, dict) or not table:
+        raise ValueError("Keyword table categories must be a non-empty object")
+    for category, keywords in table.items():
+        if not isinstance(keywords, list) or not keywords:
+            raise ValueError(f"Category {category!r} must be a non-empty list of keywords")
+        for keyword in keywords:
+            # Text is stripped and lowercased before matching; anything else
+            # could never match.
+            if not isinstance(keyword, str) or not keyword or keyword != keyword.strip().lower():
+                raise ValueError(f"Invalid keyword {keyword!r} in category {category!r}: must be non-empty, stripped and lowercase")
+    return table
+
+
+def _keyword_pattern(keyword: str) -> Pattern:
+    return re.compile(r"\b" + re.escape(keyword) + r"\b")
+
+
+class KeywordIndex:
+    """
+    Immutable, precompiled view of a keyword table.
+
+    Every keyword is wrapped as ``\\b<keyword>\\b``, so any match must begin
+    at the start of a word token and that token must equal the keyword's
+    leading word. The index therefore tokenizes the text once and only
+    verifies the (few) keywords whose leading word was actually seen.
+
+    Entries are numbered in scoring order: categories sorted by name, then
+    keywords in table order. ``find`` returns entry ids in that same order,
+    which keeps ``trigger_reasons`` identical to a per-keyword regex scan.
+
+    Build with ``from_table``; ``save``/``load`` move a built index to
+    another process.
+    """
+
+    def __init__(
+        self,
+        entries: Sequence[Tuple[str, str]],
+        heads: Dict[str, Sequence[Tuple[int, bool]]],
+        unanchored: Sequence[int],
+        version: str
+    ):
+        self.entries: Tuple[Tuple[str, str], ...] = tuple((category, keyword) for category, keyword in entries)
+        self.version = version
+        # One interned reason string per entry, so scoring a hit never
+        # formats or allocates a string
+        self.reasons: Tuple[str, ...] = tuple(sys.intern(REASON_FORMAT.format(category, keyword)) for category, keyword in self.entries)
+        # How far a match starting inside a range can run past its end
+        self.max_keyword_length = max((len(keyword) for _, keyword in self.entries), default=0)
+
+        # Only multi-word keywords need a regex to verify the rest of the
+        # phrase; a single-word keyword is fully proven by the token match.
+        self._by_head = {
+            head: tuple(
+                (entry_id, None if exact else _keyword_pattern(self.entries[entry_id][1]))
+                for entry_id, exact in candidates
+            )
+            for head, candidates in heads.items()
+        }
+        self._unanchored = tuple(
+            (entry_id, _keyword_pattern(self.entries[entry_id][1])) for entry_id in unanchored
+        )
+        self._ascii_by_head, self._ascii_unanchored = self._compile_ascii()
+
+        # Prefilter: a keyword can only occur if some token equals a head
+        # word (or the table has unanchored keywords, which always scan)
+        self._heads = frozenset(self._by_head)
+        self._ascii_heads = frozenset(self._ascii_by_head)
+
+    def _compile_ascii(self):
+        """
+        Bytes counterparts of the lookup tables for ``find_ascii``. Patterns
+        are case-insensitive so the text never needs lowering; keywords that
+        are not lowercase ASCII can never occur in lowered ASCII text and are
+        left out.
+        """
+        def ascii_pattern(keyword: str) -> Pattern:
+            return re.compile(rb"\b" + re.escape(keyword.encode("ascii")) + rb"\b", re.IGNORECASE)
+
+        def usable(entry_id: int) -> bool:
+            keyword = self.entries[entry_id][1]
+            return keyword.isascii() and keyword == keyword.lower()
+
+        by_head = {}
+        for head, candidates in self._by_head.items():
+            kept = tuple(
+                (entry_id, None if pattern is None else ascii_pattern(self.entries[entry_id][1]))
+                for entry_id, pattern in candidates if usable(entry_id)
+            )
+            if kept:
+                by_head[head.encode("ascii")] = kept
+        unanchored = tuple(
+            (entry_id, ascii_pattern(self.entries[entry_id][1]))
+            for entry_id, _ in self._unanchored if usable(entry_id)
+        )
+        return by_head, unanchored
+
+    @classmethod
+    def from_table(cls, table: Dict[str, List[str]]) -> "KeywordIndex":
+        entries: List[Tuple[str, str]] = []
+        heads: Dict[str, List[Tuple[int, bool]]] = {}
+        unanchored: List[int] = []
+
+        for category, keywords in sorted(table.items()):
+            for keyword in keywords:
+                entry_id = len(entries)
+                entries.append((category, keyword))
+
+                head = _WORD_PATTERN.match(keyword)
+                if head is None:
+                    # Keyword does not start with a word character; it cannot
+                    # be anchored to a token, so fall back to a plain search.
+                    unanchored.append(entry_id)
+                    continue
+
+                heads.setdefault(head.group(), []).append((entry_id, head.group() == keyword))
+
+        return cls(entries, heads, unanchored, table_version(table))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def approximate_size(self) -> int:
+        """Approximate heap bytes held by the index: containers, strings and compiled patterns."""
+        size = sys.getsizeof(self.entries) + sys.getsizeof(self.reasons)
+        size += sum(sys.getsizeof(entry) + sys.getsizeof(entry[1]) for entry in self.entries)
+        size += sum(sys.getsizeof(reason) for reason in self.reasons)
+        for lookup in (self._by_head, self._ascii_by_head):
+            size += sys.getsizeof(lookup)
+            for head, candidates in lookup.items():
+                size += sys.getsizeof(head) + sys.getsizeof(candidates)
+                size += sum(sys.getsizeof(pattern) for _, pattern in candidates if pattern is not None)
+        for unanchored in (self._unanchored, self._ascii_unanchored):
+            size += sum(sys.getsizeof(pattern) for _, pattern in unanchored)
+        return size + sys.getsizeof(self._heads) + sys.getsizeof(self._ascii_heads)
+
+    def may_match(self, text: str) -> bool:
+        """
+        Cheap exact prefilter: False proves ``find(text)`` is empty. The
+        token set is built and compared in C (findall + isdisjoint), so a
+        clean text costs about half a full scan and never reaches the
+        per-token Python loop in ``find``.
+        """
+        return bool(self._unanchored) or not self._heads.isdisjoint(_WORD_PATTERN.findall(text))
+
+    def may_match_ascii(self, data: bytes, start: int = 0, end: Optional[int] = None) -> bool:
+        """``may_match`` for the ``find_ascii`` bounds; tokens are lowered one by one."""
+        if end is None:
+            end = len(data)
+        return bool(self._ascii_unanchored) or not self._ascii_heads.isdisjoint(
+            map(bytes.lower, _ASCII_WORD_PATTERN.findall(data, start, end))
+        )
+
+    def find(self, text: str, pos: int = 0, endpos: Optional[int] = None) -> List[int]:
+        """
+        Returns the sorted ids of every entry whose keyword occurs in text.
+        Each entry is reported at most once, however often it occurs.
+
+        With ``pos``/``endpos`` only occurrences *starting* in [pos, endpos)
+        are reported. The text on either side is still read for the word
+        boundaries and for keywords that run past endpos, so adjacent ranges
+        together find exactly what a scan of the whole text finds.
+        """
+        if endpos is None:
+            endpos = len(text)
+        by_head = self._by_head
+        matched = set()
+        # A token the range starts in the middle of is not a word start
+        split_token = pos > 0 and _WORD_PATTERN.match(text, pos - 1) is not None
+
+        for token in _WORD_PATTERN.finditer(text, pos):
+            start = token.start()
+            if start >= endpos:
+                break
+            candidates = by_head.get(token.group())
+            if candidates is None:
+                continue
+            if start == pos and split_token:
+                continue
+            for entry_id, pattern in candidates:
+                if entry_id in matched:
+                    continue
+                if pattern is None or pattern.match(text, start):
+                    matched.add(entry_id)
+
+        # The search is bounded to the range plus the longest keyword (and
+        # one character for its closing boundary) so ranged scans stay linear.
+        limit = min(len(text), endpos + self.max_keyword_length + 1)
+        for entry_id, pattern in self._unanchored:
+            match = pattern.search(text, pos, limit)
+            if match is not None and match.start() < endpos:
+                matched.add(entry_id)
+
+        return sorted(matched)
+
+    def find_ascii(self, data: bytes, start: int = 0, end: Optional[int] = None) -> List[int]:
+        """
+        ``find`` for ASCII bytes, without decoding or lowering them: returns
+        what ``find(data[start:end].decode().lower())`` returns. The byte
+        before ``start``, if any, must not be a word character (callers pass
+        the bounds of stripped text).
+        """
+        if end is None:
+            end = len(data)
+        by_head = self._ascii_by_head
+        matched = set()
+
+        for token in _ASCII_WORD_PATTERN.finditer(data, start, end):
+            candidates = by_head.get(token.group().lower())
+            if candidates is None:
+                continue
+            token_start = token.start()
+            for entry_id, pattern in candidates:
+                if entry_id in matched:
+                    continue
+                if pattern is None or pattern.match(data, token_start, end):
+                    matched.add(entry_id)
+
+        for entry_id, pattern in self._ascii_unanchored:
+            if pattern.search(data, start, end):
+                matched.add(entry_id)
+
+        return sorted(matched)
+
+    # =========================
+    # Artifact Serialization
+    # =========================
+    def to_bytes(self) -> bytes:
+        categories = sorted({category for category, _ in self.entries})
+        category_ids = {category: i for i, category in enumerate(categories)}
+        payload = json.dumps({
+            "categories": categories,
+            "entries": [[category_ids[category], keyword] for category, keyword in self.entries],
+            "heads": {
+                head: [[entry_id, pattern is None] for entry_id, pattern in candidates]
+                for head, candidates in self._by_head.items()
+            },
+            "unanchored": [entry_id for entry_id, _ in self._unanchored]
+        }, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+        header = _HEADER.pack(
+            INDEX_MAGIC, INDEX_FORMAT_VERSION, self.version.encode("ascii"),
+            hashlib.sha256(payload).digest(), len(payload)
+        )
+        return header + payload
+
+    @classmethod
+    def from_buffer(cls, buffer) -> "KeywordIndex":
+        """Decodes an artifact from any buffer (bytes, memoryview)."""
+        if len(buffer) < _HEADER.size:
+            raise IndexArtifactError("Index artifact is truncated")
+
+        magic, format_version, version, digest, length = _HEADER.unpack_from(buffer, 0)
+        if magic != INDEX_MAGIC:
+            raise IndexArtifactError("Not a keyword index artifact")
+        if format_version != INDEX_FORMAT_VERSION:
+            raise IndexArtifactError(f"Unsupported index format version {format_version}")
+        if len(buffer) != _HEADER.size + length:
+            raise IndexArtifactError("Index artifact length does not match header")
+
+        payload = bytes(buffer[_HEADER.size:])
+        if hashlib.sha256(payload).digest() != digest:
+            raise IndexArtifactError("Index artifact payload hash mismatch")
+        data = json.loads(payload)
+
+        categories = data["categories"]
+        entries = [(categories[category_id], keyword) for category_id, keyword in data["entries"]]
+        # The payload hash only proves the payload is intact; the header's
+        # table version must also describe the entries it carries
+        table: Dict[str, List[str]] = {}
+        for category, keyword in entries:
+            table.setdefault(category, []).append(keyword)
+        version = version.decode("ascii")
+        if table_version(table) != version or entries != [
+            (category, keyword) for category, keywords in sorted(table.items()) for keyword in keywords
+        ]:
+            raise IndexArtifactError("Index artifact entries do not match its table version")
+        return cls(entries, data["heads"], data["unanchored"], version)
+
+    @classmethod
+    def load(cls, path: str) -> "KeywordIndex":
+        """
+        Reads an artifact written by ``save``. The patterns are compiled
+        again on load, which costs about as much as ``from_table``: the
+        artifact carries an exact, verified table to another process, it
+        does not save compile time.
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data:
+            raise IndexArtifactError("Index artifact is empty")
+        return cls.from_buffer(data)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
@@ -1,18 +1,213 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from typing import Any, Dict, Optional, Tuple
+from fastapi import FastAPI, Header, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.schemas import InputSchema, OutputSchema
-from app.engine import analyze_text
-from app.contract_enforcement import validate_input_contract, validate_output_contract, ContractViolation
+from app.schemas import InputSchema, OutputSchema, BatchInputSchema, BatchOutputSchema, DocumentOutputSchema
+from app.engine import (
+    analyze_text, analyze_bytes, analyze_texts, analyze_document, set_trace_mode, configure_result_cache, get_result_cache,
+    configure_single_flight, get_single_flight,
+    get_index_version, get_keyword_index, get_table_version, reload_keyword_table, get_tenant_indexes, get_active_policy, get_active_policy_state, promote_policy,
+    scored_index_version, POLICY_REGISTRY, MAX_TEXT_LENGTH
+)
+from app.policy import PolicyConflict, policy_state_from_dict
+from app.result_cache import ResultCache
+from app.single_flight import SingleFlight
+from app.contract_compiler import OUTPUT_CONTRACT_V3
+from app.stream import STREAM_INITIAL_CREDITS, STREAM_MAX_IN_FLIGHT, STREAM_MAX_PENDING, StreamSession, stream_stats
+from app.binary_protocol import MSGPACK_MEDIA_TYPE, FrameError, encode_frame, is_msgpack, keyword_table, packb, unpackb
+from app.response_encoding import OUTPUT_LAYOUT, BATCH_OUTPUT_LAYOUT, DOCUMENT_OUTPUT_LAYOUT, dumps, encode_response
+from app.scoring_executor import ExecutorOverloaded, executor_from_env
+from app.tenant_index import UnknownTenantError
+from app.contract_enforcement import (
+    validate_input_contract, validate_batch_input_contract,
+    validate_document_input_contract, validate_document_output_contract,
+    contract_error_response, document_contract_error_response, ContractViolation
+)
+from app.metrics import (
+    REGISTRY, CONTENT_TYPE, REQUEST_SECONDS, CONTRACT_SECONDS, SERIALIZATION_SECONDS, ERRORS_TOTAL, record_response
+)
+import asyncio
+import hmac
+import json
 import logging
+import os
+import signal
+import time
 import uuid
-from app.observability import setup_json_logging
+from app.observability import setup_json_logging, shutdown_json_logging, get_json_log_handler
 
 # Initialize JSON logging
 setup_json_logging()
+# "summary" writes one decision_trace record per request instead of one per keyword
+set_trace_mode(os.environ.get("RISK_TRACE_MODE", "keyword"))
+# Optional LRU cache of keyword scans; 0 (default) keeps the engine cache-free
+_cache_size = int(os.environ.get("RISK_RESULT_CACHE_SIZE", "0"))
+if _cache_size > 0:
+    _cache_ttl = os.environ.get("RISK_RESULT_CACHE_TTL")
+    configure_result_cache(ResultCache(max_entries=_cache_size, ttl_seconds=float(_cache_ttl) if _cache_ttl else None))
+# Identical concurrent scans are coalesced; RISK_SINGLE_FLIGHT=0 turns that off
+if os.environ.get("RISK_SINGLE_FLIGHT", "1") == "0":
+    configure_single_flight(None)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Text Risk Scoring Service")
+# Scoring runs here, not on the event loop or its shared default threadpool
+scoring_executor = executor_from_env()
+# Per-connection limits of /analyze/stream
+STREAM_LIMITS = (int(os.environ.get("RISK_STREAM_MAX_IN_FLIGHT", STREAM_MAX_IN_FLIGHT)),
+                 int(os.environ.get("RISK_STREAM_MAX_PENDING", STREAM_MAX_PENDING)))
+
+def _engine_stats(component: str, local, rate: str, part: str, whole: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+    """
+    stats() of an engine component. In process mode every scan runs in a
+    worker, so the counters are the workers' sums and the ratio is derived
+    from them; gauges held per worker (e.g. cache entries) are left out.
+    """
+    if local is None:
+        return None
+    if scoring_executor.kind != "process":
+        return local.stats()
+    stats: Dict[str, Any] = dict.fromkeys(type(local).COUNTERS, 0)
+    stats.update(scoring_executor.worker_stats(component) or {})
+    total = sum(stats[field] for field in whole)
+    stats[rate] = round(stats[part] / total, 4) if total else 0.0
+    return stats
+
+
+# Component stats, read at scrape time
+REGISTRY.stats("risk_executor", "Scoring executor", scoring_executor.stats, counters=["admitted", "rejected", "completed", "restarts"])
+REGISTRY.stats("risk_result_cache", "Keyword scan cache",
+               lambda: _engine_stats("result_cache", get_result_cache(), "hit_rate", "hits", ("hits", "misses")),
+               counters=ResultCache.COUNTERS)
+REGISTRY.stats("risk_single_flight", "In-flight scan coalescing",
+               lambda: _engine_stats("single_flight", get_single_flight(), "coalescing_ratio", "coalesced", ("leaders", "coalesced")),
+               counters=SingleFlight.COUNTERS)
+REGISTRY.stats("risk_log_handler", "JSON log handler", lambda: getattr(get_json_log_handler(), "stats", lambda: None)(),
+               counters=["written", "dropped"])
+REGISTRY.stats("risk_tenant_indexes", "Tenant keyword overlays", lambda: get_tenant_indexes().stats() if get_tenant_indexes() else None,
+               counters=["hits", "compiles", "evictions"])
+REGISTRY.stats("risk_policy", "Scoring policy", POLICY_REGISTRY.stats)
+REGISTRY.stats("risk_streams", "Streaming connections", stream_stats, counters=["received", "delivered", "rejected"])
+REGISTRY.gauge("risk_keyword_index_info", "Keyword index new requests are scored with (always 1)",
+               lambda: {(get_index_version(), get_table_version()): 1}, ["index_version", "table_version"])
+REGISTRY.gauge("risk_worker_keyword_index_info", "Keyword index each scoring worker last served (always 1)",
+               lambda: {(worker,) + versions: 1 for worker, versions in scoring_executor.worker_index_versions.items()},
+               ["worker", "index_version", "table_version"])
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that records how long encoding the body took."""
+    def render(self, content) -> bytes:
+        with SERIALIZATION_SECONDS.time():
+            return super().render(content)
+
+class ContractJSONResponse(Response):
+    """
+    Body for a response that already passed the output contract. Returning
+    a Response makes FastAPI skip the response_model pass (pydantic
+    validation and jsonable_encoder); encode_response emits the same bytes
+    that pass produced, in one step.
+    """
+    media_type = "application/json"
+
+    def __init__(self, content, layout=OUTPUT_LAYOUT, headers=None):
+        self.layout = layout
+        super().__init__(content, headers=headers)
+
+    def render(self, content) -> bytes:
+        with SERIALIZATION_SECONDS.time():
+            return encode_response(content, self.layout)
+
+class MsgpackResponse(Response):
+    """
+    ContractJSONResponse's MessagePack twin: the same fields in the same
+    order, reasons optionally compacted to ids of ``index``.
+    """
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def __init__(self, content, layout=OUTPUT_LAYOUT, headers=None, status_code=200, index=None):
+        self.layout = layout
+        self.index = index
+        super().__init__(content, status_code=status_code, headers=headers)
+
+    def render(self, content) -> bytes:
+        with SERIALIZATION_SECONDS.time():
+            return encode_frame(content, self.layout, self.index)
+
+def version_headers(tenant: Optional[str], policy, index_version: Optional[str]) -> dict:
+    """
+    Keyword index and scoring policy a response was scored with; the sealed
+    body stays unchanged. ``index_version`` is what the scoring call
+    reported (see scored_index_version); a response that never reached an
+    index reports the one currently serving the tenant.
+    """
+    return {"X-Keyword-Index-Version": index_version or get_index_version(tenant), "X-Policy-Version": str(policy.version)}
+
+def service_error_response(status_code: int, code: str, message: str, headers: Optional[dict] = None, msgpack: bool = False) -> Response:
+    """
+    Errors about the service rather than the request (overload, unknown
+    tenant, admin access). They are not v3 responses: the status is never 200 and the
+    body is only ``{"errors": {"error_code", "message"}}``, so the sealed
+    v3 error codes stay as they are.
+    """
+    ERRORS_TOTAL.inc(code)
+    content = {"errors": {"error_code": code, "message": message}}
+    if msgpack:
+        return Response(content=packb(content), status_code=status_code, headers=headers, media_type=MSGPACK_MEDIA_TYPE)
+    return TimedJSONResponse(status_code=status_code, headers=headers, content=content)
+
+def unknown_tenant_response(msgpack: bool = False) -> Response:
+    """404 for an X-Tenant-Id with no keyword overlay; the request was not scored."""
+    return service_error_response(404, "UNKNOWN_TENANT", "Unknown tenant", msgpack=msgpack)
+
+def admin_auth_error(authorization: Optional[str]) -> Optional[Response]:
+    """
+    None when the request carries ``Authorization: Bearer <RISK_ADMIN_TOKEN>``,
+    otherwise the error response. Without RISK_ADMIN_TOKEN the admin
+    endpoints are disabled.
+    """
+    token = os.environ.get("RISK_ADMIN_TOKEN")
+    if not token:
+        return service_error_response(403, "ADMIN_DISABLED", "RISK_ADMIN_TOKEN is not configured")
+    scheme, _, credential = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(credential.strip().encode("utf-8"), token.encode("utf-8")):
+        logger.warning("Admin request rejected", extra={"event_type": "admin_unauthorized"})
+        return service_error_response(401, "UNAUTHORIZED", "Admin credential missing or invalid", {"WWW-Authenticate": "Bearer"})
+    return None
+
+async def reload_keywords() -> dict:
+    """
+    Recompiles RISK_KEYWORD_TABLE on a helper thread (never on the event loop
+    or a scoring worker), swaps it in, then brings the scoring workers onto it.
+    """
+    try:
+        result = await asyncio.to_thread(reload_keyword_table)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Keyword table reload failed: {e}", extra={"event_type": "keyword_table_invalid", "details": {"why": str(e)}})
+        ERRORS_TOTAL.inc("INVALID_KEYWORD_TABLE")
+        return {"reloaded": False, "index_version": get_index_version(), "table_version": get_table_version(),
+                "errors": {"error_code": "INVALID_KEYWORD_TABLE", "message": str(e)}}
+    await scoring_executor.sync_index()
+    result.update({"reloaded": True, "errors": None})
+    return result
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_json_logging()
+    await scoring_executor.sync_index()
+    # SIGHUP reloads the keyword table, where the platform has signals
+    loop = asyncio.get_running_loop()
+    if hasattr(signal, "SIGHUP"):
+        try:
+            loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(reload_keywords()))
+        except (NotImplementedError, RuntimeError, ValueError):
+            pass
+    yield
+    scoring_executor.shutdown(wait=True)
+    # Drain the background log writer so no records are lost on restart
+    shutdown_json_logging()
+
+app = FastAPI(title="Text Risk Scoring Service", lifespan=lifespan, default_response_class=TimedJSONResponse)
 
 # CORS middleware - must be added before routes
 app.add_middleware(
@@ -22,59 +217,343 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.post("/analyze", response_model=OutputSchema)
-def analyze(payload: InputSchema):
-    correlation_id = str(uuid.uuid4())[:8]
-    logger.info("Request received", extra={"correlation_id": correlation_id, "event_type": "analysis_request"})
-    
+def overload_response(correlation_id: str, e: ExecutorOverloaded, msgpack: bool = False) -> Response:
+    """Fast 503 when the admission limit is hit; the request was never scored."""
+    logger.warning("Request rejected: scoring executor overloaded", extra={"correlation_id": correlation_id, "event_type": "admission_rejected", "details": {"limit": e.limit}})
+    return service_error_response(503, "SERVICE_OVERLOADED", "Scoring capacity exhausted; retry later",
+                                  {"Retry-After": "1", "X-Keyword-Index-Version": get_index_version()}, msgpack)
+
+async def score_request(request_data, correlation_id: str, tenant: Optional[str], policy) -> Tuple[dict, Optional[str]]:
+    """
+    The /analyze pipeline for a decoded request body: input contract,
+    scoring, output contract. Returns the response and the version of the
+    keyword index that scored it (None if scoring never read one).
+    Failures become contract-shaped responses; ExecutorOverloaded and
+    UnknownTenantError are left to the caller.
+    """
+    index_version = None
     try:
-        request_data = payload.dict()
         logger.debug("Input validation starting", extra={"correlation_id": correlation_id, "event_type": "contract_enforcement"})
         
-        text = validate_input_contract(request_data)
+        with CONTRACT_SECONDS.time("input"):
+            text = validate_input_contract(request_data)
         logger.info(f"Input validated | length={len(text)}", extra={"correlation_id": correlation_id, "event_type": "contract_passed", "details": {"length": len(text)}})
         
-        response = analyze_text(text, correlation_id=correlation_id)
+        response, index_version = await scoring_executor.run(scored_index_version, analyze_text, text, correlation_id, tenant, policy)
         logger.info(f"Analysis complete | risk={response['risk_category']}", extra={"correlation_id": correlation_id, "event_type": "engine_success", "details": {"risk": response['risk_category']}})
         
-        validate_output_contract(response)
+        with CONTRACT_SECONDS.time("output"):
+            OUTPUT_CONTRACT_V3.validate(response)
         logger.debug("Output validated", extra={"correlation_id": correlation_id, "event_type": "contract_enforcement_passed"})
         
+    except ContractViolation as e:
+        logger.warning(f"Contract violation | code={e.code}", extra={"correlation_id": correlation_id, "event_type": "input_validation_failed", "details": {"code": e.code, "why": e.message}})
+        response = contract_error_response(e.code, e.message)
+    except (ExecutorOverloaded, UnknownTenantError):
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error | correlation_id={correlation_id} | event_type=unhandled_exception | why={str(e)}", exc_info=True)
+        response = contract_error_response("INTERNAL_ERROR", "Unexpected system error")
+    return response, index_version
+
+@app.post("/analyze", response_model=OutputSchema)
+async def analyze(payload: InputSchema, x_tenant_id: Optional[str] = Header(None)):
+    started = time.perf_counter()
+    correlation_id = str(uuid.uuid4())[:8]
+    # Read once: the whole request is scored with the policy it reports
+    policy = get_active_policy()
+    logger.info("Request received", extra={"correlation_id": correlation_id, "event_type": "analysis_request"})
+    
+    try:
+        response, index_version = await score_request(payload.dict(), correlation_id, x_tenant_id, policy)
+    except ExecutorOverloaded as e:
+        return overload_response(correlation_id, e)
+    except UnknownTenantError:
+        return unknown_tenant_response()
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, "analyze")
+
+    record_response(response)
+    return ContractJSONResponse(response, headers=version_headers(x_tenant_id, policy, index_version))
+
+@app.post("/analyze/text", response_model=OutputSchema)
+async def analyze_raw_text(request: Request, x_tenant_id: Optional[str] = Header(None)):
+    """
+    /analyze for a text/plain body: the raw UTF-8 body is the text. ASCII
+    bodies are scored straight from the bytes (see analyze_bytes).
+    """
+    started = time.perf_counter()
+    correlation_id = str(uuid.uuid4())[:8]
+    policy = get_active_policy()
+    index_version = None
+    logger.info("Request received", extra={"correlation_id": correlation_id, "event_type": "analysis_request"})
+
+    try:
+        body = await request.body()
+        response, index_version = await scoring_executor.run(scored_index_version, analyze_bytes, body, correlation_id, x_tenant_id, policy)
+        with CONTRACT_SECONDS.time("output"):
+            OUTPUT_CONTRACT_V3.validate(response)
+    except ContractViolation as e:
+        logger.error(f"Output contract violation | code={e.code}", extra={"correlation_id": correlation_id, "event_type": "output_validation_failed", "details": {"code": e.code, "why": e.message}})
+        response = contract_error_response("INTERNAL_ERROR", "Unexpected system error")
+    except ExecutorOverloaded as e:
+        return overload_response(correlation_id, e)
+    except UnknownTenantError:
+        return unknown_tenant_response()
+    except Exception as e:
+        logger.error(f"Unexpected error | correlation_id={correlation_id} | event_type=unhandled_exception | why={str(e)}", exc_info=True)
+        response = contract_error_response("INTERNAL_ERROR", "Unexpected system error")
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, "analyze_text")
+
+    record_response(response)
+    return ContractJSONResponse(response, headers=version_headers(x_tenant_id, policy, index_version))
+
+async def score_batch(request_data, correlation_id: str, tenant: Optional[str], policy) -> Tuple[dict, Optional[str]]:
+    """
+    The /analyze/batch pipeline for a decoded request body: the results
+    envelope, or an envelope error, and the version of the keyword index
+    the batch was scored with. ExecutorOverloaded and UnknownTenantError
+    are left to the caller.
+    """
+    index_version = None
+    try:
+        items = validate_batch_input_contract(request_data)
+    except ContractViolation as e:
+        logger.warning(f"Batch contract violation | code={e.code}", extra={"correlation_id": correlation_id, "event_type": "batch_validation_failed", "details": {"code": e.code, "why": e.message}})
+        ERRORS_TOTAL.inc(e.code)
+        return {"results": [], "errors": {"error_code": e.code, "message": e.message}}, index_version
+
+    # Item-level input contract; failures become that item's response only
+    results = [None] * len(items)
+    texts, slots = [], []
+    for index, item in enumerate(items):
+        try:
+            with CONTRACT_SECONDS.time("input"):
+                texts.append(validate_input_contract(item))
+            slots.append(index)
+        except ContractViolation as e:
+            logger.warning(f"Contract violation | code={e.code}", extra={"correlation_id": f"{correlation_id}-{index}", "event_type": "input_validation_failed", "details": {"code": e.code, "why": e.message}})
+            results[index] = contract_error_response(e.code, e.message)
+
+    try:
+        responses, index_version = await scoring_executor.run(scored_index_version, analyze_texts, texts, [f"{correlation_id}-{index}" for index in slots], tenant, policy)
+    except (ExecutorOverloaded, UnknownTenantError):
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error | correlation_id={correlation_id} | event_type=unhandled_exception | why={str(e)}", exc_info=True)
+        responses = [contract_error_response("INTERNAL_ERROR", "Unexpected system error") for _ in slots]
+
+    for index, response in zip(slots, responses):
+        try:
+            with CONTRACT_SECONDS.time("output"):
+                OUTPUT_CONTRACT_V3.validate(response)
+        except ContractViolation as e:
+            logger.error(f"Output contract violation | code={e.code}", extra={"correlation_id": f"{correlation_id}-{index}", "event_type": "output_validation_failed", "details": {"code": e.code, "why": e.message}})
+            response = contract_error_response("INTERNAL_ERROR", "Unexpected system error")
+        results[index] = response
+
+    for response in results:
+        record_response(response)
+    logger.info(f"Batch complete | items={len(items)}", extra={"correlation_id": correlation_id, "event_type": "batch_complete", "details": {"items": len(items), "scored": len(slots)}})
+    return {"results": results, "errors": None}, index_version
+
+@app.post("/analyze/batch", response_model=BatchOutputSchema)
+async def analyze_batch(payload: BatchInputSchema, x_tenant_id: Optional[str] = Header(None)):
+    started = time.perf_counter()
+    correlation_id = str(uuid.uuid4())[:8]
+    policy = get_active_policy()
+    logger.info("Batch request received", extra={"correlation_id": correlation_id, "event_type": "batch_request"})
+
+    try:
+        envelope, index_version = await score_batch(payload.dict(), correlation_id, x_tenant_id, policy)
+    except ExecutorOverloaded as e:
+        return overload_response(correlation_id, e)
+    except UnknownTenantError:
+        return unknown_tenant_response()
+    if envelope["errors"] is None:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, "analyze_batch")
+    return ContractJSONResponse(envelope, BATCH_OUTPUT_LAYOUT, version_headers(x_tenant_id, policy, index_version))
+
+@app.post("/analyze/msgpack")
+async def analyze_msgpack(request: Request, compact: bool = False, x_tenant_id: Optional[str] = Header(None)):
+    """
+    /analyze and /analyze/batch for internal callers, over MessagePack
+    (Content-Type: application/msgpack). A frame holding "items" is a
+    batch, anything else a single request; the body is the JSON response
+    as a frame. ?compact=true sends trigger_reasons as keyword entry ids,
+    decoded with /analyze/msgpack/keywords for X-Keyword-Index-Version.
+    """
+    started = time.perf_counter()
+    correlation_id = str(uuid.uuid4())[:8]
+    policy = get_active_policy()
+    index_version = None
+    logger.info("Binary request received", extra={"correlation_id": correlation_id, "event_type": "binary_request"})
+
+    if not is_msgpack(request.headers.get("content-type")):
+        ERRORS_TOTAL.inc("INVALID_ENCODING")
+        return TimedJSONResponse(status_code=415, content=contract_error_response("INVALID_ENCODING", f"Content-Type must be {MSGPACK_MEDIA_TYPE}"))
+    try:
+        data = unpackb(await request.body())
+    except FrameError as e:
+        logger.warning("Binary frame rejected", extra={"correlation_id": correlation_id, "event_type": "input_validation_failed", "details": {"code": "INVALID_ENCODING", "why": str(e)}})
+        response = contract_error_response("INVALID_ENCODING", "Body must be one MessagePack frame")
+        record_response(response)
+        return MsgpackResponse(response, headers=version_headers(x_tenant_id, policy, index_version))
+
+    batch = isinstance(data, dict) and "items" in data
+    layout = BATCH_OUTPUT_LAYOUT if batch else OUTPUT_LAYOUT
+    try:
+        if batch:
+            response, index_version = await score_batch(data, correlation_id, x_tenant_id, policy)
+        elif not isinstance(data, dict):
+            response = contract_error_response("INVALID_TYPE", "Request frame must be a map")
+        else:
+            response, index_version = await score_request(data, correlation_id, x_tenant_id, policy)
+    except ExecutorOverloaded as e:
+        return overload_response(correlation_id, e, msgpack=True)
+    except UnknownTenantError:
+        return unknown_tenant_response(msgpack=True)
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, "analyze_msgpack")
+
+    if not batch:
+        record_response(response)
+    headers = version_headers(x_tenant_id, policy, index_version)
+    index = get_keyword_index(x_tenant_id) if compact else None
+    if index is not None:
+        # Ids are only meaningful for the index they were taken from
+        headers["X-Keyword-Index-Version"] = index.version
+    return MsgpackResponse(response, layout, headers, index=index)
+
+@app.get("/analyze/msgpack/keywords")
+def msgpack_keyword_table(x_tenant_id: Optional[str] = Header(None)):
+    """Decode table for compact /analyze/msgpack frames: {"index_version", "categories", "entries"}."""
+    index = get_keyword_index(x_tenant_id)
+    if index is None:
+        return unknown_tenant_response()
+    return Response(content=packb(keyword_table(index)), media_type=MSGPACK_MEDIA_TYPE,
+                    headers={"X-Keyword-Index-Version": index.version})
+
+@app.websocket("/analyze/stream")
+async def analyze_stream(websocket: WebSocket, credits: int = STREAM_INITIAL_CREDITS, x_tenant_id: Optional[str] = Header(None)):
+    """
+    Long-lived scoring channel for chat gateways (see StreamSession for
+    the messages). Each message is scored like an /analyze request, with
+    the policy active when it arrives, and its result is sent when it
+    completes, as long as the client has credit left.
+    """
+    await websocket.accept()
+    connection_id = str(uuid.uuid4())[:8]
+    if get_keyword_index(x_tenant_id) is None:
+        ERRORS_TOTAL.inc("UNKNOWN_TENANT")
+        await websocket.send_text(dumps({"type": "rejected", "id": None, "errors": {"error_code": "UNKNOWN_TENANT", "message": "Unknown tenant"}}).decode("utf-8"))
+        await websocket.close(code=1008)
+        return
+    logger.info("Stream opened", extra={"correlation_id": connection_id, "event_type": "stream_opened", "details": {"credits": credits}})
+
+    async def score(request_data, correlation_id):
+        started = time.perf_counter()
+        try:
+            response, _ = await score_request(request_data, correlation_id, x_tenant_id, get_active_policy())
+        except ExecutorOverloaded as e:
+            # Sent as a "rejected" message, not as a v3 result
+            logger.warning("Request rejected: scoring executor overloaded", extra={"correlation_id": correlation_id, "event_type": "admission_rejected", "details": {"limit": e.limit}})
+            ERRORS_TOTAL.inc("SERVICE_OVERLOADED")
+            raise
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - started, "analyze_stream")
+        record_response(response)
         return response
-        
+
+    async def send(message):
+        await websocket.send_text(dumps(message).decode("utf-8"))
+
+    async def messages():
+        try:
+            while True:
+                text = await websocket.receive_text()
+                try:
+                    yield json.loads(text)
+                except ValueError:
+                    yield None
+        except WebSocketDisconnect:
+            return
+
+    session = StreamSession(send, score, connection_id, credits, *STREAM_LIMITS)
+    try:
+        await session.run(messages())
+    finally:
+        logger.info("Stream closed", extra={"correlation_id": connection_id, "event_type": "stream_closed", "details": session.snapshot()})
+
+@app.post("/analyze/document", response_model=DocumentOutputSchema)
+async def analyze_long_document(payload: InputSchema, x_tenant_id: Optional[str] = Header(None)):
+    started = time.perf_counter()
+    correlation_id = str(uuid.uuid4())[:8]
+    policy = get_active_policy()
+    index_version = None
+    logger.info("Document request received", extra={"correlation_id": correlation_id, "event_type": "document_request"})
+
+    try:
+        with CONTRACT_SECONDS.time("input"):
+            text = validate_document_input_contract(payload.dict())
+        response, index_version = await scoring_executor.run(scored_index_version, analyze_document, text, correlation_id, MAX_TEXT_LENGTH, x_tenant_id, policy)
+        with CONTRACT_SECONDS.time("output"):
+            validate_document_output_contract(response)
     except ContractViolation as e:
         logger.warning(f"Contract violation | code={e.code}", extra={"correlation_id": correlation_id, "event_type": "input_validation_failed", "details": {"code": e.code, "why": e.message}})
-        return {
-            "risk_score": 0.0,
-            "confidence_score": 0.0,
-            "risk_category": "LOW",
-            "trigger_reasons": [],
-            "processed_length": 0,
-            "safety_metadata": {
-                "is_decision": False,
-                "authority": "NONE",
-                "actionable": False
-            },
-            "errors": {
-                "error_code": e.code,
-                "message": e.message
-            }
-        }
+        response = document_contract_error_response(e.code, e.message)
+    except ExecutorOverloaded as e:
+        return overload_response(correlation_id, e)
+    except UnknownTenantError:
+        return unknown_tenant_response()
     except Exception as e:
         logger.error(f"Unexpected error | correlation_id={correlation_id} | event_type=unhandled_exception | why={str(e)}", exc_info=True)
-        return {
-            "risk_score": 0.0,
-            "confidence_score": 0.0,
-            "risk_category": "LOW",
-            "trigger_reasons": [],
-            "processed_length": 0,
-            "safety_metadata": {
-                "is_decision": False,
-                "authority": "NONE",
-                "actionable": False
-            },
-            "errors": {
-                "error_code": "INTERNAL_ERROR",
-                "message": "Unexpected system error"
-            }
-        }
+        response = document_contract_error_response("INTERNAL_ERROR", "Unexpected system error")
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, "analyze_document")
+
+    record_response(response)
+    return ContractJSONResponse(response, DOCUMENT_OUTPUT_LAYOUT, version_headers(x_tenant_id, policy, index_version))
+
+@app.post("/admin/keywords/reload")
+async def reload_keyword_table_endpoint(authorization: Optional[str] = Header(None)):
+    """Reloads the keyword table from RISK_KEYWORD_TABLE; same as sending SIGHUP."""
+    denied = admin_auth_error(authorization)
+    if denied is not None:
+        return denied
+    return await reload_keywords()
+
+@app.get("/admin/policy")
+def active_policy():
+    """The scoring policy new requests are scored with."""
+    return asdict(get_active_policy_state())
+
+@app.post("/admin/policy")
+async def promote_policy_endpoint(request: Request, authorization: Optional[str] = Header(None)):
+    """
+    Promotes a PolicyState (e.g. a learning_step result) to the active
+    scoring policy. An optional "expected_version" makes the promotion
+    conditional on that version still being active.
+    """
+    denied = admin_auth_error(authorization)
+    if denied is not None:
+        return denied
+    active = get_active_policy()
+    try:
+        data = await request.json()
+        expected_version = data.pop("expected_version", None) if isinstance(data, dict) else None
+        policy = promote_policy(policy_state_from_dict(data), expected_version)
+    except PolicyConflict as e:
+        ERRORS_TOTAL.inc("POLICY_CONFLICT")
+        return {"promoted": False, "policy_version": e.active, "errors": {"error_code": "POLICY_CONFLICT", "message": str(e)}}
+    except ValueError as e:
+        logger.warning(f"Policy promotion rejected: {e}", extra={"event_type": "policy_invalid", "details": {"why": str(e)}})
+        ERRORS_TOTAL.inc("INVALID_POLICY")
+        return {"promoted": False, "policy_version": active.version, "errors": {"error_code": "INVALID_POLICY", "message": str(e)}}
+    return {"promoted": True, "policy_version": policy.version, "errors": None}
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text exposition of the service metrics."""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,354 @@
+"""
+Matchers Module
+Interchangeable keyword matching backends behind one protocol, a
+benchmark that picks the fastest for a table and workload, and the
+differential check that keeps them equivalent to the reference
+"""
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Pattern, Protocol, Sequence, Tuple
+
+from app.keyword_index import _WORD_PATTERN, KeywordIndex, _keyword_pattern
+
+
+class Matcher(Protocol):
+    """
+    What the engine needs from a keyword matcher. ``entries``, ``reasons``
+    and ``version`` describe the keyword table in scoring order; ``find``
+    returns the sorted ids of the entries whose keyword occurs in the text
+    (each at most once), with the range semantics of KeywordIndex.find.
+    ``may_match`` returning False must prove ``find`` is empty.
+
+    The scoring rules never look past the entry ids, so any two matchers
+    that agree on ``find`` produce identical responses.
+    """
+
+    entries: Tuple[Tuple[str, str], ...]
+    reasons: Tuple[str, ...]
+    version: str
+    max_keyword_length: int
+
+    def may_match(self, text: str) -> bool: ...
+
+    def find(self, text: str, pos: int = 0, endpos: Optional[int] = None) -> List[int]: ...
+
+
+class _TableView:
+    """
+    Shares the table description (entries, reasons, version) of the index a
+    backend was built from. Holds no reference to the index itself, so a
+    backend can be cached against it weakly.
+    """
+
+    def __init__(self, index):
+        self.entries = index.entries
+        self.reasons = index.reasons
+        self.version = index.version
+        self.max_keyword_length = index.max_keyword_length
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class RegexMatcher(_TableView):
+    """
+    Reference backend: one ``\\b<keyword>\\b`` search per entry, exactly the
+    matching the engine was specified with. Slow on large tables, but it
+    defines what every other backend must return.
+    """
+
+    name = "regex"
+
+    def __init__(self, index):
+        super().__init__(index)
+        self._patterns: Tuple[Pattern, ...] = tuple(_keyword_pattern(keyword) for _, keyword in self.entries)
+
+    def may_match(self, text: str) -> bool:
+        return True
+
+    def find(self, text: str, pos: int = 0, endpos: Optional[int] = None) -> List[int]:
+        if endpos is None:
+            endpos = len(text)
+        # Bounded like KeywordIndex's unanchored search: a keyword starting
+        # before endpos, and its closing \b, fit within the limit
+        limit = min(len(text), endpos + self.max_keyword_length + 1)
+        matched = []
+        for entry_id, pattern in enumerate(self._patterns):
+            match = pattern.search(text, pos, limit)
+            if match is not None and match.start() < endpos:
+                matched.append(entry_id)
+        return matched
+
+
+def _is_word(char: str) -> bool:
+    # The \w definition re uses for str patterns
+    return char.isalnum() or char == "_"
+
+
+class TrieMatcher(_TableView):
+    """
+    Character trie of every keyword that starts with a word character,
+    walked from each word token's first character. A walk ends where the
+    text leaves the trie, so each token costs the length of the longest
+    keyword it starts, and shared prefixes ("kill", "kill you", "killing")
+    are read once. A terminal node matches when a word boundary follows.
+    Keywords that do not start with a word character keep their regex.
+    """
+
+    name = "trie"
+
+    def __init__(self, index):
+        super().__init__(index)
+        root: dict = {}
+        unanchored = []
+        for entry_id, (_, keyword) in enumerate(self.entries):
+            if not _is_word(keyword[0]):
+                unanchored.append((entry_id, _keyword_pattern(keyword)))
+                continue
+            node = root
+            for char in keyword:
+                node = node.setdefault(char, {})
+            # None never collides with a one-character key
+            node[None] = node.get(None, ()) + (entry_id,)
+        self._root = root
+        self._unanchored = tuple(unanchored)
+        self._heads = frozenset(_WORD_PATTERN.match(keyword).group() for _, keyword in self.entries if _is_word(keyword[0]))
+
+    def may_match(self, text: str) -> bool:
+        """Exact prefilter: some token must equal a keyword's leading word (see KeywordIndex.may_match)."""
+        return bool(self._unanchored) or not self._heads.isdisjoint(_WORD_PATTERN.findall(text))
+
+    def find(self, text: str, pos: int = 0, endpos: Optional[int] = None) -> List[int]:
+        length = len(text)
+        if endpos is None:
+            endpos = length
+        root = self._root
+        matched = set()
+        # A token the range starts in the middle of is not a word start
+        split_token = pos > 0 and _is_word(text[pos - 1])
+
+        for token in _WORD_PATTERN.finditer(text, pos):
+            start = token.start()
+            if start >= endpos:
+                break
+            node = root.get(text[start])
+            if node is None or (start == pos and split_token):
+                continue
+            end = start + 1
+            while True:
+                ids = node.get(None)
+                if ids is not None and _is_word(text[end - 1]) != (end < length and _is_word(text[end])):
+                    matched.update(ids)
+                if end == length:
+                    break
+                node = node.get(text[end])
+                if node is None:
+                    break
+                end += 1
+
+        limit = min(length, endpos + self.max_keyword_length + 1)
+        for entry_id, pattern in self._unanchored:
+            match = pattern.search(text, pos, limit)
+            if match is not None and match.start() < endpos:
+                matched.add(entry_id)
+
+        return sorted(matched)
+
+
+# Backend name -> factory taking the KeywordIndex (or tenant overlay) it matches for.
+# "token" is the compiled index itself: one tokenization, a hash lookup of
+# each token against the keywords' leading words, then phrase verification.
+MATCHER_BACKENDS: Dict[str, Callable[..., Matcher]] = {
+    "regex": RegexMatcher,
+    "token": lambda index: index,
+    "trie": TrieMatcher,
+}
+REFERENCE_BACKEND = "regex"
+DEFAULT_BACKEND = "token"
+
+
+def build_matcher(name: str, index) -> Matcher:
+    """Backend ``name`` for ``index``. Raises ValueError for an unknown backend."""
+    if name not in MATCHER_BACKENDS:
+        raise ValueError(f"Unknown matcher backend {name!r}; expected one of {sorted(MATCHER_BACKENDS)}")
+    return MATCHER_BACKENDS[name](index)
+
+
+# =========================
+# Generated Inputs
+# =========================
+# Short texts pack the most boundaries per second of reference scanning
+DIFFERENTIAL_LENGTHS = (16, 64, 256)
+DIFFERENTIAL_CHUNK = 10000
+_NOISE_WORDS = ("the", "a", "of", "and", "to", "in", "is", "you", "that", "it", "hello", "world", "report", "skill", "x")
+_SEPARATORS = (" ", " ", " ", "  ", "\n", "\t", ", ", ". ", "-", "_", "'", "/", "!", "(", ")")
+_UNICODE = ("é", "ß", "σ", "ς", "İ", "ı", "ǆ", "١", "²", "ﬁ", "​", "文", "😀")
+
+
+def generate_texts(index, count: int, lengths: Sequence[int] = (40, 200, 1000), seed: int = 0):
+    """
+    Yields ``count`` deterministic pseudo-random texts built to stress
+    matching edge cases: keywords and near misses (word-character affixes,
+    truncated and overlapping fragments), single words of phrases,
+    upper-cased keywords, separators that are and are not word characters,
+    and non-ASCII characters whose \\w status or case mapping is unusual.
+    Lengths cycle through ``lengths``.
+    """
+    rng = random.Random(seed)
+    keywords = [keyword for _, keyword in index.entries] or ["x"]
+    words = sorted({word for keyword in keywords for word in _WORD_PATTERN.findall(keyword)}) or ["x"]
+
+    def piece() -> str:
+        roll = rng.random()
+        if roll < 0.25:
+            return rng.choice(keywords)
+        if roll < 0.45:
+            keyword = rng.choice(keywords)
+            cut = rng.randrange(1, len(keyword) + 1)
+            return rng.choice((keyword[:cut], keyword[cut - 1:], rng.choice(("s", "_", "1", "é")) + keyword, keyword + rng.choice(("s", "ing", "_", "2", "é"))))
+        if roll < 0.65:
+            return rng.choice(words)
+        if roll < 0.75:
+            return rng.choice(_UNICODE)
+        if roll < 0.8:
+            return rng.choice(keywords).upper()
+        return rng.choice(_NOISE_WORDS)
+
+    for i in range(count):
+        target = lengths[i % len(lengths)]
+        parts, size = [], 0
+        while size < target:
+            part = piece() + rng.choice(_SEPARATORS)
+            parts.append(part)
+            size += len(part)
+        text = "".join(parts)[:target]
+        # Most traffic reaches the matcher stripped and lowercased
+        yield text.strip().lower() if rng.random() < 0.8 else text
+
+
+def differential_check(index, count: int, lengths: Sequence[int] = DIFFERENTIAL_LENGTHS, seed: int = 0,
+                       backends: Optional[Sequence[str]] = None) -> Dict[str, int]:
+    """
+    Runs every backend against the reference on ``count`` generated texts,
+    full scans and a random range of each. Returns the number of inputs
+    checked per backend; raises AssertionError on the first divergence.
+    """
+    names = [name for name in (backends or MATCHER_BACKENDS) if name != REFERENCE_BACKEND]
+    reference = build_matcher(REFERENCE_BACKEND, index)
+    matchers = [(name, build_matcher(name, index)) for name in names]
+    rng = random.Random(seed + 1)
+    checked = dict.fromkeys(names, 0)
+
+    for text in generate_texts(index, count, lengths, seed):
+        pos = rng.randrange(len(text) + 1)
+        endpos = rng.randrange(pos, len(text) + 1)
+        expected = reference.find(text)
+        expected_range = reference.find(text, pos, endpos)
+        for name, matcher in matchers:
+            for got, want, bounds in ((matcher.find(text), expected, ()), (matcher.find(text, pos, endpos), expected_range, (pos, endpos))):
+                if got != want:
+                    raise AssertionError(f"{name} diverged from {REFERENCE_BACKEND} on {text!r}{bounds}: {got} != {want}")
+            if expected and not matcher.may_match(text):
+                raise AssertionError(f"{name} prefilter rejected a matching text {text!r}")
+            checked[name] += 1
+    return checked
+
+
+def _differential_chunk(job) -> Dict[str, int]:
+    index, count, lengths, seed = job
+    return differential_check(index, count, lengths, seed)
+
+
+def parallel_differential_check(index, count: int, lengths: Sequence[int] = DIFFERENTIAL_LENGTHS, seed: int = 0,
+                                processes: int = 1) -> Dict[str, int]:
+    """differential_check over ``count`` inputs in DIFFERENTIAL_CHUNK-sized chunks, each with its own seed."""
+    jobs = [(index, min(DIFFERENTIAL_CHUNK, count - start), lengths, seed + chunk)
+            for chunk, start in enumerate(range(0, count, DIFFERENTIAL_CHUNK))]
+    checked: Dict[str, int] = {}
+    if processes > 1:
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(_differential_chunk, jobs))
+    else:
+        results = map(_differential_chunk, jobs)
+    for result in results:
+        for name, inputs in result.items():
+            checked[name] = checked.get(name, 0) + inputs
+    return checked
+
+
+# =========================
+# Benchmark Harness
+# =========================
+BENCHMARK_LENGTHS = (40, 200, 1000, 5000)
+
+
+def _clean_text(rng: random.Random, length: int) -> str:
+    return " ".join(rng.choice(_NOISE_WORDS) for _ in range(length // 2 + 1))[:length].strip()
+
+def benchmark_matchers(index, texts: Sequence[str], repeat: int = 3,
+                       backends: Optional[Sequence[str]] = None) -> Dict[str, float]:
+    """
+    Best-of-``repeat`` seconds each backend takes to scan ``texts`` the way
+    the engine does (prefilter, then find).
+    """
+    timings = {}
+    for name in backends or MATCHER_BACKENDS:
+        matcher = build_matcher(name, index)
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for text in texts:
+                if matcher.may_match(text):
+                    matcher.find(text)
+            best = min(best, time.perf_counter() - started)
+        timings[name] = best
+    return timings
+
+
+def fastest_matcher(index, texts: Sequence[str], repeat: int = 3) -> Tuple[str, Dict[str, float]]:
+    """The fastest backend for ``index`` on ``texts`` (ties go to the default), with all timings."""
+    timings = benchmark_matchers(index, texts, repeat)
+    best = min(timings, key=lambda name: (timings[name], name != DEFAULT_BACKEND))
+    return best, timings
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Benchmarks the matcher backends, or runs the differential check."""
+    from app import engine
+    from app.engine import load_keyword_table
+
+    parser = argparse.ArgumentParser(description="Benchmark or cross-check the keyword matcher backends")
+    parser.add_argument("--table", help="keyword table JSON (default: the serving table)")
+    parser.add_argument("--lengths", help="comma-separated text lengths to cycle through (default: 40,200,1000,5000 "
+                        "for benchmarks, 16,64,256 for --differential)")
+    parser.add_argument("--samples", type=int, default=2000, help="generated texts per benchmark")
+    parser.add_argument("--clean", type=float, default=0.0, help="fraction of benchmark texts with no keyword material")
+    parser.add_argument("--differential", type=int, metavar="N", help="check every backend against the reference on N inputs")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes for --differential")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    index = KeywordIndex.from_table(load_keyword_table(args.table)[1]) if args.table else engine.KEYWORD_INDEX
+    lengths = [int(length) for length in args.lengths.split(",")] if args.lengths else None
+
+    if args.differential:
+        started = time.perf_counter()
+        checked = parallel_differential_check(index, args.differential, lengths or DIFFERENTIAL_LENGTHS, args.seed, args.processes)
+        print(json.dumps({"inputs": args.differential, "checked": checked, "divergences": 0,
+                          "seconds": round(time.perf_counter() - started, 1)}))
+        return 0
+
+    texts = list(generate_texts(index, args.samples, lengths or BENCHMARK_LENGTHS, args.seed))
+    # Most production traffic is clean; --clean swaps that share in
+    rng = random.Random(args.seed)
+    texts = [_clean_text(rng, len(text)) if rng.random() < args.clean else text for text in texts]
+    best, timings = fastest_matcher(index, texts)
+    print(json.dumps({"fastest": best, "us_per_text": {name: round(seconds / len(texts) * 1e6, 2) for name, seconds in timings.items()}}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
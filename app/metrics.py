@@ -0,0 +1,298 @@
+"""
+Metrics Module
+In-process metrics registry with Prometheus text exposition
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds: 50us .. 2.5s
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _header(name: str, documentation: str, metric_type: str) -> List[str]:
+    return [f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}"]
+
+
+class _ShardedMetric:
+    """
+    Base for metrics updated from many threads. Each thread writes only to
+    its own shard, so updates never take a lock; the lock is taken once per
+    thread (to register its shard) and when collecting.
+    """
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def _snapshot(self) -> List[dict]:
+        with self._lock:
+            shards = list(self._shards)
+        # dict() copies are atomic under the GIL; a racing update simply
+        # lands in the next scrape
+        return [dict(shard) for shard in shards]
+
+    def _check_labels(self, labels: Tuple[str, ...]) -> None:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+    def expose(self) -> List[str]:
+        return _header(self.name, self.documentation, self.metric_type) + self.render()
+
+
+class Counter(_ShardedMetric):
+    metric_type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._check_labels(labels)
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return sum(shard.get(labels, 0.0) for shard in self._snapshot())
+
+    def totals(self) -> Dict[Tuple[str, ...], float]:
+        """Value of every label combination seen so far."""
+        totals: Dict[Tuple[str, ...], float] = {}
+        for shard in self._snapshot():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.totals().items())
+        ]
+
+
+class Histogram(_ShardedMetric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        self._check_labels(labels)
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            # per-bucket counts (last slot is +Inf), then sum
+            series = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def time(self, *labels: str) -> "_Timer":
+        """Context manager observing the elapsed time of its block."""
+        return _Timer(self, labels)
+
+    def count(self, *labels: str) -> int:
+        return sum(sum(shard[labels][:-1]) for shard in self._snapshot() if labels in shard)
+
+    def render(self) -> List[str]:
+        merged: Dict[Tuple[str, ...], List[float]] = {}
+        for shard in self._snapshot():
+            for labels, series in shard.items():
+                total = merged.setdefault(labels, [0] * len(series))
+                for i, value in enumerate(series):
+                    total[i] += value
+
+        lines = []
+        for labels, series in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+class Gauge:
+    """
+    Gauge read from a callback at scrape time (e.g. executor queue depth).
+    With ``labelnames`` the callback returns {label values tuple: value}.
+    """
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Any], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> List[str]:
+        if not self.labelnames:
+            return [f"{self.name} {_format_value(self.callback())}"]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.callback().items())
+        ]
+
+    def expose(self) -> List[str]:
+        return _header(self.name, self.documentation, self.metric_type) + self.render()
+
+
+class StatsCollector:
+    """
+    Exposes the numeric fields of a component's ``stats()`` dict as one
+    metric each (``<prefix>_<field>``). Fields listed in ``counters`` are
+    typed as counters, the rest as gauges. A source returning None (e.g. a
+    cache that is not configured) exposes nothing.
+    """
+
+    def __init__(self, name: str, documentation: str, source: Callable[[], Optional[Dict[str, Any]]], counters: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.source = source
+        self.counters = frozenset(counters)
+
+    def expose(self) -> List[str]:
+        stats = self.source()
+        if not stats:
+            return []
+        lines = []
+        for field, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            name = f"{self.name}_{field}"
+            lines.extend(_header(name, f"{self.documentation}: {field}", "counter" if field in self.counters else "gauge"))
+            lines.append(f"{name} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, callback: Callable[[], Any], labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, callback, labelnames))
+
+    def stats(self, name: str, documentation: str, source: Callable[[], Optional[Dict[str, Any]]], counters: Sequence[str] = ()) -> StatsCollector:
+        """Registers (or replaces) a stats() collector, see StatsCollector."""
+        collector = StatsCollector(name, documentation, source, counters)
+        with self._lock:
+            self._metrics[name] = collector
+        return collector
+
+    def get(self, name: str) -> Optional[object]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+# =========================
+# Service Metrics
+# =========================
+REGISTRY = MetricsRegistry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "risk_request_duration_seconds", "End-to-end handler latency", ["endpoint"])
+ENGINE_SECONDS = REGISTRY.histogram(
+    "risk_engine_duration_seconds", "Time spent running the scoring engine")
+EXECUTOR_WAIT_SECONDS = REGISTRY.histogram(
+    "risk_executor_wait_seconds", "Time admitted calls waited for a scoring worker")
+CONTRACT_SECONDS = REGISTRY.histogram(
+    "risk_contract_validation_seconds", "Contract validation time", ["stage"])
+SERIALIZATION_SECONDS = REGISTRY.histogram(
+    "risk_serialization_duration_seconds", "Response body encoding time")
+
+RESPONSES_TOTAL = REGISTRY.counter(
+    "risk_responses_total", "Scored responses by risk_category", ["risk_category"])
+ERRORS_TOTAL = REGISTRY.counter(
+    "risk_errors_total", "Error responses by error_code", ["error_code"])
+CATEGORY_MATCHES_TOTAL = REGISTRY.counter(
+    "risk_category_matches_total", "Scored texts in which a risk category matched (counted by the engine)", ["category"])
+PREFILTER_TOTAL = REGISTRY.counter(
+    "risk_prefilter_total", "Keyword prefilter outcomes (rejected = proven clean, scan skipped)", ["result"])
+
+
+def record_response(response: Dict) -> None:
+    """
+    Counts one v3 response by category or error code. Matched categories
+    are counted by the engine from the keyword entries it scored.
+    """
+    errors = response.get("errors")
+    if errors:
+        ERRORS_TOTAL.inc(errors.get("error_code", "UNKNOWN"))
+        return
+
+    RESPONSES_TOTAL.inc(response["risk_category"])
@@ -1,6 +1,13 @@
+import copy
 import logging
 import json
-from typing import Dict, Any
+import os
+import queue
+import sys
+import threading
+import time
+import weakref
+from typing import Dict, Any, Optional, TextIO
 
 class JsonFormatter(logging.Formatter):
     """
@@ -28,19 +35,215 @@ class JsonFormatter(logging.Formatter):
 
         return json.dumps(log_record)
 
-def setup_json_logging():
+# Queued after the last record to stop the writer thread
+_STOP = object()
+
+# Open AsyncJsonHandlers, restarted in forked children (e.g. worker pools)
+_live_handlers: "weakref.WeakSet" = weakref.WeakSet()
+
+def _restart_handlers_after_fork() -> None:
+    for handler in list(_live_handlers):
+        handler._after_fork()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_handlers_after_fork)
+
+def _snapshot(value: Any) -> Any:
+    """Copy of the containers in a JSON-like value, so later mutation cannot reach it."""
+    if isinstance(value, dict):
+        return {key: _snapshot(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_snapshot(item) for item in value]
+    return value
+
+class AsyncJsonHandler(logging.Handler):
+    """
+    Non-blocking handler. emit() only places a prepared copy of the record
+    on a bounded queue; a background writer thread runs the formatter and
+    writes records to the stream in batches, flushing once batch_size records are pending or
+    flush_interval seconds after the first pending record, whichever is first.
+
+    When the queue is full the record is dropped and counted rather than
+    blocking the request thread. close() drains everything already queued.
+    """
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        capacity: int = 10000,
+        batch_size: int = 256,
+        flush_interval: float = 0.05
+    ):
+        super().__init__()
+        self.stream = stream if stream is not None else sys.stderr
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=capacity)
+        self._closed = False
+        self.dropped = 0   # updated in emit(), which runs under the handler lock
+        self.written = 0   # updated by the writer thread only
+
+        self._start_writer()
+        _live_handlers.add(self)
+
+    def _start_writer(self) -> None:
+        self._writer = threading.Thread(target=self._run, name="json-log-writer", daemon=True)
+        self._writer.start()
+
+    def _after_fork(self) -> None:
+        """
+        A forked child inherits the queue but not the writer thread. Records
+        still queued belong to the parent, which writes them; the child gets
+        a fresh queue and its own writer.
+        """
+        if self._closed:
+            return
+        self._queue = queue.Queue(maxsize=self.capacity)
+        self.dropped = 0
+        self.written = 0
+        self._start_writer()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        A copy of record that is final at emit time, as QueueHandler.prepare
+        makes: the message is merged with its args, the traceback is rendered
+        and ``details`` is snapshotted, so objects the caller mutates after
+        the log call cannot change the line the writer thread formats later.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if hasattr(record, "details"):
+            record.details = _snapshot(record.details)
+        return record
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._closed:
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def _run(self) -> None:
+        while True:
+            record = self._queue.get()
+            if record is _STOP:
+                self._queue.task_done()
+                return
+
+            batch = [record]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    record = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stop = True
+                    break
+                batch.append(record)
+
+            self._write(batch)
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch) -> None:
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+            self.written += len(lines)
+        except Exception:
+            self.handleError(batch[-1])
+
+    def flush(self) -> None:
+        """Blocks until every record queued so far has been written."""
+        if not self._closed:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Stops accepting records, drains the queue and stops the writer."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._writer.join()
+        super().close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "capacity": self.capacity,
+            "written": self.written,
+            "dropped": self.dropped
+        }
+
+_active_handler: Optional[logging.Handler] = None
+
+def setup_json_logging(asynchronous: bool = True, **handler_options) -> logging.Handler:
     """
     Configures the root logger to use JsonFormatter.
+    By default records are written by an AsyncJsonHandler so request
+    threads never block on stdout/stderr; pass asynchronous=False for a
+    plain synchronous StreamHandler. Calling it again returns the
+    handler that is already installed.
     """
-    handler = logging.StreamHandler()
+    global _active_handler
+    if _active_handler is not None:
+        return _active_handler
+
+    if asynchronous:
+        handler = AsyncJsonHandler(**handler_options)
+    else:
+        handler = logging.StreamHandler(handler_options.get("stream"))
     formatter = JsonFormatter(datefmt="%Y-%m-%dT%H:%M:%S%z")
     handler.setFormatter(formatter)
-    
+
     root_logger = logging.getLogger()
     root_logger.addHandler(handler)
     root_logger.setLevel(logging.INFO)
-    
+
     # Remove default handlers if any (e.g. from uvicorn)
     # We want to ensure only our JSON handler is active for app logs
     # Note: Uvicorn has its own logging setup, this mainly affects app application code.
 
+    _active_handler = handler
+    return handler
+
+def get_json_log_handler() -> Optional[logging.Handler]:
+    """The handler installed by setup_json_logging, if any."""
+    return _active_handler
+
+def shutdown_json_logging() -> None:
+    """
+    Detaches the handler installed by setup_json_logging and closes it,
+    which drains any queued records before returning.
+    """
+    global _active_handler
+    handler = _active_handler
+    if handler is None:
+        return
+    _active_handler = None
+    logging.getLogger().removeHandler(handler)
+    handler.close()
@@ -0,0 +1,166 @@
+"""
+Scoring Policy Module
+Compiles a PolicyState into the per-category weights the engine scores
+with, and publishes the active one through a versioned reference
+"""
+import logging
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Collection, Dict, Mapping, Optional
+
+from policy_engine.policy_state import PolicyState
+from policy_engine.policy_update import MAX_WEIGHT
+
+logger = logging.getLogger(__name__)
+
+# Version of the built-in policy: every category at the engine's
+# KEYWORD_WEIGHT, confidence unchanged
+BASELINE_POLICY_VERSION = 0
+# Published policies kept for replay lookups by version
+POLICY_HISTORY_SIZE = 1024
+
+
+class PolicyConflict(Exception):
+    """Raised when a promotion expected a different active policy version"""
+    def __init__(self, expected: int, active: int):
+        self.expected = expected
+        self.active = active
+        super().__init__(f"Active policy is version {active}, expected {expected}")
+
+
+class CompiledPolicy:
+    """
+    Immutable scoring view of a PolicyState. ``weights`` maps a category to
+    the score each of its keyword hits adds; categories the policy does not
+    name score ``default_weight``. The engine looks a weight up once per
+    matched category, never per keyword.
+    """
+
+    __slots__ = ("version", "weights", "default_weight", "confidence_multiplier", "update_count")
+
+    def __init__(self, version: int, weights: Mapping[str, float], default_weight: float,
+                 confidence_multiplier: float = 1.0, update_count: int = 0):
+        self.version = version
+        self.weights = dict(weights)
+        self.default_weight = default_weight
+        self.confidence_multiplier = confidence_multiplier
+        self.update_count = update_count
+
+    def weight(self, category: str) -> float:
+        return self.weights.get(category, self.default_weight)
+
+    def to_state(self, categories: Collection[str] = ()) -> PolicyState:
+        """
+        The policy as a PolicyState. ``categories`` the policy does not name
+        are exported at ``default_weight``, so a learning update starts from
+        the weight the engine scores with (update_policy assumes its own
+        default for a category it is not given).
+        """
+        weights = {category: self.default_weight for category in sorted(categories)}
+        weights.update(self.weights)
+        return PolicyState(
+            policy_version=self.version,
+            category_weights=weights,
+            confidence_multiplier=self.confidence_multiplier,
+            update_count=self.update_count
+        )
+
+
+def baseline_policy(categories: Collection[str], weight: float) -> CompiledPolicy:
+    """The built-in policy (version 0): every category named explicitly at ``weight``."""
+    return CompiledPolicy(BASELINE_POLICY_VERSION, {category: weight for category in sorted(categories)}, weight)
+
+
+def compile_policy(state: PolicyState, default_weight: float, categories: Optional[Collection[str]] = None) -> CompiledPolicy:
+    """
+    Validates a PolicyState and compiles it. Raises ValueError. Weights are
+    bounded like learning updates (0 to MAX_WEIGHT); with ``categories``
+    only those categories may be weighted.
+    """
+    if not isinstance(state.policy_version, int) or isinstance(state.policy_version, bool) or state.policy_version < 0:
+        raise ValueError("policy_version must be a non-negative integer")
+    if not isinstance(state.category_weights, dict):
+        raise ValueError("category_weights must be an object")
+    for category, weight in state.category_weights.items():
+        if not isinstance(category, str) or not _is_finite_number(weight) or not 0 <= weight <= MAX_WEIGHT:
+            raise ValueError(f"Invalid weight {weight!r} for category {category!r}: must be a number from 0 to {MAX_WEIGHT}")
+        if categories is not None and category not in categories:
+            raise ValueError(f"Unknown category {category!r}")
+    if not _is_finite_number(state.confidence_multiplier) or state.confidence_multiplier < 0:
+        raise ValueError("confidence_multiplier must be a non-negative number")
+    return CompiledPolicy(
+        state.policy_version,
+        {category: float(weight) for category, weight in state.category_weights.items()},
+        default_weight,
+        float(state.confidence_multiplier),
+        state.update_count
+    )
+
+
+def policy_state_from_dict(data: Any) -> PolicyState:
+    """PolicyState from a JSON object (e.g. an admin request body). Raises ValueError."""
+    if not isinstance(data, dict):
+        raise ValueError("Policy must be a JSON object")
+    missing = [field for field in ("policy_version", "category_weights") if field not in data]
+    if missing:
+        raise ValueError(f"Policy is missing {', '.join(missing)}")
+    return PolicyState(
+        policy_version=data["policy_version"],
+        category_weights=data["category_weights"],
+        confidence_multiplier=data.get("confidence_multiplier", 1.0),
+        update_count=data.get("update_count", 0)
+    )
+
+
+def _is_finite_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+class PolicyRegistry:
+    """
+    Holds the active CompiledPolicy. Readers take ``active`` with a single
+    attribute read and no lock, and score a whole request with what they
+    read. Promotions are serialized and only move the version forward, so
+    a replay can always look a logged policy_version up with ``get``.
+    """
+
+    def __init__(self, baseline: CompiledPolicy):
+        self.active = baseline
+        self._history: "OrderedDict[int, CompiledPolicy]" = OrderedDict([(baseline.version, baseline)])
+        self._lock = threading.Lock()
+
+    def promote(self, state: PolicyState, expected_version: Optional[int] = None,
+                categories: Optional[Collection[str]] = None) -> CompiledPolicy:
+        """
+        Compiles ``state`` (e.g. the policy returned by learning_step) and
+        makes it active. With ``expected_version`` the promotion only
+        happens if that version is still active (PolicyConflict otherwise).
+        Raises ValueError for an invalid state, a category outside
+        ``categories`` or a version that does not move forward.
+        """
+        compiled = compile_policy(state, self.active.default_weight, categories)
+        with self._lock:
+            active = self.active
+            if expected_version is not None and active.version != expected_version:
+                raise PolicyConflict(expected_version, active.version)
+            if compiled.version <= active.version:
+                raise ValueError(f"policy_version {compiled.version} is not newer than active version {active.version}")
+            self._history[compiled.version] = compiled
+            while len(self._history) > POLICY_HISTORY_SIZE:
+                self._history.popitem(last=False)
+            self.active = compiled
+
+        logger.info(
+            f"Policy promoted | version={compiled.version}",
+            extra={"event_type": "policy_promoted", "details": {"policy_version": compiled.version, "previous_policy_version": active.version, "category_weights": compiled.weights, "default_weight": compiled.default_weight, "confidence_multiplier": compiled.confidence_multiplier}}
+        )
+        return compiled
+
+    def get(self, version: int) -> Optional[CompiledPolicy]:
+        """A recently published policy by version (None once it left the history)."""
+        return self._history.get(version)
+
+    def stats(self) -> Dict[str, Any]:
+        active = self.active
+        return {"policy_version": active.version, "update_count": active.update_count, "history": len(self._history)}
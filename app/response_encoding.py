@@ -0,0 +1,149 @@
+"""
+Response Encoding Module
+Serializes contract-validated responses straight to JSON bytes, byte for
+byte as FastAPI's response_model path (pydantic, jsonable_encoder, json)
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # in requirements.txt; stdlib json produces the same bytes, slower
+    orjson = None
+
+# =========================
+# Response Layouts
+# =========================
+# Field order and coercions of the pydantic models in app/schemas.py. The
+# response_model pass emitted fields in model order (not the engine's dict
+# order), converted int scores to float and dropped unknown keys; projecting
+# onto a layout does the same without building models.
+# A layout entry is (field, spec): None passes the value through, a callable
+# converts it, a tuple is a nested layout, a one-item list a list of them.
+Layout = Tuple[Tuple[str, Any], ...]
+
+ERROR_LAYOUT: Layout = (("error_code", None), ("message", None))
+SAFETY_METADATA_LAYOUT: Layout = (("is_decision", None), ("authority", None), ("actionable", None))
+
+OUTPUT_LAYOUT: Layout = (
+    ("risk_score", float),
+    ("risk_category", None),
+    ("trigger_reasons", None),
+    ("confidence_score", float),
+    ("processed_length", int),
+    ("safety_metadata", SAFETY_METADATA_LAYOUT),
+    ("errors", ERROR_LAYOUT),
+)
+
+BATCH_OUTPUT_LAYOUT: Layout = (
+    ("results", [OUTPUT_LAYOUT]),
+    ("errors", ERROR_LAYOUT),
+)
+
+WINDOW_LAYOUT: Layout = (
+    ("index", int),
+    ("start", int),
+    ("end", int),
+    ("risk_score", float),
+    ("risk_category", None),
+    ("trigger_reasons", None),
+)
+
+DOCUMENT_OUTPUT_LAYOUT: Layout = (
+    ("risk_score", float),
+    ("risk_category", None),
+    ("trigger_reasons", None),
+    ("confidence_score", float),
+    ("document_length", int),
+    ("window_size", int),
+    ("windows", [WINDOW_LAYOUT]),
+    ("safety_metadata", SAFETY_METADATA_LAYOUT),
+    ("errors", ERROR_LAYOUT),
+)
+
+
+def project(value: Any, spec: Union[None, Callable, Layout, List[Layout]]) -> Any:
+    """``value`` reshaped to ``spec`` (see Response Layouts). Missing or None objects stay None."""
+    if spec is None or value is None:
+        return value
+    if isinstance(spec, tuple):
+        return {field: project(value.get(field), field_spec) for field, field_spec in spec}
+    if isinstance(spec, list):
+        return [project(item, spec[0]) for item in value]
+    return spec(value)
+
+
+# =========================
+# Encoding
+# =========================
+def dumps(content: Any) -> bytes:
+    """
+    Compact UTF-8 JSON, as starlette's JSONResponse renders it. orjson
+    writes straight into its output bytes object (no intermediate str);
+    without it, stdlib json with JSONResponse's settings.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def encode_response(response: Dict[str, Any], layout: Layout = OUTPUT_LAYOUT) -> bytes:
+    """
+    JSON body for a response that already passed the output contract. No
+    further validation happens here: the contract check is the only one.
+    """
+    return dumps(project(response, layout))
+
+
+# =========================
+# Benchmark
+# =========================
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Times encode_response against the previous encoding path over the
+    replay corpus: pydantic response_model validation plus stdlib json
+    (when pydantic is installed), and stdlib json alone.
+    """
+    import logging
+
+    from app.engine import analyze_text
+
+    parser = argparse.ArgumentParser(description="Benchmark response encoding")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    logging.getLogger("app.engine").setLevel(logging.CRITICAL)
+    corpus = [
+        "This is perfectly safe content.", "kill", "scam", "kill murder attack scam", "A" * 5000, "A" * 6000, "",
+        "SCAM KILL ATTACK", "café résumé naïve", "kill " * 30, "!@#$% ^&*() kill <script>", "kill\nmurder\nattack",
+        " ".join(["kill murder attack bomb scam fraud phishing malware cocaine suicide"] * 20),
+    ]
+    responses = [analyze_text(text) for text in corpus]
+
+    def stdlib_json(content):
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+    paths = {"stdlib_json": lambda response: stdlib_json(project(response, OUTPUT_LAYOUT)), "encode_response": encode_response}
+    try:
+        from app.schemas import OutputSchema
+    except ImportError:
+        pass
+    else:
+        paths["response_model"] = lambda response: stdlib_json(OutputSchema(**response).dict())
+
+    timings = {}
+    for name, encode in paths.items():
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            for response in responses:
+                encode(response)
+        timings[name] = round((time.perf_counter() - started) / (args.iterations * len(responses)) * 1e6, 2)
+    identical = all(len({encode(response) for encode in paths.values()}) == 1 for response in responses)
+    print(json.dumps({"us_per_response": timings, "orjson": orjson is not None, "byte_identical": identical}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,109 @@
+"""
+Result Cache Module
+Optional bounded in-process cache for keyword scan results
+"""
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_ENTRY_BYTES = 4096
+
+
+class ResultCache:
+    """
+    LRU cache (with optional TTL) of keyword scan results, i.e. the sorted
+    KeywordIndex entry ids found in a normalized, truncated text.
+
+    analyze_text is a pure function of that text, so caching the scan and
+    rebuilding the response from it returns exactly the same output as a
+    fresh scan. Rebuilding (rather than caching the response dict) keeps
+    float accumulation, trigger_reasons and the audit log records identical
+    on hits, so replay hashes and log replay are unaffected.
+
+    Keys are a 128-bit BLAKE2b digest of the text plus the keyword table
+    version, so entries from an older table can never be served.
+    """
+
+    COUNTERS = ("hits", "misses", "evictions", "expirations", "oversized")
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: Optional[float] = None,
+        max_entry_bytes: int = DEFAULT_MAX_ENTRY_BYTES
+    ):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_entry_bytes = max_entry_bytes
+
+        self._entries: "OrderedDict[Tuple[str, bytes], Tuple[float, Tuple[int, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.oversized = 0
+
+    @staticmethod
+    def key(text: str, table_version: str) -> Tuple[str, bytes]:
+        digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        return (table_version, digest)
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[Tuple[int, ...]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple[str, bytes], value: Tuple[int, ...]) -> bool:
+        """
+        Stores value under key. Returns False (and stores nothing) when the
+        entry is larger than max_entry_bytes.
+        """
+        if sys.getsizeof(value) > self.max_entry_bytes:
+            with self._lock:
+                self.oversized += 1
+            return False
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "oversized": self.oversized,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional, Literal
+from typing import Any, List, Optional, Literal
 
 class InputSchema(BaseModel):
     text: str
@@ -21,3 +21,31 @@ class OutputSchema(BaseModel):
     processed_length: int
     safety_metadata: SafetyMetadata
     errors: Optional[ErrorSchema] = None
+
+class BatchInputSchema(BaseModel):
+    # Items stay raw values so each one is checked by validate_input_contract
+    # and a malformed item yields a per-item error instead of failing the batch.
+    items: List[Any]
+
+class BatchOutputSchema(BaseModel):
+    results: List[OutputSchema]
+    errors: Optional[ErrorSchema] = None
+
+class WindowSchema(BaseModel):
+    index: int
+    start: int
+    end: int
+    risk_score: float
+    risk_category: str
+    trigger_reasons: List[str]
+
+class DocumentOutputSchema(BaseModel):
+    risk_score: float
+    risk_category: str
+    trigger_reasons: List[str]
+    confidence_score: float
+    document_length: int
+    window_size: int
+    windows: List[WindowSchema]
+    safety_metadata: SafetyMetadata
+    errors: Optional[ErrorSchema] = None
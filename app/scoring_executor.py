@@ -0,0 +1,323 @@
+"""
+Scoring Executor Module
+Dedicated, sized executor with admission control for async request handlers
+"""
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app import engine
+from app.keyword_index import IndexArtifactError, KeywordIndex
+from app.metrics import CATEGORY_MATCHES_TOTAL, ENGINE_SECONDS, EXECUTOR_WAIT_SECONDS, PREFILTER_TOTAL
+from app.result_cache import ResultCache
+from app.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("thread", "process")
+DEFAULT_WORKERS = os.cpu_count() or 1
+DEFAULT_PENDING_PER_WORKER = 8
+
+
+class ExecutorOverloaded(Exception):
+    """Raised when a call is refused because the admission limit is reached"""
+    def __init__(self, limit: int):
+        self.limit = limit
+        super().__init__(f"Scoring executor at admission limit ({limit})")
+
+
+def _init_process_worker() -> None:
+    # Process workers need their own log pipeline; the parent's writer
+    # thread does not exist in the child.
+    from app.observability import setup_json_logging
+    setup_json_logging()
+    # Counts inherited from the parent at fork are not this worker's
+    global _reported
+    _reported = _worker_counters()
+
+
+# =========================
+# Worker Counters (process mode)
+# =========================
+# Engine counters a process worker increments in its own memory. Each call
+# returns what changed since the last one and the parent adds it up, so
+# /metrics reports every worker's scans instead of the idle parent's zeros.
+_reported: Optional[Dict[Tuple[str, str], float]] = None
+# Single-label engine counters; the parent adds worker deltas straight into them
+_ENGINE_COUNTERS = {"prefilter": PREFILTER_TOTAL, "category_matches": CATEGORY_MATCHES_TOTAL}
+
+
+def _worker_counters() -> Dict[Tuple[str, str], float]:
+    counters = {
+        (component, labels[0]): value
+        for component, counter in _ENGINE_COUNTERS.items() for labels, value in counter.totals().items()
+    }
+    for component, source, fields in (("result_cache", engine.get_result_cache(), ResultCache.COUNTERS),
+                                      ("single_flight", engine.get_single_flight(), SingleFlight.COUNTERS)):
+        if source is not None:
+            for field in fields:
+                counters[(component, field)] = getattr(source, field)
+    return counters
+
+
+def _counter_deltas() -> Optional[Dict[Tuple[str, str], float]]:
+    """Worker counters changed since the last call; None outside process workers."""
+    global _reported
+    if _reported is None:
+        return None
+    current = _worker_counters()
+    deltas = {key: value - _reported.get(key, 0) for key, value in current.items() if value != _reported.get(key, 0)}
+    _reported = current
+    return deltas
+
+
+# (index version, table version, artifact path) of the parent's keyword index
+IndexRef = Tuple[str, str, str]
+
+
+def _sync_worker_index(index_ref: Optional[IndexRef]) -> Tuple[str, str, str]:
+    """
+    Brings a process worker onto the parent's keyword index by loading the
+    artifact the parent wrote, then reports (worker, index version, table
+    version). An artifact whose entries are not the version the parent
+    asked for is refused. A no-op string compare once the worker is current.
+    """
+    if index_ref is not None and engine.KEYWORD_INDEX.version != index_ref[0]:
+        index = KeywordIndex.load(index_ref[2])
+        if index.version != index_ref[0]:
+            raise IndexArtifactError(f"Index artifact holds version {index.version}, expected {index_ref[0]}")
+        engine.publish_keyword_index(index, index_ref[1])
+    return str(os.getpid()), engine.get_index_version(), engine.get_table_version()
+
+
+def _timed_call(fn: Callable, args: Tuple, index_ref: Optional[IndexRef] = None) -> Tuple[float, Tuple[str, str, str], Any, Optional[Dict[Tuple[str, str], float]]]:
+    """
+    Runs in the worker and reports when it started, so the caller can tell
+    queueing time from run time. time.monotonic is system-wide on the
+    supported platforms, so the stamp is comparable across processes.
+    Process workers also return their counter deltas.
+    """
+    worker = _sync_worker_index(index_ref)
+    started_at = time.monotonic()
+    result = fn(*args)
+    return started_at, worker, result, _counter_deltas()
+
+
+class ScoringExecutor:
+    """
+    Runs scoring calls for async handlers on a dedicated thread or process
+    pool instead of the event loop's shared default threadpool.
+
+    At most ``max_pending`` calls are admitted at once (running plus
+    queued). Beyond that ``run`` raises ExecutorOverloaded immediately, so
+    callers can answer with a fast overload response instead of letting
+    latency grow without bound.
+
+    A process worker that dies (killed, out of memory) breaks the whole
+    pool. ``run`` then replaces the pool and retries the call once; the new
+    workers load the current keyword index from its artifact.
+
+    Counters are only touched from the event loop thread and need no lock.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = DEFAULT_WORKERS, max_pending: int = 0):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"executor kind must be one of {EXECUTOR_KINDS}")
+        if workers <= 0:
+            raise ValueError("workers must be positive")
+
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending or workers * DEFAULT_PENDING_PER_WORKER
+
+        # Process workers load index artifacts from a directory only this
+        # executor writes to (mkdtemp creates it private to the user)
+        self._artifact_dir: Optional[str] = None
+        if kind == "process":
+            self._executor: Executor = self._new_process_pool()
+            self._artifact_dir = tempfile.mkdtemp(prefix="risk-keyword-index-")
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scoring")
+
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.restarts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+
+        # Process workers hold their own copy of the keyword index
+        self._index_ref: Optional[IndexRef] = None
+        self.worker_index_versions: Dict[str, Tuple[str, str]] = {}
+        # Result cache and single flight counters summed over process workers
+        self.worker_counters: Dict[Tuple[str, str], float] = {}
+
+    async def run(self, fn: Callable, *args) -> Any:
+        if self.in_flight >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorOverloaded(self.max_pending)
+
+        self.in_flight += 1
+        self.admitted += 1
+        submitted_at = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self._executor
+            try:
+                started_at, worker, result, deltas = await loop.run_in_executor(executor, _timed_call, fn, args, self._index_ref)
+            except BrokenProcessPool:
+                self._restart(executor)
+                executor = self._executor
+                try:
+                    started_at, worker, result, deltas = await loop.run_in_executor(executor, _timed_call, fn, args, self._index_ref)
+                except BrokenProcessPool:
+                    # The call broke the new pool too; leave a working pool
+                    # for the next one and give up on this call
+                    self._restart(executor)
+                    raise
+        finally:
+            self.in_flight -= 1
+
+        self.worker_index_versions[worker[0]] = worker[1:]
+        if deltas:
+            self._add_worker_counters(deltas)
+
+        finished_at = time.monotonic()
+        wait = max(0.0, started_at - submitted_at)
+        elapsed = max(0.0, finished_at - started_at)
+        self.completed += 1
+        self.wait_seconds_total += wait
+        self.wait_seconds_max = max(self.wait_seconds_max, wait)
+        self.run_seconds_total += elapsed
+        EXECUTOR_WAIT_SECONDS.observe(wait)
+        ENGINE_SECONDS.observe(elapsed)
+        return result
+
+    async def sync_index(self) -> Dict[str, Tuple[str, str]]:
+        """
+        Call after the engine's keyword index changes. Thread workers share
+        the engine's index and need nothing. For process workers the new
+        index is written to an artifact in the executor's private directory;
+        every later call carries its version, and a worker that is behind
+        loads it before running the call. One sync call per worker is also submitted
+        now (best effort: the pool picks which worker runs each), so most
+        workers load it before their next request.
+        """
+        if self.kind == "process":
+            index = engine.KEYWORD_INDEX
+            path = await asyncio.to_thread(_write_artifact, index, self._artifact_dir)
+            self._index_ref = (index.version, engine.get_table_version(), path)
+
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            workers = await asyncio.gather(*(
+                loop.run_in_executor(executor, _sync_worker_index, self._index_ref)
+                for _ in range(self.workers)
+            ))
+        except BrokenProcessPool:
+            # Fresh workers load the artifact on their first call
+            self._restart(executor)
+            return dict(self.worker_index_versions)
+        for worker, index_version, table_version in workers:
+            self.worker_index_versions[worker] = (index_version, table_version)
+        return dict(self.worker_index_versions)
+
+    def _new_process_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_process_worker)
+
+    def _restart(self, broken: Executor) -> None:
+        """
+        Replaces a broken process pool. Every call that was on it fails with
+        BrokenProcessPool, so only the first caller to see ``broken``
+        replaces it. The artifact directory and the current index
+        reference are kept.
+        """
+        if self._executor is not broken:
+            return
+        self.restarts += 1
+        logger.warning("Scoring worker died; restarting process pool", extra={"event_type": "scoring_executor_restart", "details": {"restarts": self.restarts}})
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._new_process_pool()
+        # The dead workers' entries would otherwise linger forever
+        self.worker_index_versions.clear()
+
+    def _add_worker_counters(self, deltas: Dict[Tuple[str, str], float]) -> None:
+        for (component, field), delta in deltas.items():
+            if component in _ENGINE_COUNTERS:
+                _ENGINE_COUNTERS[component].inc(field, amount=delta)
+            else:
+                self.worker_counters[(component, field)] = self.worker_counters.get((component, field), 0) + delta
+
+    def worker_stats(self, component: str) -> Optional[Dict[str, float]]:
+        """
+        A component's counters summed over process workers (None in thread
+        mode, or before any worker reported one). Gauges such as cache size
+        live in each worker and are not included.
+        """
+        stats = {field: value for (name, field), value in self.worker_counters.items() if name == component}
+        return stats or None
+
+    def queue_depth(self) -> int:
+        """Admitted calls that are not yet running (approximate for processes)."""
+        return max(0, self.in_flight - self.workers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth(),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "restarts": self.restarts,
+            "wait_ms_avg": round(self.wait_seconds_total / self.completed * 1000, 3) if self.completed else 0.0,
+            "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+            "run_ms_avg": round(self.run_seconds_total / self.completed * 1000, 3) if self.completed else 0.0
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+        if self._artifact_dir is not None:
+            shutil.rmtree(self._artifact_dir, ignore_errors=True)
+
+
+def _write_artifact(index: KeywordIndex, directory: str) -> str:
+    """
+    Writes the index into ``directory`` and returns the artifact path. The
+    bytes go to a fresh mkstemp file first and are then renamed into
+    place, so a worker never reads a partly written artifact.
+    """
+    path = os.path.join(directory, f"{index.version}.bin")
+    fd, partial = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(index.to_bytes())
+        os.replace(partial, path)
+    except BaseException:
+        os.unlink(partial)
+        raise
+    return path
+
+
+def executor_from_env() -> ScoringExecutor:
+    """
+    RISK_EXECUTOR_KIND     thread (default) or process
+    RISK_EXECUTOR_WORKERS  pool size (default: CPU count)
+    RISK_MAX_PENDING       admission limit (default: 8 per worker)
+    """
+    return ScoringExecutor(
+        kind=os.environ.get("RISK_EXECUTOR_KIND", "thread"),
+        workers=int(os.environ.get("RISK_EXECUTOR_WORKERS", DEFAULT_WORKERS)),
+        max_pending=int(os.environ.get("RISK_MAX_PENDING", "0"))
+    )
@@ -0,0 +1,168 @@
+"""
+Scoring Pool Module
+Process-based parallel scoring for CPU-bound bulk jobs
+"""
+import logging
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.engine import analyze_texts, error_response
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 64
+DEFAULT_PENDING_CHUNKS_PER_WORKER = 2
+
+Scorer = Callable[[List[Any]], List[Dict[str, Any]]]
+
+
+def _init_worker() -> None:
+    """
+    Runs once per worker process. Importing the engine loads the keyword
+    index, so no request ever pays for it; per-keyword INFO logging is
+    silenced because bulk jobs have no one reading it.
+    """
+    import app.engine  # noqa: F401  (loads KEYWORD_INDEX)
+    logging.getLogger("app.engine").setLevel(logging.WARNING)
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _internal_error_results(count: int) -> List[Dict[str, Any]]:
+    return [
+        error_response("INTERNAL_ERROR", "Unexpected processing error", "SCORING_POOL")
+        for _ in range(count)
+    ]
+
+
+class ScoringPool:
+    """
+    Scores texts on a pool of pre-warmed worker processes.
+
+    Texts are sent to workers in chunks and results come back in input
+    order. At most ``max_pending_chunks`` chunks are in flight, so a large
+    or unbounded input iterable is consumed only as fast as results are
+    taken (backpressure).
+
+    If a worker process dies, the pool is restarted and the failed chunk is
+    retried on its own. A chunk that crashes again is rescored item by item,
+    and only the items that still crash a worker get the INTERNAL_ERROR
+    contract response.
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_pending_chunks: Optional[int] = None,
+        scorer: Scorer = analyze_texts
+    ):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_pending_chunks = max_pending_chunks or self.processes * DEFAULT_PENDING_CHUNKS_PER_WORKER
+        self.scorer = scorer
+        self.restarts = 0
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._start()
+
+    # =========================
+    # Lifecycle
+    # =========================
+    def _start(self) -> None:
+        self._executor = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker)
+        # Workers are spawned on demand; one concurrent task per worker
+        # starts them all now instead of on the first real chunk.
+        warm = [self._executor.submit(_warm_up) for _ in range(self.processes)]
+        for future in warm:
+            future.result()
+
+    def _restart(self) -> None:
+        self.restarts += 1
+        logger.warning("Scoring pool worker died; restarting pool", extra={"event_type": "scoring_pool_restart", "details": {"restarts": self.restarts}})
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._start()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self) -> "ScoringPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # =========================
+    # Scoring
+    # =========================
+    def _submit(self, chunk: List[Any]) -> Future:
+        if self._executor is None:
+            raise RuntimeError("ScoringPool is closed")
+        try:
+            return self._executor.submit(self.scorer, chunk)
+        except BrokenProcessPool as e:
+            # Pool broke after an earlier submit; surface it on the future
+            # so imap handles it in input order like any other crash.
+            failed: Future = Future()
+            failed.set_exception(e)
+            return failed
+
+    def _score_isolated(self, chunk: List[Any]) -> List[Dict[str, Any]]:
+        """Retries a chunk that crashed a worker, narrowing down to single items."""
+        try:
+            return self._submit(chunk).result()
+        except BrokenProcessPool:
+            self._restart()
+
+        results = []
+        for text in chunk:
+            try:
+                results.extend(self._submit([text]).result())
+            except BrokenProcessPool:
+                self._restart()
+                results.extend(_internal_error_results(1))
+        return results
+
+    def imap(self, texts: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+        """Yields one v3 response per text, in input order."""
+        source = iter(texts)
+        pending: Deque[Tuple[List[Any], Future]] = deque()
+
+        def fill() -> None:
+            while len(pending) < self.max_pending_chunks:
+                chunk = list(islice(source, self.chunk_size))
+                if not chunk:
+                    return
+                pending.append((chunk, self._submit(chunk)))
+
+        fill()
+        while pending:
+            chunk, future = pending.popleft()
+            try:
+                results = future.result()
+            except BrokenProcessPool:
+                # Every in-flight future fails with the pool; retry the head
+                # chunk alone first so the crash can be attributed to it.
+                waiting = [queued for queued, _ in pending]
+                pending.clear()
+                self._restart()
+                results = self._score_isolated(chunk)
+                for queued in waiting:
+                    pending.append((queued, self._submit(queued)))
+
+            yield from results
+            fill()
+
+    def map(self, texts: Iterable[Any]) -> List[Dict[str, Any]]:
+        return list(self.imap(texts))
@@ -0,0 +1,244 @@
+"""
+Chat Session Module
+Incremental scoring of append-only text (e.g. a live chat thread)
+"""
+import logging
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, Optional, Set
+
+from app import engine
+from app.engine import MAX_TEXT_LENGTH, error_response, _score_entries
+from app.policy import BASELINE_POLICY_VERSION, CompiledPolicy
+
+logger = logging.getLogger(__name__)
+
+SESSION_FORMAT_VERSION = 1
+
+
+class SessionStateError(ValueError):
+    """Raised when serialized session state cannot be resumed"""
+
+
+@lru_cache(maxsize=4096)
+def _settles(char: str) -> bool:
+    """
+    True when ``char`` fixes how everything before it lowercases.
+    ``str.lower`` has one context-sensitive mapping, Final_Sigma: "Σ" reads
+    past case-ignorable characters to the next one. Any character that is
+    neither "Σ" nor case-ignorable ends that lookahead. Case-ignorable is
+    probed the way str.lower sees it: a sigma followed by ``char`` and then
+    a letter lowercases differently only if ``char`` was skipped.
+    """
+    return char != "Σ" and ("AΣ" + char).lower()[1] == ("AΣ" + char + "A").lower()[1]
+
+
+class ChatSession:
+    """
+    Scores a growing text one appended delta at a time. After every
+    ``append`` the result equals ``analyze_text`` of everything appended so
+    far, but the work done is proportional to the delta, not the thread.
+
+    The session keeps only what later text can still affect:
+
+    - ``confirmed``: keyword entries whose match is settled. A match is
+      settled once the text extends past it by the longest keyword, so no
+      future text can change how it reads (including the closing ``\\b``).
+    - a short tail of normalized text from the settled position onwards,
+      rescanned on each append (bounded by the longest keyword plus the
+      current unfinished word).
+    - the raw characters whose lowercase may still change. ``str.lower``
+      is context-sensitive (final sigma), so the text from the last
+      character that settles it (see ``_settles``; any letter, digit or
+      space) is re-lowercased with each delta. For ordinary text that is one
+      character. A run of sigmas and case-ignorable characters is bounded
+      by MAX_TEXT_LENGTH.
+
+    Beyond MAX_TEXT_LENGTH normalized characters nothing changes the score
+    (the engine truncates), so the session only notes that truncation
+    happened. The session is pinned to the keyword index and scoring
+    policy it was created with; ``to_dict``/``from_dict`` round-trip its
+    state, policy weights included, as plain JSON.
+    """
+
+    def __init__(self, session_id: Optional[str] = None):
+        self.session_id = session_id or str(uuid.uuid4())[:8]
+        self.index = engine.KEYWORD_INDEX
+        self.policy = engine.get_active_policy()
+        self._confirmed: Set[int] = set()
+        self._tentative: Set[int] = set()
+        self._tail = ""           # normalized text from _tail_offset on
+        self._tail_offset = 0
+        self._stable = 0          # matches starting before this are settled
+        self._carry = ""          # raw characters of the unfinished word
+        self._carry_start = 0     # where the carry starts in normalized text
+        self._end = 0             # processed_length (trailing space excluded)
+        self._truncated = False
+
+    # =========================
+    # Scoring
+    # =========================
+    def append(self, delta: str) -> Dict[str, Any]:
+        """Adds text to the session and returns the updated v3 response."""
+        if not isinstance(delta, str):
+            raise TypeError("delta must be a string")
+        if not self._tail and not self._carry:
+            # Leading whitespace of the thread is stripped like analyze_text does
+            delta = delta.lstrip()
+            if not delta:
+                return self.result()
+
+        raw = self._carry + delta
+        # Past its first character the carry holds nothing that settles,
+        # so only the delta needs looking at
+        carried = len(self._carry)
+        cut = len(raw) - 1
+        while cut >= carried and not _settles(raw[cut]):
+            cut -= 1
+        if cut < carried:
+            cut = 0 if carried and _settles(raw[0]) else -1
+        if cut < 0:
+            closed, self._carry = "", raw
+        else:
+            # Lowercased with the settling character, which lowercases on
+            # its own; it stays in the carry as context for what follows
+            closed, self._carry = raw[:cut + 1].lower()[:-len(raw[cut].lower())], raw[cut:]
+        lowered = closed + self._carry.lower()
+        carry_start = self._carry_start
+        self._carry_start += len(closed)
+
+        if carry_start < MAX_TEXT_LENGTH:
+            text = self._tail[:carry_start - self._tail_offset] + lowered
+            room = MAX_TEXT_LENGTH - self._tail_offset
+            overflow, text = text[room:], text[:room]
+        else:
+            text, overflow = self._tail, lowered
+        if overflow.strip():
+            self._truncated = True
+
+        self._rescan(text)
+        self._clip_carry()
+        result = self.result()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f"Session scored: {result['risk_category']}",
+                extra={"correlation_id": self.session_id, "event_type": "session_scored", "details": {"delta_length": len(delta), "processed_length": self._end, "category": result["risk_category"], "index_version": self.index.version}}
+            )
+        return result
+
+    def _rescan(self, text: str) -> None:
+        """Settles what the new text decides and rescans the open tail."""
+        offset = self._tail_offset
+        length = offset + len(text)
+
+        # A match is settled once the longest keyword (and its \b) fits
+        # between it and both the end of the text and the unfinished word,
+        # whose lowercasing may still change. Truncated text has no end to
+        # grow past.
+        longest = self.index.max_keyword_length
+        # The engine strips trailing whitespace before it truncates. Text
+        # that is all whitespace leaves the end where earlier text put it.
+        open_text = text if self._truncated else text.rstrip()
+        if open_text:
+            self._end = max(self._end, offset + len(open_text))
+
+        settled = length if self._truncated else length - longest
+        if self._carry:
+            settled = min(settled, self._carry_start - longest)
+        stable = max(self._stable, settled)
+        if stable > self._stable:
+            self._confirmed.update(self.index.find(text, self._stable - offset, stable - offset))
+            self._stable = stable
+
+        keep = max(0, stable - 1)   # one character of context for \b
+        text = text[keep - offset:]
+        self._tail, self._tail_offset = text, keep
+
+        self._tentative = set(self.index.find(text[:self._end - keep], stable - keep)) if stable < self._end else set()
+
+    def _clip_carry(self) -> None:
+        """
+        Drops carry characters past MAX_TEXT_LENGTH. Lowercasing never
+        shortens text, so carry[room:] lies wholly beyond the limit, and
+        already counts as truncation. Past the first character, the carry
+        holds only sigmas and case-ignorable characters. Earlier text sees
+        them only as "a sigma follows, or not", so one stand-in sigma keeps
+        every lowercase below the limit unchanged.
+        """
+        room = max(0, MAX_TEXT_LENGTH - self._carry_start)
+        if len(self._carry) > room + 1:
+            beyond = self._carry[room:]
+            self._carry = self._carry[:room] + ("Σ" if "Σ" in beyond else "")
+
+    def result(self) -> Dict[str, Any]:
+        """The v3 response analyze_text would give for the text so far."""
+        if self._end == 0:
+            return error_response("EMPTY_INPUT", "Text is empty", self.session_id)
+
+        result = _score_entries(sorted(self._confirmed | self._tentative), self.index, self.policy)
+        result.processed_length = self._end
+        result.truncated = self._truncated
+        return result.to_dict()
+
+    # =========================
+    # Serialization
+    # =========================
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "format": SESSION_FORMAT_VERSION,
+            "session_id": self.session_id,
+            "index_version": self.index.version,
+            "policy_version": self.policy.version,
+            "policy": {
+                "weights": self.policy.weights,
+                "default_weight": self.policy.default_weight,
+                "confidence_multiplier": self.policy.confidence_multiplier,
+                "update_count": self.policy.update_count
+            },
+            "confirmed": sorted(self._confirmed),
+            "tail": self._tail,
+            "tail_offset": self._tail_offset,
+            "stable": self._stable,
+            "carry": self._carry,
+            "carry_start": self._carry_start,
+            "end": self._end,
+            "truncated": self._truncated
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "ChatSession":
+        """
+        Resumes a session written by ``to_dict``. The state only makes sense
+        against the keyword index it was built with, so a session from a
+        different index version is refused. The session keeps scoring with
+        its policy version: taken from the registry while it holds that
+        version, otherwise rebuilt from the weights stored with the session
+        (the registry is per process and evicts old versions).
+        """
+        if state.get("format") != SESSION_FORMAT_VERSION:
+            raise SessionStateError(f"Unsupported session format {state.get('format')}")
+        if state.get("index_version") != engine.KEYWORD_INDEX.version:
+            raise SessionStateError("Session was built with a different keyword index")
+        version = state.get("policy_version", BASELINE_POLICY_VERSION)
+        policy = engine.POLICY_REGISTRY.get(version)
+        if policy is None:
+            stored = state.get("policy")
+            if not isinstance(stored, dict):
+                raise SessionStateError(f"Unknown scoring policy version {version}")
+            try:
+                policy = CompiledPolicy(version, stored["weights"], stored["default_weight"],
+                                        stored["confidence_multiplier"], stored["update_count"])
+            except (KeyError, TypeError, ValueError) as e:
+                raise SessionStateError(f"Malformed scoring policy for version {version}") from e
+
+        session = cls(state["session_id"])
+        session.policy = policy
+        session._confirmed = set(state["confirmed"])
+        session._stable = state["stable"]
+        session._carry = state["carry"]
+        session._carry_start = state["carry_start"]
+        session._truncated = state["truncated"]
+        session._end = state.get("end", 0)
+        session._tail_offset = state["tail_offset"]
+        session._rescan(state["tail"])
+        return session
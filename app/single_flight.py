@@ -0,0 +1,86 @@
+"""
+Single Flight Module
+In-flight deduplication of identical keyword scans across threads
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "value", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time. The first caller for a
+    key (the leader) computes; callers arriving while it runs wait and
+    receive the same value, or the same exception. Once the leader finishes
+    the key is forgotten, so nothing is served after the fact: this is
+    coalescing, not caching (see ResultCache for that).
+
+    Values are shared between callers and must be immutable. The engine only
+    coalesces keyword scans (tuples of entry ids); each caller still builds
+    its own response and writes its own log records under its own
+    correlation_id, so no request ever sees another's id.
+    """
+
+    COUNTERS = ("leaders", "coalesced", "failures")
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+        self.leaders = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def do(self, key: Hashable, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Returns (value, shared); shared is True when another caller computed it."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = compute()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.failures += 1
+            raise
+        finally:
+            # Forget the key before waking anyone: a caller arriving after
+            # this point starts a fresh computation
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value, False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self.leaders + self.coalesced
+            return {
+                "in_flight": len(self._calls),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "failures": self.failures,
+                "coalescing_ratio": round(self.coalesced / calls, 4) if calls else 0.0
+            }
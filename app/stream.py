@@ -0,0 +1,194 @@
+"""
+Stream Module
+Credit-based flow control for the streaming scoring channel: clients push
+tagged messages and receive results as they complete, without the server
+buffering more than a fixed window per connection
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+from app.contract_compiler import OUTPUT_CONTRACT_V3
+from app.contract_enforcement import ContractViolation, contract_error_response
+from app.response_encoding import OUTPUT_LAYOUT, project
+from app.scoring_executor import ExecutorOverloaded
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Stream Limits
+# =========================
+# Results a client may receive before granting more credit
+STREAM_INITIAL_CREDITS = 16
+# Messages scored at once for one connection
+STREAM_MAX_IN_FLIGHT = 4
+# Accepted messages not yet delivered (queued, scoring or awaiting credit)
+STREAM_MAX_PENDING = 64
+MAX_CLIENT_ID_LENGTH = 128
+MAX_CREDITS = 1_000_000
+
+# Stream-level rejections; scoring and contract errors arrive as v3 results
+STREAM_ERROR_CODES = {"INVALID_MESSAGE", "DUPLICATE_ID", "STREAM_WINDOW_FULL"}
+
+# Totals of closed connections; open ones are summed at read time
+_closed_totals = {"received": 0, "delivered": 0, "rejected": 0}
+_open_sessions: Set["StreamSession"] = set()
+
+
+def stream_stats() -> Dict[str, int]:
+    """Connections open now, and messages over every connection so far."""
+    totals = dict(_closed_totals)
+    for session in list(_open_sessions):
+        for key, value in session.stats.items():
+            totals[key] += value
+    totals["open"] = len(_open_sessions)
+    return totals
+
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+Score = Callable[[Dict[str, Any], str], Awaitable[Dict[str, Any]]]
+
+
+class StreamSession:
+    """
+    One streaming connection. Client messages:
+
+        {"type": "score", "id": "<client id>", "text": "...", "context": {...}}
+        {"type": "credit", "n": <results the client is ready for>}
+
+    Server messages:
+
+        {"type": "result", "id": ..., "result": <v3 response>}    costs one credit
+        {"type": "rejected", "id": ..., "errors": {"error_code", "message"}}
+
+    Results are sent in completion order and only while credit remains.
+    A message the scoring executor has no room for (``score`` raises
+    ExecutorOverloaded) is rejected with SERVICE_OVERLOADED.
+    A score message that would take the connection past ``max_pending``
+    undelivered messages is rejected at once instead of buffered, so a
+    slow consumer holds at most ``max_pending`` results in memory.
+    """
+
+    def __init__(self, send: Send, score: Score, connection_id: str = "STREAM", credits: int = STREAM_INITIAL_CREDITS,
+                 max_in_flight: int = STREAM_MAX_IN_FLIGHT, max_pending: int = STREAM_MAX_PENDING):
+        if max_in_flight < 1 or max_pending < max_in_flight:
+            raise ValueError("Need 1 <= max_in_flight <= max_pending")
+        self._send = send
+        self._score = score
+        self.connection_id = connection_id
+        self.credits = max(0, min(credits, MAX_CREDITS))
+        self.max_pending = max_pending
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._send_lock = asyncio.Lock()
+        self._ready = asyncio.Condition()
+        self._done: Deque[Tuple[str, Dict[str, Any]]] = deque()
+        self._pending: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._sequence = 0
+        self.in_flight = 0
+        self.stats = {"received": 0, "delivered": 0, "rejected": 0}
+
+    # =========================
+    # Client Messages
+    # =========================
+    async def receive(self, message: Any) -> None:
+        """Handles one decoded client message."""
+        self.stats["received"] += 1
+        if not isinstance(message, dict):
+            return await self._reject(None, "INVALID_MESSAGE", "Message must be a JSON object")
+        kind = message.get("type")
+        if kind == "credit":
+            grant = message.get("n")
+            if not isinstance(grant, int) or isinstance(grant, bool) or grant < 1:
+                return await self._reject(None, "INVALID_MESSAGE", "Field 'n' must be a positive integer")
+            async with self._ready:
+                self.credits = min(self.credits + grant, MAX_CREDITS)
+                self._ready.notify()
+            return
+        if kind != "score":
+            return await self._reject(None, "INVALID_MESSAGE", "Field 'type' must be 'score' or 'credit'")
+
+        client_id = message.get("id")
+        if not isinstance(client_id, str) or not 0 < len(client_id) <= MAX_CLIENT_ID_LENGTH:
+            return await self._reject(None, "INVALID_MESSAGE", f"Field 'id' must be a string of 1-{MAX_CLIENT_ID_LENGTH} characters")
+        if client_id in self._pending:
+            return await self._reject(client_id, "DUPLICATE_ID", "A message with this id is still pending")
+        if len(self._pending) >= self.max_pending:
+            return await self._reject(client_id, "STREAM_WINDOW_FULL", f"{self.max_pending} messages pending; grant credit or wait for results")
+
+        self._pending.add(client_id)
+        self._sequence += 1
+        request = {key: value for key, value in message.items() if key not in ("type", "id")}
+        task = asyncio.ensure_future(self._run(client_id, request, f"{self.connection_id}-{self._sequence}"))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, client_id: str, request: Dict[str, Any], correlation_id: str) -> None:
+        async with self._slots:
+            self.in_flight += 1
+            try:
+                response = await self._score(request, correlation_id)
+                # Nothing leaves the stream without passing the sealed contract
+                OUTPUT_CONTRACT_V3.validate(response)
+            except ExecutorOverloaded:
+                response = None
+            except ContractViolation as e:
+                logger.error(f"Output contract violation | code={e.code}", extra={"correlation_id": correlation_id, "event_type": "output_validation_failed", "details": {"code": e.code, "why": e.message}})
+                response = contract_error_response("INTERNAL_ERROR", "Unexpected system error")
+            except Exception as e:
+                logger.error(f"Unexpected error | correlation_id={correlation_id} | event_type=unhandled_exception | why={str(e)}", exc_info=True)
+                response = contract_error_response("INTERNAL_ERROR", "Unexpected system error")
+            finally:
+                self.in_flight -= 1
+        if response is None:
+            self._pending.discard(client_id)
+            return await self._reject(client_id, "SERVICE_OVERLOADED", "Scoring capacity exhausted; retry later")
+        async with self._ready:
+            self._done.append((client_id, response))
+            self._ready.notify()
+
+    async def _reject(self, client_id: Optional[str], code: str, message: str) -> None:
+        self.stats["rejected"] += 1
+        await self._write({"type": "rejected", "id": client_id, "errors": {"error_code": code, "message": message}})
+
+    async def _write(self, message: Dict[str, Any]) -> None:
+        # Rejections (receive side) and results (sender) share the socket
+        async with self._send_lock:
+            await self._send(message)
+
+    # =========================
+    # Delivery
+    # =========================
+    async def _deliver(self) -> None:
+        while True:
+            async with self._ready:
+                await self._ready.wait_for(lambda: self.credits > 0 and self._done)
+                client_id, response = self._done.popleft()
+                self.credits -= 1
+            await self._write({"type": "result", "id": client_id, "result": project(response, OUTPUT_LAYOUT)})
+            self._pending.discard(client_id)
+            self.stats["delivered"] += 1
+
+    async def run(self, messages: AsyncIterator[Any]) -> None:
+        """
+        Serves the connection until ``messages`` ends or a send fails (the
+        client went away); scoring still running for it is cancelled.
+        """
+        sender = asyncio.ensure_future(self._deliver())
+        _open_sessions.add(self)
+        try:
+            async for message in messages:
+                await self.receive(message)
+                if sender.done():
+                    break
+        finally:
+            for task in list(self._tasks) + [sender]:
+                task.cancel()
+            await asyncio.gather(sender, *self._tasks, return_exceptions=True)
+            _open_sessions.discard(self)
+            for key, value in self.stats.items():
+                _closed_totals[key] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(self.stats, credits=self.credits, pending=len(self._pending), in_flight=self.in_flight)
@@ -0,0 +1,229 @@
+"""
+Tenant Index Module
+Per-tenant keyword overlays on the shared base index, compiled on demand
+and kept in a memory-bounded LRU
+"""
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+from itertools import groupby
+from typing import Any, Dict, List, Optional
+
+from app.keyword_index import _ASCII_WORD_PATTERN, _WORD_PATTERN, KeywordIndex, table_version, validate_table
+
+DEFAULT_BUDGET_BYTES = 64 * 1024 * 1024
+_SUBSTRING_CHECK_HEADS = 16
+
+
+class UnknownTenantError(ValueError):
+    """Raised when a request names a tenant that has no keyword overlay"""
+
+
+def overlay_version(base_version: str, extras: Dict[str, List[str]]) -> str:
+    """Version of base + extras, known without compiling the overlay."""
+    return hashlib.sha256(f"{base_version}:{table_version(extras)}".encode("ascii")).hexdigest()[:16]
+
+
+class OverlayIndex:
+    """
+    A tenant's view of the keyword table: the shared base KeywordIndex plus
+    a small delta index compiled from the tenant's extra keywords only. It
+    scores exactly like a KeywordIndex built from the base table with the
+    extras appended to each category.
+
+    The base is never copied or recompiled. Entry ids are renumbered so the
+    combined table keeps scoring order (categories sorted by name, then the
+    base keywords and the tenant's, in table order). ``find`` runs both
+    indexes and maps their ids into that numbering, so trigger_reasons and
+    the engine's scoring need no changes. Extras the base already has in
+    the same category, and repeats within a tenant's list, are dropped.
+    """
+
+    def __init__(self, base: KeywordIndex, extras: Dict[str, List[str]]):
+        known = set(base.entries)
+        delta_table = {}
+        for category, keywords in extras.items():
+            fresh = [keyword for keyword in dict.fromkeys(keywords) if (category, keyword) not in known]
+            if fresh:
+                delta_table[category] = fresh
+
+        self.base = base
+        self.delta = KeywordIndex.from_table(delta_table)
+        self.version = overlay_version(base.version, extras)
+        self.max_keyword_length = max(base.max_keyword_length, self.delta.max_keyword_length)
+
+        # Both indexes number their entries by category, so each category is
+        # one contiguous id range in each; interleave the ranges by name.
+        base_ranges = _category_ranges(base.entries)
+        delta_ranges = _category_ranges(self.delta.entries)
+        base_map = [0] * len(base.entries)
+        delta_map = [0] * len(self.delta.entries)
+        entries, reasons = [], []
+        for category in sorted(set(base_ranges) | set(delta_ranges)):
+            for source, ranges, id_map in ((base, base_ranges, base_map), (self.delta, delta_ranges, delta_map)):
+                for entry_id in ranges.get(category, ()):
+                    id_map[entry_id] = len(entries)
+                    entries.append(source.entries[entry_id])
+                    reasons.append(source.reasons[entry_id])
+
+        self.entries = tuple(entries)
+        self.reasons = tuple(reasons)
+        self._base_map = base_map
+        self._delta_map = delta_map
+
+        # Combined prefilter, so a clean text is tokenized once, not per index
+        self._always_scan = bool(base._unanchored or self.delta._unanchored)
+        self._heads = base._heads | self.delta._heads
+        self._ascii_always_scan = bool(base._ascii_unanchored or self.delta._ascii_unanchored)
+        self._ascii_heads = base._ascii_heads | self.delta._ascii_heads
+        # A token can only equal a head word the text contains as a
+        # substring; for a handful of heads, str.__contains__ is cheaper
+        # than tokenizing the text again
+        self._delta_substrings = tuple(self.delta._heads) if len(self.delta._heads) <= _SUBSTRING_CHECK_HEADS and not self.delta._unanchored else None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def approximate_size(self) -> int:
+        """Bytes this overlay adds on top of the shared base index."""
+        views = (self.entries, self.reasons, self._base_map, self._delta_map, self._heads, self._ascii_heads)
+        return self.delta.approximate_size() + sum(sys.getsizeof(view) for view in views)
+
+    def may_match(self, text: str) -> bool:
+        """KeywordIndex.may_match over the combined table."""
+        return self._always_scan or not self._heads.isdisjoint(_WORD_PATTERN.findall(text))
+
+    def may_match_ascii(self, data: bytes, start: int = 0, end: Optional[int] = None) -> bool:
+        if end is None:
+            end = len(data)
+        return self._ascii_always_scan or not self._ascii_heads.isdisjoint(
+            map(bytes.lower, _ASCII_WORD_PATTERN.findall(data, start, end))
+        )
+
+    def find(self, text: str, pos: int = 0, endpos: Optional[int] = None) -> List[int]:
+        """KeywordIndex.find over the combined table."""
+        if endpos is None:
+            endpos = len(text)
+        matched = list(map(self._base_map.__getitem__, self.base.find(text, pos, endpos)))
+        # The delta is small; its prefilter usually skips the second scan.
+        # Only keywords starting in [pos, endpos) count, so the prefilter
+        # reads the range plus the delta's longest keyword, keeping ranged
+        # scans of a long document linear.
+        window = text[pos:endpos + self.delta.max_keyword_length]
+        substrings = self._delta_substrings
+        if self.delta.may_match(window) if substrings is None else any(head in window for head in substrings):
+            matched.extend(map(self._delta_map.__getitem__, self.delta.find(text, pos, endpos)))
+            matched.sort()
+        return matched
+
+    def find_ascii(self, data: bytes, start: int = 0, end: Optional[int] = None) -> List[int]:
+        """KeywordIndex.find_ascii over the combined table."""
+        matched = list(map(self._base_map.__getitem__, self.base.find_ascii(data, start, end)))
+        if self.delta.may_match_ascii(data, start, end):
+            matched.extend(map(self._delta_map.__getitem__, self.delta.find_ascii(data, start, end)))
+            matched.sort()
+        return matched
+
+
+def _category_ranges(entries) -> Dict[str, range]:
+    ranges, start = {}, 0
+    for category, group in groupby(entries, key=lambda entry: entry[0]):
+        count = sum(1 for _ in group)
+        ranges[category] = range(start, start + count)
+        start += count
+    return ranges
+
+
+class TenantIndexCache:
+    """
+    Holds each tenant's extra keywords and an LRU of their compiled
+    overlays. Overlays are compiled on a tenant's first request and evicted
+    least recently used first once their approximate total size exceeds
+    ``budget_bytes`` (the most recent overlay is always kept). An overlay
+    built on an older base index is recompiled on its next use, so a
+    keyword table reload reaches every tenant.
+
+    Lookups take a short lock; compiling happens outside it.
+    """
+
+    def __init__(self, tables: Dict[str, Dict[str, List[str]]], budget_bytes: int = DEFAULT_BUDGET_BYTES):
+        if budget_bytes <= 0:
+            raise ValueError("budget_bytes must be positive")
+        if not isinstance(tables, dict):
+            raise ValueError("Tenant tables must be a JSON object")
+        for tenant, table in tables.items():
+            try:
+                validate_table(table)
+            except ValueError as e:
+                raise ValueError(f"Tenant {tenant!r}: {e}")
+
+        self.tables = tables
+        self.budget_bytes = budget_bytes
+        self._overlays: "OrderedDict[str, OverlayIndex]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.bytes = 0
+        self.hits = 0
+        self.compiles = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_file(cls, path: str, budget_bytes: int = DEFAULT_BUDGET_BYTES) -> "TenantIndexCache":
+        """
+        Reads {"tenants": {"<tenant>": {"<category>": ["<keyword>", ...]}}}.
+        Raises ValueError (or OSError) when the file cannot be used.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Tenant keyword file is not valid JSON: {e}")
+        if not isinstance(data, dict):
+            raise ValueError("Tenant keyword file must be a JSON object")
+        return cls(data.get("tenants"), budget_bytes)
+
+    def __contains__(self, tenant: str) -> bool:
+        return tenant in self.tables
+
+    def version(self, tenant: str, base: KeywordIndex) -> str:
+        """Version the tenant's overlay on ``base`` has (or will have)."""
+        return overlay_version(base.version, self.tables[tenant])
+
+    def get(self, tenant: str, base: KeywordIndex) -> OverlayIndex:
+        """The tenant's overlay on ``base``, compiled if needed. KeyError for an unknown tenant."""
+        extras = self.tables[tenant]
+        with self._lock:
+            overlay = self._overlays.get(tenant)
+            if overlay is not None and overlay.base is base:
+                self._overlays.move_to_end(tenant)
+                self.hits += 1
+                return overlay
+
+        overlay = OverlayIndex(base, extras)
+        size = overlay.approximate_size()
+        with self._lock:
+            self.compiles += 1
+            self.bytes += size - self._sizes.get(tenant, 0)
+            self._overlays[tenant] = overlay
+            self._overlays.move_to_end(tenant)
+            self._sizes[tenant] = size
+            while self.bytes > self.budget_bytes and len(self._overlays) > 1:
+                evicted, _ = self._overlays.popitem(last=False)
+                self.bytes -= self._sizes.pop(evicted)
+                self.evictions += 1
+        return overlay
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tenants": len(self.tables),
+                "compiled": len(self._overlays),
+                "bytes": self.bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "compiles": self.compiles,
+                "evictions": self.evictions
+            }
@@ -11,7 +11,7 @@ from datetime import datetime
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.engine import analyze_text  # Your scoring function
+from app.engine import analyze_text, get_index_version  # Your scoring function
 
 # -------------------------------------------------
 # LOGGING SETUP
@@ -117,6 +117,7 @@ def run_harness():
                 "input": test_input,
                 "hash": baseline_hash,
                 "iterations": ITERATIONS,
+                "index_version": get_index_version(),
                 "output_sample": baseline_result
             })
         else:
@@ -64,8 +64,9 @@ def probe_invalid_type_dict():
 def probe_internal_error():
     """Simulate INTERNAL_ERROR by patching engine internals."""
     import unittest.mock as mock
-    # Patch re.search to raise RuntimeError inside analyze_text
-    with mock.patch("app.engine.re.search", side_effect=RuntimeError("injected fault")):
+    # Patch the compiled keyword matcher (its prefilter runs first on every
+    # text) to raise RuntimeError inside analyze_text
+    with mock.patch("app.engine.KEYWORD_INDEX.may_match", side_effect=RuntimeError("injected fault")):
         return "INTERNAL_ERROR", analyze_text("this is normal text", correlation_id="FAULT-001")
 
 def probe_forbidden_role():
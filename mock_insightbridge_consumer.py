@@ -2,7 +2,8 @@
 Mock InsightBridge Consumer
 ===========================
 Simulates the downstream ingestion of Text Risk Scoring Service outputs.
-Validates payloads against enforcement_output_contract_v4.json.
+Validates payloads against enforcement_output_contract_v4.json, compiled
+once at load time (app/contract_compiler.py).
 Emits insightbridge_simulation_report.md.
 
 Run with:
@@ -13,7 +14,7 @@ import json
 import os
 import sys
 from datetime import datetime, timezone
-import jsonschema
+from typing import List
 
 # Inject project root to path
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -22,6 +23,7 @@ sys.path.insert(0, PROJECT_ROOT)
 from app.engine import analyze_text
 from app.dgic_adapter import EpistemicState, DGICInput, build_evidence_hash
 from app.enforcement_aggregator import aggregate_signals
+from app.contract_compiler import compile_schema
 
 # ──────────────────────────────────────────────────────────────
 # Setup
@@ -32,6 +34,8 @@ CONTRACT_PATH = os.path.join(PROJECT_ROOT, "enforcement_output_contract_v4.json"
 with open(CONTRACT_PATH, "r", encoding="utf-8") as f:
     V4_SCHEMA = json.load(f)
 
+V4_VALIDATOR = compile_schema(V4_SCHEMA, "enforcement_v4")
+
 
 class InsightBridgeMock:
     def __init__(self):
@@ -44,12 +48,18 @@ class InsightBridgeMock:
 
     def consume(self, payload: dict) -> str:
         """Consume a V4 signal, validate it, and simulate a downstream decision."""
+        return self._consume(payload, V4_VALIDATOR.error(payload))
+
+    def consume_batch(self, payloads: List[dict]) -> List[str]:
+        """consume() for many signals, validated in one pass."""
+        errors = V4_VALIDATOR.validate_batch(payloads)
+        return [self._consume(payload, error) for payload, error in zip(payloads, errors)]
+
+    def _consume(self, payload: dict, error) -> str:
         # 1. Structural Validation
-        try:
-            jsonschema.validate(instance=payload, schema=V4_SCHEMA)
-        except jsonschema.exceptions.ValidationError as e:
+        if error is not None:
             self.rejected_schema += 1
-            log = f"REJECTED (Schema/Invariant): {e.message}"
+            log = f"REJECTED (Schema/Invariant): {error.message}"
             self.logs.append({"payload": payload, "action": log})
             return log
 
@@ -0,0 +1,68 @@
+"""
+Admin Endpoint Tests
+Keyword reload and policy promotion require the admin token
+"""
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from app import engine
+from app.engine import KEYWORD_WEIGHT, RISK_KEYWORDS
+from app.main import app
+from app.policy import BASELINE_POLICY_VERSION, PolicyRegistry, baseline_policy
+
+TOKEN = "s3cret-admin-token"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("RISK_ADMIN_TOKEN", TOKEN)
+    monkeypatch.setattr(engine, "POLICY_REGISTRY", PolicyRegistry(baseline_policy(RISK_KEYWORDS, KEYWORD_WEIGHT)))
+    index, label = engine.KEYWORD_INDEX, engine.get_table_version()
+    yield TestClient(app)
+    engine.publish_keyword_index(index, label)
+
+
+@pytest.mark.parametrize("authorization", [None, "Bearer wrong", TOKEN, f"Basic {TOKEN}"])
+def test_reload_rejects_missing_or_wrong_token(client, authorization):
+    headers = {"Authorization": authorization} if authorization else {}
+    response = client.post("/admin/keywords/reload", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["errors"]["error_code"] == "UNAUTHORIZED"
+
+
+def test_reload_accepts_admin_token(client, monkeypatch, tmp_path):
+    path = tmp_path / "keywords.json"
+    path.write_text('{"version": "v2", "categories": {"fraud": ["gift card"]}}', encoding="utf-8")
+    monkeypatch.setenv("RISK_KEYWORD_TABLE", str(path))
+    response = client.post("/admin/keywords/reload", headers={"Authorization": f"Bearer {TOKEN}"})
+    assert response.status_code == 200
+    assert response.json()["reloaded"] is True and response.json()["table_version"] == "v2"
+
+
+def test_admin_disabled_without_configured_token(client, monkeypatch):
+    monkeypatch.delenv("RISK_ADMIN_TOKEN")
+    response = client.post("/admin/keywords/reload", headers={"Authorization": "Bearer "})
+    assert response.status_code == 403
+    assert response.json()["errors"]["error_code"] == "ADMIN_DISABLED"
+
+
+def test_policy_promotion_requires_admin_token(client):
+    body = {"policy_version": 1, "category_weights": {"violence": 0.5}}
+    response = client.post("/admin/policy", json=body, headers={"Authorization": "Bearer wrong"})
+    assert response.status_code == 401
+    assert engine.get_active_policy().version == BASELINE_POLICY_VERSION
+
+    response = client.post("/admin/policy", json=body, headers={"Authorization": f"Bearer {TOKEN}"})
+    assert response.json() == {"promoted": True, "policy_version": 1, "errors": None}
+
+
+def test_policy_outside_bounds_rejected(client):
+    for weights in ({"violence": 5.0}, {"made_up": 0.5}):
+        response = client.post("/admin/policy", json={"policy_version": 1, "category_weights": weights},
+                               headers={"Authorization": f"Bearer {TOKEN}"})
+        assert response.json()["errors"]["error_code"] == "INVALID_POLICY"
+    assert engine.get_active_policy().version == BASELINE_POLICY_VERSION
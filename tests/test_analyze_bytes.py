@@ -0,0 +1,56 @@
+"""
+Raw Bytes Analysis Tests
+analyze_bytes must return exactly what analyze_text returns for the decoded body
+"""
+import logging
+import random
+
+from app.engine import analyze_bytes, analyze_text, RISK_KEYWORDS, MAX_TEXT_LENGTH
+
+
+def test_differential_ascii_bodies():
+    keywords = [kw for kws in RISK_KEYWORDS.values() for kw in kws]
+    separators = [" ", "\t", "\n", "\x1c", "\x1f", "\x0b", "", ".", "_", "-"]
+    rng = random.Random(20260315)
+
+    for _ in range(2000):
+        words = [rng.choice(keywords + ["the", "Skill", "KILLER", "a1", "_x"]) for _ in range(rng.randint(0, 25))]
+        words = [word.upper() if rng.random() < 0.3 else word for word in words]
+        text = "".join(rng.choice(separators) + word for word in words) + rng.choice(separators)
+        assert analyze_bytes(text.encode("ascii")) == analyze_text(text), repr(text)
+
+
+def test_truncation_and_processed_length():
+    text = "  \x1f" + "x" * (MAX_TEXT_LENGTH - 5) + " KILL bomb  "
+    result = analyze_bytes(text.encode("ascii"))
+    assert result == analyze_text(text)
+    assert result["processed_length"] == MAX_TEXT_LENGTH
+    assert result["trigger_reasons"] == ["Detected violence keyword: kill", "Input text was truncated to safe maximum length"]
+
+
+def test_empty_and_whitespace_bodies():
+    for body in [b"", b"   ", b"\t\n\x1c"]:
+        assert analyze_bytes(body)["errors"]["error_code"] == "EMPTY_INPUT"
+
+
+def test_non_ascii_falls_back_to_text_path():
+    text = "Café SCAM İ kill"
+    assert analyze_bytes(text.encode("utf-8")) == analyze_text(text)
+
+
+def test_invalid_utf8_rejected():
+    result = analyze_bytes(b"scam \xff\xfe")
+    assert result["errors"]["error_code"] == "INVALID_ENCODING"
+
+
+def test_same_log_events_as_text_path(caplog):
+    text = "I will KILL you scam scam fraud"
+    with caplog.at_level(logging.INFO, logger="app.engine"):
+        analyze_text(text, "B-1")
+        text_events = [(r.event_type, getattr(r, "details", None)) for r in caplog.records]
+        caplog.clear()
+        analyze_bytes(text.encode("ascii"), "B-1")
+        bytes_events = [(r.event_type, getattr(r, "details", None)) for r in caplog.records]
+
+    strip_timing = lambda events: [(e, {k: v for k, v in (d or {}).items() if k != "processing_time_ms"}) for e, d in events]
+    assert strip_timing(bytes_events) == strip_timing(text_events)
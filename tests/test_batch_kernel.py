@@ -0,0 +1,101 @@
+"""
+Batch Kernel Tests
+Table scoring must equal analyze_text exactly, including rounding
+"""
+import itertools
+import logging
+import random
+
+import pytest
+
+from app.batch_kernel import CATEGORY_SCORE_TABLE, score_counts, score_texts
+from app.engine import analyze_texts, configure_tenant_indexes, set_matcher_backend, RISK_KEYWORDS, KEYWORD_INDEX, KEYWORD_WEIGHT, _score_entries
+from app.matchers import MATCHER_BACKENDS
+from app.policy import CompiledPolicy
+from app.tenant_index import TenantIndexCache, UnknownTenantError
+
+
+def test_category_table_matches_scalar_accumulation():
+    score = 0.0
+    for hits in range(1, len(CATEGORY_SCORE_TABLE)):
+        score += KEYWORD_WEIGHT
+        assert CATEGORY_SCORE_TABLE[hits] == min(score, 0.6)
+    assert CATEGORY_SCORE_TABLE[-1] == 0.6
+
+
+def test_score_texts_equals_analyze_texts():
+    keywords = [kw for kws in RISK_KEYWORDS.values() for kw in kws]
+    rng = random.Random(20260314)
+    texts = [
+        " ".join(rng.choice(keywords + ["the", "skill", "calm"]) for _ in range(rng.randint(0, 20)))
+        for _ in range(500)
+    ]
+    texts += ["", "   ", 42, None, "x " * 3000 + "kill"]
+    assert score_texts(texts) == analyze_texts(texts)
+
+
+def test_kernel_matches_scalar_for_all_small_count_vectors():
+    """Every combination of 0-4 hits over three categories, scored both ways."""
+    entries = KEYWORD_INDEX.entries
+    categories = sorted(RISK_KEYWORDS)
+    first_entries = {category: [i for i, (c, _) in enumerate(entries) if c == category] for category in categories}
+
+    rows = [list(combo) + [0] * (len(categories) - 3) for combo in itertools.product(range(5), repeat=3)]
+    rows += [[1] * len(categories), [4] * len(categories), [0] * (len(categories) - 1) + [2]]
+    scores, confidences, risk_categories = score_counts(rows)
+
+    for row, score, confidence, category in zip(rows, scores, confidences, risk_categories):
+        entry_ids = [i for column, hits in enumerate(row) for i in first_entries[categories[column]][:hits]]
+        expected = _score_entries(entry_ids)
+        assert (score, confidence, category) == (expected.risk_score, expected.confidence_score, expected.risk_category)
+
+
+@pytest.mark.parametrize("backend", sorted(MATCHER_BACKENDS))
+def test_score_texts_uses_tenant_overlay_and_matcher(backend):
+    configure_tenant_indexes(TenantIndexCache({"acme": {"fraud": ["gift card"], "aaa_first": ["zebra"]}}))
+    set_matcher_backend(backend)
+    try:
+        texts = ["buy a gift card", "zebra kill", "hello", "scam gift card zebra", 7]
+        assert score_texts(texts, tenant="acme") == analyze_texts(texts, tenant="acme")
+        assert score_texts(texts, tenant="acme")[0]["trigger_reasons"] == ["Detected fraud keyword: gift card"]
+        with pytest.raises(UnknownTenantError):
+            score_texts(texts, tenant="nobody")
+    finally:
+        set_matcher_backend("token")
+        configure_tenant_indexes(None)
+
+
+def test_correlation_ids_length_checked():
+    with pytest.raises(ValueError):
+        score_texts(["a", "b"], ["only-one"])
+    assert score_counts([]) == ([], [], [])
+
+
+class ExplodingText(str):
+    def strip(self):
+        raise RuntimeError("broken input")
+
+
+def warnings_by_item(caplog, scorer, texts, **kwargs):
+    caplog.clear()
+    ids = [f"ITEM-{i}" for i in range(len(texts))]
+    with caplog.at_level(logging.WARNING):
+        results = scorer(texts, ids, **kwargs)
+    records = sorted((record.correlation_id, record.event_type, str(getattr(record, "details", None)))
+                     for record in caplog.records if record.levelno >= logging.WARNING)
+    return results, records
+
+
+@pytest.mark.parametrize("policy", [None, CompiledPolicy(7, {"violence": 0.7, "fraud": 0.15}, KEYWORD_WEIGHT)])
+def test_score_texts_writes_analyze_text_warnings_per_item(caplog, policy):
+    texts = ["kill", "kill attack bomb shoot", "scam fraud phishing kill attack bomb murder",
+             "x " * 3000 + "kill", ExplodingText("kill"), "scam"]
+    kernel_results, kernel_records = warnings_by_item(caplog, score_texts, texts, policy=policy)
+    scalar_results, scalar_records = warnings_by_item(caplog, analyze_texts, texts, policy=policy)
+
+    assert kernel_results == scalar_results
+    assert kernel_results[4]["errors"]["error_code"] == "INTERNAL_ERROR"
+    assert kernel_results[5]["errors"] is None
+    assert kernel_records == scalar_records
+    assert {event for _, event, _ in kernel_records} == {"input_truncated", "category_capped", "score_clamped",
+                                                          "unhandled_exception", "error_response_generated"}
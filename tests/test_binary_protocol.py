@@ -0,0 +1,132 @@
+"""
+Binary Protocol Tests
+MessagePack frames must decode to exactly the JSON response
+"""
+import json
+
+import pytest
+
+from app import binary_protocol
+from app.binary_protocol import (
+    TRUNCATION_ID, FrameError, encode_frame, expand_response, is_msgpack, keyword_table, packb, unpackb
+)
+from app.contract_enforcement import contract_error_response
+from app.engine import KEYWORD_INDEX, analyze_text, analyze_texts
+from app.keyword_index import KeywordIndex
+from app.response_encoding import BATCH_OUTPUT_LAYOUT, encode_response
+from app.tenant_index import OverlayIndex
+
+TEXTS = ["This is perfectly safe content.", "kill", "kill murder attack scam", "A" * 6000, "café résumé naïve kill",
+         "", None, "kill " * 30]
+
+# Boundaries of every MessagePack format the codec writes
+VALUES = [
+    None, True, False, 0, 127, 128, 255, 256, 65535, 65536, 2 ** 32 - 1, 2 ** 32, 2 ** 64 - 1, -1, -32, -33, -128, -129,
+    -32768, -32769, -2 ** 31, -2 ** 31 - 1, -2 ** 63, 0.0, -1.5, 1e300, "", "a" * 31, "a" * 32, "é" * 200, "x" * 70000,
+    b"", b"x" * 300, [], [1] * 15, [1] * 16, [0] * 70000, {}, {str(i): i for i in range(15)}, {str(i): i for i in range(16)},
+    {"a": [{"b": None}]},
+]
+
+
+@pytest.fixture(params=["library", "fallback"])
+def codec(request, monkeypatch):
+    """Runs a test once with the msgpack library and once with the pure-Python codec."""
+    if request.param == "library":
+        assert binary_protocol.msgpack is pytest.importorskip("msgpack")
+    else:
+        monkeypatch.setattr(binary_protocol, "msgpack", None)
+    return request.param
+
+
+def json_body(content, layout=None):
+    return json.loads(encode_response(content, layout) if layout else encode_response(content))
+
+
+def test_round_trip(codec):
+    for value in VALUES:
+        assert unpackb(packb(value)) == value
+
+
+def test_fallback_bytes_match_msgpack():
+    msgpack = pytest.importorskip("msgpack")
+    for value in VALUES:
+        out = bytearray()
+        binary_protocol._pack(value, out)
+        assert bytes(out) == msgpack.packb(value)
+
+
+def test_known_encodings(codec):
+    assert packb({"a": [1, -1, None, True]}) == b"\x81\xa1a\x94\x01\xff\xc0\xc3"
+    assert packb(0.5) == b"\xcb\x3f\xe0\x00\x00\x00\x00\x00\x00"
+    assert packb(300) == b"\xcd\x01\x2c"
+    assert packb("x" * 40)[:2] == b"\xd9\x28"
+
+
+@pytest.mark.parametrize("frame", [b"", b"\x92\x01", b"\x01\x02", b"\xc1", b"\xa2\xff\xfe", b"\x81\x01\x02",
+                                   b"\xdd\xff\xff\xff\xff"])
+def test_malformed_frames_rejected(codec, frame):
+    with pytest.raises(FrameError):
+        unpackb(frame)
+
+
+def test_deep_nesting_rejected(monkeypatch):
+    monkeypatch.setattr(binary_protocol, "msgpack", None)
+    with pytest.raises(FrameError):
+        unpackb(b"\x91" * 1000 + b"\xc0")
+
+
+def test_frames_decode_to_json_body(codec):
+    for text in TEXTS:
+        response = analyze_text(text)
+        assert unpackb(encode_frame(response)) == json_body(response)
+    error = contract_error_response("INVALID_TYPE", "Field 'text' must be a string")
+    assert unpackb(encode_frame(error)) == json_body(error)
+
+    batch = {"results": analyze_texts(TEXTS), "errors": None}
+    assert unpackb(encode_frame(batch, BATCH_OUTPUT_LAYOUT)) == json_body(batch, BATCH_OUTPUT_LAYOUT)
+    # Same key order as the JSON body too
+    assert list(unpackb(encode_frame(analyze_text("kill")))) == list(json_body(analyze_text("kill")))
+
+
+@pytest.mark.parametrize("index", [
+    KEYWORD_INDEX,
+    OverlayIndex(KEYWORD_INDEX, {"fraud": ["gift card"], "zz_custom": ["kill", "c++"]}),
+    KeywordIndex.from_table({"a": ["kill"], "b": ["kill", "scam"]}),
+], ids=["builtin", "overlay", "shared"])
+def test_compact_frames_expand_exactly(codec, index):
+    table = unpackb(packb(keyword_table(index)))
+    assert table["index_version"] == index.version
+    for text in TEXTS + ["gift card kill c++", "scam"]:
+        response = analyze_text(text)
+        frame = unpackb(encode_frame(response, index=index))
+        if index is KEYWORD_INDEX:
+            assert all(isinstance(reason, int) for reason in frame["trigger_reasons"])
+        assert expand_response(frame, table) == json_body(response)
+
+    batch = {"results": analyze_texts(TEXTS), "errors": None}
+    frame = unpackb(encode_frame(batch, BATCH_OUTPUT_LAYOUT, index))
+    assert expand_response(frame, table) == json_body(batch, BATCH_OUTPUT_LAYOUT)
+
+
+def test_compact_truncation_and_unknown_reasons(codec):
+    response = analyze_text("kill " + "A" * 6000)
+    frame = unpackb(encode_frame(response, index=KEYWORD_INDEX))
+    assert frame["trigger_reasons"][-1] == TRUNCATION_ID
+    # A reason the index does not know (e.g. after a reload) stays a string
+    other = KeywordIndex.from_table({"fraud": ["scam"]})
+    frame = unpackb(encode_frame(analyze_text("kill scam"), index=other))
+    assert "Detected violence keyword: kill" in frame["trigger_reasons"]
+    assert expand_response(frame, keyword_table(other)) == json_body(analyze_text("kill scam"))
+
+
+def test_compact_frames_are_smaller():
+    response = analyze_text("kill murder attack scam fraud phishing")
+    assert len(encode_frame(response, index=KEYWORD_INDEX)) < len(encode_frame(response)) < len(encode_response(response))
+
+
+@pytest.mark.parametrize("content_type, expected", [
+    ("application/msgpack", True), ("application/x-msgpack; charset=binary", True), ("Application/MsgPack", True),
+    ("application/json", False), (None, False), ("", False),
+])
+def test_content_type_negotiation(content_type, expected):
+    assert is_msgpack(content_type) is expected
@@ -0,0 +1,67 @@
+"""
+Bulk Scoring CLI Tests
+Streaming output, contract handling and checkpoint/resume
+"""
+import io
+import json
+
+from app.bulk import main, run_bulk, save_checkpoint
+from app.engine import analyze_text
+
+
+def run(data: bytes, **options):
+    sink = io.StringIO()
+    run_bulk(io.BytesIO(data), sink, **options)
+    return [json.loads(line) for line in sink.getvalue().splitlines()]
+
+
+def test_plain_lines_scored_with_offsets():
+    records = run(b"kill and scam\n\nhello world\n")
+    assert [r["offset"] for r in records] == [0, 15]
+    assert [r["line"] for r in records] == [1, 3]
+    assert records[0]["result"] == analyze_text("kill and scam")
+    assert records[1]["result"] == analyze_text("hello world")
+
+
+def test_ndjson_fields_and_contract_errors():
+    data = b"\n".join([
+        json.dumps({"request_id": "r1", "body": "scam"}).encode(),
+        json.dumps({"request_id": "r2"}).encode(),
+        json.dumps({"request_id": "r3", "body": 42}).encode(),
+        b"{not json",
+    ]) + b"\n"
+    records = run(data, text_field="body", id_field="request_id")
+
+    assert [r["id"] for r in records] == ["r1", "r2", "r3", None]
+    assert records[0]["result"] == analyze_text("scam")
+    assert records[1]["result"]["errors"]["error_code"] == "MISSING_FIELD"
+    assert records[2]["result"]["errors"]["error_code"] == "INVALID_TYPE"
+    assert records[3]["result"]["errors"] is not None
+
+
+def test_invalid_utf8_reported_not_raised():
+    records = run(b"kill \xff\xfe\n", input_format="lines")
+    assert records[0]["result"]["errors"]["error_code"] == "INVALID_ENCODING"
+
+
+def test_resume_from_checkpoint_matches_clean_run(tmp_path):
+    source = tmp_path / "corpus.txt"
+    source.write_bytes(b"".join(f"message {i} kill scam\n".encode() for i in range(10)))
+    clean = tmp_path / "clean.jsonl"
+    assert main([str(source), "--output", str(clean), "--verbose"]) == 0
+
+    # --verbose keeps main() from changing the shared app.engine log level
+    # Simulate a crash after 4 checkpointed records plus a half-written line
+    clean_lines = clean.read_text().splitlines(keepends=True)
+    partial = tmp_path / "partial.jsonl"
+    partial.write_text("".join(clean_lines[:4]) + clean_lines[4][:20])
+    checkpoint = tmp_path / "run.ckpt"
+    offset = sum(len(f"message {i} kill scam\n") for i in range(4))
+    save_checkpoint(str(checkpoint), {
+        "input": str(source), "offset": offset, "line": 4,
+        "output_offset": len("".join(clean_lines[:4])), "records": 4
+    })
+
+    assert main([str(source), "--output", str(partial), "--checkpoint", str(checkpoint), "--resume", "--verbose"]) == 0
+    assert partial.read_text() == clean.read_text()
+    assert json.loads(checkpoint.read_text())["complete"] is True
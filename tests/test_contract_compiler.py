@@ -0,0 +1,165 @@
+"""
+Contract Compiler Tests
+Compiled validators must accept and reject exactly what the reference rules
+do, with the same error messages
+"""
+import copy
+import json
+import os
+
+import pytest
+
+from app.contract_compiler import (
+    OUTPUT_CONTRACT_V3, SchemaValidationError, best_error, compile_schema, generate_source
+)
+from app.contract_enforcement import ContractViolation, contract_error_response, validate_output_contract
+from app.engine import analyze_text
+from mock_insightbridge_consumer import InsightBridgeMock, V4_SCHEMA, V4_VALIDATOR
+
+PAYLOAD = {
+    "enforcement_signal_id": "a" * 64, "risk_score": 0.4, "bounded_confidence": 0.8, "contradiction_flag": False,
+    "abstention_flag": False, "epistemic_source_hash": "b" * 64, "decision": None, "authority": "NONE",
+}
+
+
+def mutated(base, path, value):
+    payload = copy.deepcopy(base)
+    target = payload
+    for step in path[:-1]:
+        target = target[step]
+    if value is KeyError:
+        del target[path[-1]]
+    else:
+        target[path[-1]] = value
+    return payload
+
+
+V4_CASES = [
+    (("decision",), "BLOCK", "'BLOCK' is not of type 'null'"),
+    (("authority",), "ENFORCER", "'NONE' was expected"),
+    (("epistemic_source_hash",), KeyError, "'epistemic_source_hash' is a required property"),
+    (("enforcement_signal_id",), "A" * 64, f"'{'A' * 64}' does not match '^[a-f0-9]{{64}}$'"),
+    (("enforcement_signal_id",), 7, "7 is not of type 'string'"),
+    (("risk_score",), -0.5, "-0.5 is less than the minimum of 0.0"),
+    (("bounded_confidence",), 1.5, "1.5 is greater than the maximum of 1.0"),
+    (("risk_score",), True, "True is not of type 'number'"),
+    (("contradiction_flag",), 0, "0 is not of type 'boolean'"),
+    (("extra",), 1, "Additional properties are not allowed ('extra' was unexpected)"),
+]
+
+
+@pytest.mark.parametrize("path, value, message", V4_CASES)
+def test_v4_messages_match_jsonschema_wording(path, value, message):
+    payload = mutated(PAYLOAD, path, value)
+    error = V4_VALIDATOR.error(payload)
+    assert isinstance(error, SchemaValidationError)
+    assert error.message == message
+
+
+def test_v4_shallowest_wrong_type_error_wins():
+    payload = mutated(mutated(PAYLOAD, ("risk_score",), 2.0), ("decision",), "BLOCK")
+    assert V4_VALIDATOR.error(payload).message == "'BLOCK' is not of type 'null'"
+    payload = mutated(payload, ("authority",), KeyError)
+    assert V4_VALIDATOR.error(payload).message == "'authority' is a required property"
+    assert V4_VALIDATOR.error([]).message == "[] is not of type 'object'"
+
+
+def test_v4_matches_jsonschema_when_installed():
+    jsonschema = pytest.importorskip("jsonschema")
+    for path, value, _ in V4_CASES:
+        payload = mutated(PAYLOAD, path, value)
+        with pytest.raises(jsonschema.ValidationError) as expected:
+            jsonschema.validate(payload, V4_SCHEMA)
+        assert V4_VALIDATOR.error(payload).message == expected.value.message
+
+
+def test_interpreter_has_final_word_on_edge_values():
+    # Generated code rejects these outright; the interpreter accepts them
+    schema = {"type": "object", "properties": {"n": {"type": "integer", "maximum": 3}}}
+    validator = compile_schema(schema)
+    assert not validator.accepts({"n": 2.0})
+    assert validator.error({"n": 2.0}) is None
+    assert V4_VALIDATOR.error(mutated(PAYLOAD, ("risk_score",), float("nan"))) is None
+
+
+def test_batch_validate_matches_single():
+    payloads = [PAYLOAD] + [mutated(PAYLOAD, path, value) for path, value, _ in V4_CASES]
+    batch = V4_VALIDATOR.validate_batch(payloads)
+    assert batch[0] is None
+    assert [error and error.message for error in batch] == [
+        error and error.message for error in map(V4_VALIDATOR.error, payloads)
+    ]
+
+    mock = InsightBridgeMock()
+    actions = mock.consume_batch(payloads)
+    assert actions[0].startswith("PASS")
+    assert actions[1] == "REJECTED (Schema/Invariant): 'BLOCK' is not of type 'null'"
+    assert mock.rejected_schema == len(V4_CASES)
+
+
+def test_unsupported_keyword_rejected_at_compile_time():
+    with pytest.raises(ValueError):
+        generate_source({"type": "object", "patternProperties": {"^x": {}}})
+    with pytest.raises(ValueError):
+        generate_source({"type": "object", "additionalProperties": {"type": "string"}})
+
+
+def test_v4_contract_file_unchanged_shape():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(root, "enforcement_output_contract_v4.json"), encoding="utf-8") as f:
+        assert json.load(f) == V4_SCHEMA
+    assert best_error(PAYLOAD, V4_SCHEMA) is None
+
+
+# =========================
+# Sealed v3 Output Contract
+# =========================
+def reference(response):
+    try:
+        validate_output_contract(response)
+    except ContractViolation as e:
+        return e.code, e.message
+    return None
+
+
+def compiled(response):
+    try:
+        OUTPUT_CONTRACT_V3.validate(response)
+    except ContractViolation as e:
+        return e.code, e.message
+    return None
+
+
+V3_MUTATIONS = [
+    (("risk_score",), 1.01), (("risk_score",), -0.01), (("risk_score",), "0.5"), (("risk_score",), True),
+    (("risk_score",), float("nan")), (("risk_score",), 1),
+    (("confidence_score",), None), (("confidence_score",), 2),
+    (("risk_category",), "CRITICAL"), (("risk_category",), 1),
+    (("trigger_reasons",), "kill"), (("trigger_reasons",), ["x"] * 101), (("trigger_reasons",), ["x"] * 100),
+    (("trigger_reasons",), ["ok", 3]),
+    (("processed_length",), 5001), (("processed_length",), -1), (("processed_length",), 4.0),
+    (("processed_length",), True), (("processed_length",), 5000),
+    (("safety_metadata",), None), (("safety_metadata", "is_decision"), 0), (("safety_metadata", "is_decision"), True),
+    (("safety_metadata", "authority"), "SYSTEM"), (("safety_metadata", "actionable"), None),
+    (("safety_metadata", "extra"), False), (("safety_metadata", "authority"), KeyError),
+    (("errors",), []), (("errors",), {"error_code": "INTERNAL_ERROR"}),
+    (("errors",), {"error_code": "BOGUS", "message": "m"}), (("errors",), {"error_code": 1, "message": "m"}),
+    (("errors",), {"error_code": "INTERNAL_ERROR", "message": None}),
+    (("errors",), {"error_code": "INTERNAL_ERROR", "message": "m"}),
+    (("decision",), "BLOCK"), (("risk_score",), KeyError),
+]
+
+
+@pytest.mark.parametrize("path, value", V3_MUTATIONS)
+def test_v3_compiled_matches_reference(path, value):
+    response = mutated(analyze_text("kill murder scam"), path, value)
+    assert compiled(response) == reference(response)
+
+
+@pytest.mark.parametrize("response", [
+    analyze_text("kill"), analyze_text(""), analyze_text(None), analyze_text("A" * 6000),
+    contract_error_response("INVALID_TYPE", "Input must be a string"),
+])
+def test_v3_accepts_engine_responses(response):
+    assert OUTPUT_CONTRACT_V3.accepts(response)
+    assert compiled(response) is None
@@ -3,7 +3,9 @@ Contract Enforcement Tests
 Validates all contract boundaries and invalid input handling
 """
 import pytest
-from app.contract_enforcement import validate_input_contract, validate_output_contract, ContractViolation
+from app.contract_enforcement import (
+    validate_input_contract, validate_output_contract, validate_batch_input_contract, ContractViolation, MAX_BATCH_SIZE
+)
 from app.engine import analyze_text
 
 class TestInputContractEnforcement:
@@ -51,6 +53,31 @@ class TestInputContractEnforcement:
                 validate_input_contract(invalid_request)
             assert exc.value.code == "INVALID_REQUEST"
 
+class TestBatchInputContractEnforcement:
+    """Test batch envelope validation"""
+
+    def test_valid_batch_passes(self):
+        """Items are returned untouched for per-item validation"""
+        items = [{"text": "hello"}, {"text": 123}]
+        assert validate_batch_input_contract({"items": items}) == items
+
+    def test_invalid_envelopes_rejected(self):
+        """Non-object envelopes, extra fields and non-array items are rejected"""
+        for data in ["items", {"items": "text"}, {"items": [], "mode": "fast"}]:
+            with pytest.raises(ContractViolation) as exc:
+                validate_batch_input_contract(data)
+            assert exc.value.code == "INVALID_BATCH"
+
+    def test_empty_batch_rejected(self):
+        with pytest.raises(ContractViolation) as exc:
+            validate_batch_input_contract({"items": []})
+        assert exc.value.code == "EMPTY_BATCH"
+
+    def test_oversized_batch_rejected(self):
+        with pytest.raises(ContractViolation) as exc:
+            validate_batch_input_contract({"items": [{"text": "a"}] * (MAX_BATCH_SIZE + 1)})
+        assert exc.value.code == "EXCESSIVE_BATCH_SIZE"
+
 class TestOutputContractEnforcement:
     """Test output contract validation"""
     
@@ -0,0 +1,89 @@
+"""
+Long-Document Analysis Tests
+Windowed scoring beyond MAX_TEXT_LENGTH
+"""
+import random
+
+import pytest
+
+from app.contract_enforcement import (
+    validate_document_input_contract, validate_document_output_contract,
+    document_contract_error_response, ContractViolation, MAX_DOCUMENT_LENGTH
+)
+from app.engine import analyze_document, analyze_text, KEYWORD_INDEX, MAX_TEXT_LENGTH, RISK_KEYWORDS
+
+
+def test_short_document_scores_like_analyze_text():
+    text = "Kill the scammer, then launder money via crypto scam"
+    document = analyze_document(text)
+    single = analyze_text(text)
+
+    for field in ("risk_score", "confidence_score", "risk_category", "trigger_reasons"):
+        assert document[field] == single[field]
+    assert len(document["windows"]) == 1
+    assert document["windows"][0]["trigger_reasons"] == single["trigger_reasons"]
+
+
+def test_keywords_after_max_length_are_scored():
+    text = "a " * MAX_TEXT_LENGTH + "bomb"
+    assert analyze_text(text)["trigger_reasons"] == ["Input text was truncated to safe maximum length"]
+
+    document = analyze_document(text)
+    assert document["trigger_reasons"] == ["Detected violence keyword: bomb", "Detected weapons keyword: bomb"]
+    assert document["document_length"] == len(text)
+    assert [w["risk_category"] for w in document["windows"]] == ["LOW", "LOW", "MEDIUM"]
+
+
+def test_boundary_spanning_keyword_counted_once():
+    # "money laundering" starts 4 characters before the window boundary
+    text = "x" * 9 + " money laundering"
+    document = analyze_document(text, window_size=14)
+
+    reasons = [w["trigger_reasons"] for w in document["windows"]]
+    assert reasons == [["Detected fraud keyword: money laundering"], []]
+    assert document["trigger_reasons"] == ["Detected fraud keyword: money laundering"]
+
+
+def test_word_split_by_boundary_not_matched_twice():
+    # "skill" split as "sk|ill" must not yield "kill" in the second window
+    document = analyze_document("sk" + "ill", window_size=2)
+    assert document["trigger_reasons"] == []
+
+
+def test_document_score_matches_full_scan():
+    keywords = [kw for kws in RISK_KEYWORDS.values() for kw in kws]
+    rng = random.Random(20260312)
+    for _ in range(200):
+        words = [rng.choice(keywords + ["the", "skill", "myself", "over"]) for _ in range(rng.randint(1, 40))]
+        text = " ".join(words)
+        document = analyze_document(text, window_size=rng.randint(1, 30))
+
+        expected = [f"Detected {c} keyword: {k}" for c, k in (KEYWORD_INDEX.entries[i] for i in KEYWORD_INDEX.find(text))]
+        assert document["trigger_reasons"] == expected
+        # Each window is scored only on what starts inside it
+        assert set().union(*(w["trigger_reasons"] for w in document["windows"])) == set(expected)
+        validate_document_output_contract(document)
+
+
+def test_document_errors():
+    assert analyze_document(42)["errors"]["error_code"] == "INVALID_TYPE"
+    assert analyze_document("   ")["errors"]["error_code"] == "EMPTY_INPUT"
+    validate_document_output_contract(analyze_document("   "))
+    with pytest.raises(ValueError):
+        analyze_document("text", window_size=0)
+
+
+def test_document_input_contract_length_limit():
+    assert validate_document_input_contract({"text": "a" * (MAX_TEXT_LENGTH + 1)})
+    with pytest.raises(ContractViolation) as exc:
+        validate_document_input_contract({"text": "a" * (MAX_DOCUMENT_LENGTH + 1)})
+    assert exc.value.code == "EXCESSIVE_LENGTH"
+
+
+def test_document_output_contract_rejects_bad_window():
+    document = analyze_document("scam")
+    document["windows"][0]["risk_category"] = "SEVERE"
+    with pytest.raises(ContractViolation):
+        validate_document_output_contract(document)
+
+    validate_document_output_contract(document_contract_error_response("EXCESSIVE_LENGTH", "too long"))
@@ -121,3 +121,54 @@ def test_low_confidence_ambiguous():
 # def test_same_input_determinism():
 #     assert analyze_text("scam") == analyze_text("scam")
 
+
+
+# =========================
+# Batch Analysis Tests
+# =========================
+import pytest
+from app.engine import analyze_texts
+
+
+def test_batch_matches_single_item_results():
+    texts = ["kill and scam", "This is a normal message", "", 123, "scam " * 2000]
+    assert analyze_texts(texts) == [analyze_text(text) for text in texts]
+
+
+def test_batch_keeps_per_item_errors():
+    results = analyze_texts(["scam", None, "   "])
+    assert results[0]["errors"] is None
+    assert results[1]["errors"]["error_code"] == "INVALID_TYPE"
+    assert results[2]["errors"]["error_code"] == "EMPTY_INPUT"
+
+
+def test_batch_rejects_mismatched_correlation_ids():
+    with pytest.raises(ValueError):
+        analyze_texts(["a", "b"], correlation_ids=["only-one"])
+
+
+# =========================
+# Result Objects
+# =========================
+from app.engine import KEYWORD_INDEX, ScoreResult, _score_entries
+
+
+def test_reason_strings_are_shared_across_responses():
+    first = analyze_text("kill and scam")["trigger_reasons"]
+    second = analyze_text("scam then kill")["trigger_reasons"]
+    assert first == ["Detected fraud keyword: scam", "Detected violence keyword: kill"]
+    assert all(a is b for a, b in zip(first, second))
+    assert first[0] is KEYWORD_INDEX.reasons[KEYWORD_INDEX.find("scam")[0]]
+
+
+def test_safety_metadata_is_copied_per_response():
+    first = analyze_text("kill")
+    first["safety_metadata"]["is_decision"] = True
+    assert analyze_text("kill")["safety_metadata"] == {"is_decision": False, "authority": "NONE", "actionable": False}
+
+
+def test_score_result_is_slotted():
+    result = _score_entries(KEYWORD_INDEX.find("kill and scam"))
+    assert isinstance(result, ScoreResult)
+    assert not hasattr(result, "__dict__")
+    assert result.to_dict()["trigger_reasons"] == analyze_text("kill and scam")["trigger_reasons"]
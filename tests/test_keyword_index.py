@@ -0,0 +1,138 @@
+import random
+import re
+
+from app.engine import analyze_text, RISK_KEYWORDS, KEYWORD_INDEX
+from app.keyword_index import KeywordIndex
+
+
+def reference_scan(text: str) -> list:
+    """Per-keyword regex scan the index replaces (one search per keyword)."""
+    hits = []
+    for category, keywords in sorted(RISK_KEYWORDS.items()):
+        for keyword in keywords:
+            if re.search(r"\b" + re.escape(keyword) + r"\b", text):
+                hits.append((category, keyword))
+    return hits
+
+
+def index_scan(text: str) -> list:
+    return [KEYWORD_INDEX.entries[entry_id] for entry_id in KEYWORD_INDEX.find(text)]
+
+
+def test_index_covers_every_keyword():
+    assert len(KEYWORD_INDEX) == sum(len(kws) for kws in RISK_KEYWORDS.values())
+
+
+def test_overlapping_keywords_all_reported():
+    """
+    'kill myself' must report both the violence word and the self_harm phrase,
+    and 'drug dealer' both 'drug' and 'dealer' as well as the phrase itself.
+    """
+    assert index_scan("i want to kill myself") == reference_scan("i want to kill myself")
+    assert ("self_harm", "kill myself") in index_scan("kill myself")
+    assert ("violence", "kill") in index_scan("kill myself")
+    assert index_scan("drug dealer") == [("drugs", "drug"), ("drugs", "dealer"), ("drugs", "drug dealer")]
+
+
+def test_word_boundaries_respected():
+    for text in ["skill", "killer", "kill_", "9kill", "scams", "studies"]:
+        assert index_scan(text) == reference_scan(text)
+    assert index_scan("kill.") == [("violence", "kill")]
+
+
+def test_trigger_reason_order_matches_reference():
+    result = analyze_text("weapon scam gun kill knife hate")
+    expected = [f"Detected {c} keyword: {k}" for c, k in reference_scan("weapon scam gun kill knife hate")]
+    assert result["trigger_reasons"] == expected
+
+
+def test_differential_against_reference_scan():
+    """Randomized corpus: the single-pass index must agree with the regex scan."""
+    keywords = [kw for kws in RISK_KEYWORDS.values() for kw in kws]
+    filler = ["the", "skill", "killer", "é", "İ", "_", "self", "will", "al", "over", "myself"]
+    separators = [" ", "", ".", "\n", "-", "é"]
+    rng = random.Random(20260303)
+
+    for _ in range(2000):
+        words = [rng.choice(keywords + filler) for _ in range(rng.randint(0, 25))]
+        text = "".join(word + rng.choice(separators) for word in words)
+        assert index_scan(text) == reference_scan(text), text
+
+
+def test_unanchored_keyword_falls_back_to_search():
+    index = KeywordIndex.from_table({"misc": ["-x-", "abc"]})
+    assert [index.entries[i] for i in index.find("a-x-b abc")] == [("misc", "-x-"), ("misc", "abc")]
+
+
+# =========================
+# Index Artifact Tests
+# =========================
+import pytest
+
+from app.keyword_index import IndexArtifactError, table_version
+
+
+def test_artifact_round_trip(tmp_path):
+    path = str(tmp_path / "keyword_index.bin")
+    KEYWORD_INDEX.save(path)
+    loaded = KeywordIndex.load(path)
+
+    assert loaded.version == KEYWORD_INDEX.version == table_version(RISK_KEYWORDS)
+    assert loaded.entries == KEYWORD_INDEX.entries
+    for text in ["i want to kill myself", "drug dealer scam", "a-x-b", "safe text"]:
+        assert loaded.find(text) == KEYWORD_INDEX.find(text)
+
+
+def test_corrupted_artifact_rejected(tmp_path):
+    data = bytearray(KEYWORD_INDEX.to_bytes())
+    data[-2] ^= 0xFF
+    with pytest.raises(IndexArtifactError):
+        KeywordIndex.from_buffer(bytes(data))
+    with pytest.raises(IndexArtifactError):
+        KeywordIndex.from_buffer(b"not an index")
+
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    with pytest.raises(IndexArtifactError):
+        KeywordIndex.load(str(empty))
+
+
+def test_artifact_header_version_must_match_entries():
+    other = KeywordIndex.from_table({"violence": ["kill"]})
+    data = bytearray(KEYWORD_INDEX.to_bytes())
+    # Header: magic (8) | format version (4) | table version (16)
+    data[12:28] = other.version.encode("ascii")
+    with pytest.raises(IndexArtifactError, match="table version"):
+        KeywordIndex.from_buffer(bytes(data))
+
+
+def test_ranged_find_reports_matches_starting_in_range():
+    """Adjacent ranges together report exactly the occurrences of a full scan."""
+    keywords = [kw for kws in RISK_KEYWORDS.values() for kw in kws]
+    filler = ["the", "skill", "killer", "é", "self", "will", "myself"]
+    rng = random.Random(20260311)
+    patterns = [
+        ((category, keyword), re.compile(r"\b" + re.escape(keyword) + r"\b"))
+        for category, kws in sorted(RISK_KEYWORDS.items()) for keyword in kws
+    ]
+
+    for _ in range(150):
+        words = [rng.choice(keywords + filler) for _ in range(rng.randint(1, 30))]
+        text = "".join(word + rng.choice([" ", "", "."]) for word in words)
+        size = rng.randint(1, 20)
+        for start in range(0, len(text), size):
+            end = min(start + size, len(text))
+            expected = [
+                entry for entry, pattern in patterns
+                if any(start <= m.start() < end for m in pattern.finditer(text))
+            ]
+            found = [KEYWORD_INDEX.entries[i] for i in KEYWORD_INDEX.find(text, start, end)]
+            assert found == expected, (text, start, end)
+
+
+def test_ranged_find_unanchored_keyword():
+    index = KeywordIndex.from_table({"odd": ["-x-"]})
+    text = "a-x-b abc"
+    assert index.find(text, 0, 1) == []
+    assert index.find(text, 1, 2) == [0]
+    assert index.find(text, 2) == []
@@ -0,0 +1,180 @@
+"""
+Keyword Table Reload Tests
+Versioned table files, atomic index swap and worker synchronization
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import stat
+import time
+
+import pytest
+
+from app import engine
+from app.engine import analyze_document, analyze_text, analyze_texts, load_keyword_table, reload_keyword_table, scored_index_version
+from app.keyword_index import IndexArtifactError, KeywordIndex
+from app.scoring_executor import ScoringExecutor, _sync_worker_index, _write_artifact
+
+
+@pytest.fixture(autouse=True)
+def restore_index():
+    index, label = engine.KEYWORD_INDEX, engine.get_table_version()
+    yield
+    engine.publish_keyword_index(index, label)
+
+
+def write_table(tmp_path, table, name="keywords.json"):
+    path = tmp_path / name
+    path.write_text(json.dumps(table), encoding="utf-8")
+    return str(path)
+
+
+def test_reload_swaps_index_and_scoring(tmp_path):
+    builtin_version = engine.get_index_version()
+    table = {"version": "v2", "categories": {"fraud": ["gift card"]}}
+
+    result = reload_keyword_table(write_table(tmp_path, table))
+
+    assert result["table_version"] == "v2"
+    assert result["keywords"] == 1
+    assert engine.get_index_version() == result["index_version"] != builtin_version
+    assert engine.get_table_version() == "v2"
+    assert analyze_text("send a gift card")["trigger_reasons"] == ["Detected fraud keyword: gift card"]
+    assert analyze_text("kill")["risk_score"] == 0.0
+
+
+def test_in_flight_request_finishes_on_old_index(tmp_path):
+    path = write_table(tmp_path, {"version": "v2", "categories": {"fraud": ["gift card"]}})
+    old = engine.KEYWORD_INDEX
+    find = old.find
+
+    def reload_mid_scan(text, *args):
+        reload_keyword_table(path)
+        return find(text, *args)
+
+    old.find = reload_mid_scan
+    try:
+        response = analyze_text("kill with a gift card")
+    finally:
+        del old.find
+
+    assert response["trigger_reasons"] == ["Detected violence keyword: kill"]
+    assert engine.get_table_version() == "v2"
+    assert analyze_text("kill with a gift card")["trigger_reasons"] == ["Detected fraud keyword: gift card"]
+
+
+@pytest.mark.parametrize("fn, arg", [(analyze_text, "kill with a gift card"), (analyze_texts, ["kill", "kill with a gift card"]),
+                                     (analyze_document, "kill with a gift card")])
+def test_scored_index_version_names_the_index_used(tmp_path, fn, arg):
+    path = write_table(tmp_path, {"version": "v2", "categories": {"fraud": ["gift card"]}})
+    old = engine.KEYWORD_INDEX
+    find = old.find
+
+    def reload_mid_scan(text, *args):
+        if engine.KEYWORD_INDEX is old:
+            reload_keyword_table(path)
+        return find(text, *args)
+
+    old.find = reload_mid_scan
+    try:
+        response, index_version = scored_index_version(fn, arg)
+    finally:
+        del old.find
+
+    # The reload landed mid-call; the call (every batch item too) still used the old index
+    assert index_version == old.version != engine.get_index_version()
+    for result in response if isinstance(response, list) else [response]:
+        assert result["trigger_reasons"] == ["Detected violence keyword: kill"]
+    assert scored_index_version(analyze_text, "")[1] is None
+    assert scored_index_version(analyze_text, "kill")[1] == engine.get_index_version()
+
+
+@pytest.mark.parametrize("table", [
+    [],
+    {"categories": {"fraud": ["scam"]}},
+    {"version": "v2", "categories": {}},
+    {"version": "v2", "categories": {"fraud": "scam"}},
+    {"version": "v2", "categories": {"fraud": ["Scam"]}},
+    {"version": "v2", "categories": {"fraud": [" scam"]}},
+])
+def test_invalid_table_leaves_index_untouched(tmp_path, table):
+    version = engine.get_index_version()
+    with pytest.raises(ValueError):
+        reload_keyword_table(write_table(tmp_path, table))
+    assert engine.get_index_version() == version
+
+
+def test_malformed_json_rejected(tmp_path):
+    path = tmp_path / "keywords.json"
+    path.write_text("{not json", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_keyword_table(str(path))
+
+
+def test_reload_requires_configured_table(monkeypatch):
+    monkeypatch.delenv("RISK_KEYWORD_TABLE", raising=False)
+    with pytest.raises(ValueError):
+        reload_keyword_table()
+
+
+def test_ten_thousand_keyword_table_compiles_under_a_second(tmp_path):
+    categories = {f"category_{c}": [f"term{c}x{k}" if k % 4 else f"term{c}x{k} phrase" for k in range(1000)] for c in range(10)}
+    path = write_table(tmp_path, {"version": "large", "categories": categories})
+
+    started = time.perf_counter()
+    result = reload_keyword_table(path)
+    assert time.perf_counter() - started < 1.0
+    assert result["keywords"] == 10000
+    assert analyze_text("term3x8 phrase")["trigger_reasons"] == ["Detected category_3 keyword: term3x8 phrase"]
+
+
+def score_in_every_worker(barrier, text):
+    # Holds the worker until all of them have taken one call
+    barrier.wait(timeout=30)
+    return os.getpid(), engine.get_index_version(), engine.get_table_version(), analyze_text(text)
+
+
+def test_process_workers_follow_reload(tmp_path):
+    path = write_table(tmp_path, {"version": "v2", "categories": {"fraud": ["gift card"]}})
+    executor = ScoringExecutor(kind="process", workers=2)
+
+    async def scenario(barrier):
+        before = await executor.run(analyze_text, "gift card", "RELOAD-001")
+        reload_keyword_table(path)
+        await executor.sync_index()
+        after = await asyncio.gather(*(executor.run(score_in_every_worker, barrier, "gift card") for _ in range(2)))
+        return before, after
+
+    try:
+        with multiprocessing.Manager() as manager:
+            before, after = asyncio.run(scenario(manager.Barrier(2)))
+    finally:
+        executor.shutdown()
+
+    assert before["risk_score"] == 0.0
+    assert len({pid for pid, _, _, _ in after}) == 2
+    for _, index_version, table_version, result in after:
+        assert (index_version, table_version) == (engine.get_index_version(), "v2")
+        assert result["trigger_reasons"] == ["Detected fraud keyword: gift card"]
+
+
+def test_artifacts_written_to_private_directory_removed_on_shutdown():
+    executor = ScoringExecutor(kind="process", workers=1)
+    try:
+        artifact_dir = executor._artifact_dir
+        assert stat.S_IMODE(os.stat(artifact_dir).st_mode) == 0o700
+        path = _write_artifact(engine.KEYWORD_INDEX, artifact_dir)
+        assert os.listdir(artifact_dir) == [os.path.basename(path)]
+    finally:
+        executor.shutdown()
+    assert not os.path.exists(artifact_dir)
+
+
+def test_worker_refuses_artifact_of_another_version(tmp_path):
+    path = tmp_path / "other.bin"
+    KeywordIndex.from_table({"fraud": ["scam"]}).save(str(path))
+    version = engine.get_index_version()
+    with pytest.raises(IndexArtifactError):
+        _sync_worker_index(("0" * 16, "v2", str(path)))
+    assert engine.get_index_version() == version
@@ -0,0 +1,108 @@
+"""
+Matcher Backend Tests
+Every backend against the per-keyword regex reference, and engine wiring
+"""
+import os
+import random
+import time
+
+import pytest
+
+from app import engine
+from app.engine import analyze_document, analyze_text, set_matcher_backend
+from app.keyword_index import KeywordIndex, _keyword_pattern
+from app.matchers import (
+    MATCHER_BACKENDS, build_matcher, differential_check, fastest_matcher, generate_texts
+)
+from app.tenant_index import OverlayIndex
+
+# The full million-input run: RISK_DIFFERENTIAL_INPUTS=1000000 (or python -m app.matchers --differential 1000000)
+DIFFERENTIAL_INPUTS = int(os.environ.get("RISK_DIFFERENTIAL_INPUTS", "2000"))
+
+EDGE_TABLE = {
+    "a_prefixes": ["kill", "kill you", "killing", "kill-switch", "i will kill you"],
+    "b_punctuation": ["c++", "wow!", "-kill", "$$cash", "a.b", "x_y", "e-mail"],
+    "c_unicode": ["straße", "ǆem", "σoς", "文字", "١٢"],
+    "d_shared": ["kill", "scam", "e"],
+}
+
+
+@pytest.fixture(autouse=True)
+def restore_backend():
+    backend = engine.get_matcher_backend()
+    yield
+    set_matcher_backend(backend)
+
+
+@pytest.mark.parametrize("index", [engine.KEYWORD_INDEX, KeywordIndex.from_table(EDGE_TABLE)], ids=["builtin", "edge"])
+def test_backends_match_reference(index):
+    checked = differential_check(index, DIFFERENTIAL_INPUTS)
+    assert checked == {name: DIFFERENTIAL_INPUTS for name in MATCHER_BACKENDS if name != "regex"}
+
+
+def test_backends_match_reference_on_tenant_overlay():
+    overlay = OverlayIndex(engine.KEYWORD_INDEX, {"fraud": ["gift card", "scam"], "zz_custom": ["c++", "kill"]})
+    differential_check(overlay, 1000)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("kill you now", ["kill", "kill you"]),
+    ("killing-switch", ["killing"]),
+    ("kill-switch!", ["kill", "kill-switch"]),
+    ("skill c++ wow!!", []),
+    ("skill c++x wow!a", ["c++", "wow!"]),
+    ("re-kill", ["-kill", "kill"]),
+    ("straße ǆem", ["straße", "ǆem"]),
+    ("x_y x_yz e-mails", ["x_y", "e"]),
+])
+def test_edge_cases(text, expected):
+    index = KeywordIndex.from_table(EDGE_TABLE)
+    for name in MATCHER_BACKENDS:
+        found = {index.entries[entry_id][1] for entry_id in build_matcher(name, index).find(text)}
+        assert found == set(expected), name
+
+
+@pytest.mark.parametrize("backend", sorted(MATCHER_BACKENDS))
+def test_engine_responses_identical_per_backend(backend):
+    texts = list(generate_texts(engine.KEYWORD_INDEX, 100, seed=7))
+    set_matcher_backend("token")
+    expected = [analyze_text(text) for text in texts], analyze_document(" ".join(texts) * 3)
+
+    set_matcher_backend(backend)
+    assert ([analyze_text(text) for text in texts], analyze_document(" ".join(texts) * 3)) == expected
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        set_matcher_backend("simd")
+    assert engine.get_matcher_backend() == "token"
+
+
+def test_benchmark_picks_a_backend():
+    texts = list(generate_texts(engine.KEYWORD_INDEX, 50))
+    best, timings = fastest_matcher(engine.KEYWORD_INDEX, texts, repeat=1)
+    assert set(timings) == set(MATCHER_BACKENDS)
+    assert timings[best] == min(timings.values())
+
+
+def test_regex_reference_reads_only_the_range():
+    index = KeywordIndex.from_table(EDGE_TABLE)
+    matcher = build_matcher("regex", index)
+    patterns = [_keyword_pattern(keyword) for _, keyword in index.entries]
+    rng = random.Random(20)
+    for text in generate_texts(index, 300, seed=20):
+        pos = rng.randint(0, len(text))
+        endpos = rng.randint(pos, len(text))
+        unbounded = [entry_id for entry_id, pattern in enumerate(patterns)
+                     if any(match.start() < endpos for match in pattern.finditer(text, pos))]
+        assert matcher.find(text, pos, endpos) == unbounded, (text, pos, endpos)
+
+    # Windowed scans of a long clean text: linear, not windows x text
+    def scan(windows, size=500):
+        text = "the quick brown fox jumps " * (windows * size // 26)
+        started = time.perf_counter()
+        for start in range(0, len(text), size):
+            matcher.find(text, start, start + size)
+        return time.perf_counter() - started
+
+    assert min(scan(400) for _ in range(3)) / min(scan(25) for _ in range(3)) < 48
@@ -0,0 +1,134 @@
+"""
+Metrics Tests
+Sharded counters and histograms, text exposition and response counting
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app import engine
+from app.engine import analyze_text, error_response
+from app.keyword_index import KeywordIndex
+from app.metrics import (
+    MetricsRegistry, ENGINE_SECONDS, ERRORS_TOTAL, RESPONSES_TOTAL, CATEGORY_MATCHES_TOTAL, record_response
+)
+from app.scoring_executor import ScoringExecutor
+
+
+def test_counter_sums_shards_across_threads():
+    registry = MetricsRegistry()
+    counter = registry.counter("test_total", "test", ["kind"])
+
+    def work():
+        for _ in range(1000):
+            counter.inc("a")
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.value("a") == 8000
+    assert len(counter._shards) == 8
+    assert 'test_total{kind="a"} 8000' in registry.render()
+
+
+def test_counter_rejects_wrong_labels():
+    counter = MetricsRegistry().counter("test_total", "test", ["kind"])
+    with pytest.raises(ValueError):
+        counter.inc()
+
+
+def test_histogram_exposition_is_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_seconds", "test", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value)
+
+    text = registry.render()
+    assert "# TYPE test_seconds histogram" in text
+    assert 'test_seconds_bucket{le="0.1"} 2' in text
+    assert 'test_seconds_bucket{le="1.0"} 3' in text
+    assert 'test_seconds_bucket{le="+Inf"} 4' in text
+    assert "test_seconds_count 4" in text
+    assert "test_seconds_sum 5.65" in text
+
+
+def test_histogram_timer_observes_block():
+    histogram = MetricsRegistry().histogram("test_seconds", "test", ["stage"])
+    with histogram.time("input"):
+        pass
+    assert histogram.count("input") == 1
+    assert histogram.count("output") == 0
+
+
+def test_duplicate_metric_rejected():
+    registry = MetricsRegistry()
+    registry.counter("test_total", "test")
+    with pytest.raises(ValueError):
+        registry.counter("test_total", "test")
+
+
+def test_stats_collector_exposes_numeric_fields():
+    registry = MetricsRegistry()
+    registry.stats("test_cache", "Cache", lambda: {"hits": 3, "hit_rate": 0.75, "kind": "lru"}, counters=["hits"])
+    registry.stats("test_absent", "Absent", lambda: None)
+
+    text = registry.render()
+    assert "# TYPE test_cache_hits counter" in text
+    assert "test_cache_hits 3" in text
+    assert "test_cache_hit_rate 0.75" in text
+    assert "kind" not in text
+    assert "test_absent" not in text
+
+
+def test_record_response_counts_risk_category():
+    before_high = RESPONSES_TOTAL.value("HIGH")
+    before_violence = CATEGORY_MATCHES_TOTAL.value("violence")
+
+    response = analyze_text("kill attack bomb scam")
+    assert response["risk_category"] == "HIGH"
+    record_response(response)
+
+    assert RESPONSES_TOTAL.value("HIGH") == before_high + 1
+    # Counted once, by the engine, however many keywords matched
+    assert CATEGORY_MATCHES_TOTAL.value("violence") == before_violence + 1
+
+
+def test_category_matches_counted_from_entries_not_reason_text():
+    index, label = engine.KEYWORD_INDEX, engine.get_table_version()
+    engine.publish_keyword_index(KeywordIndex.from_table({"odd: name keyword": ["x keyword: y"]}), "odd")
+    try:
+        before = CATEGORY_MATCHES_TOTAL.totals()
+        analyze_text("x keyword: y")
+        after = CATEGORY_MATCHES_TOTAL.totals()
+    finally:
+        engine.publish_keyword_index(index, label)
+    changed = {labels: after[labels] - before.get(labels, 0) for labels in after if after[labels] != before.get(labels, 0)}
+    assert changed == {("odd: name keyword",): 1}
+
+
+def test_record_response_counts_error_codes():
+    before = ERRORS_TOTAL.value("EMPTY_INPUT")
+    record_response(error_response("EMPTY_INPUT", "Input text is empty", "M-1"))
+    assert ERRORS_TOTAL.value("EMPTY_INPUT") == before + 1
+
+
+def test_executor_records_engine_time():
+    before = ENGINE_SECONDS.count()
+    executor = ScoringExecutor(kind="thread", workers=1)
+    try:
+        asyncio.run(executor.run(analyze_text, "scam", "MET-001"))
+    finally:
+        executor.shutdown()
+    assert ENGINE_SECONDS.count() == before + 1
+
+
+def test_labelled_gauge_renders_each_series():
+    registry = MetricsRegistry()
+    registry.gauge("test_info", "test", lambda: {("b", "2"): 1, ("a", "1"): 1}, ["worker", "version"])
+    text = registry.render()
+    assert "# TYPE test_info gauge" in text
+    assert 'test_info{worker="a",version="1"} 1\ntest_info{worker="b",version="2"} 1' in text
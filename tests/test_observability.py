@@ -0,0 +1,123 @@
+"""
+Observability Tests
+Validates the non-blocking JSON log pipeline
+"""
+import io
+import json
+import logging
+import os
+import threading
+
+import pytest
+
+from app.observability import AsyncJsonHandler, JsonFormatter
+
+
+def make_record(message: str, correlation_id: str = "OBS-001") -> logging.LogRecord:
+    record = logging.LogRecord("app.engine", logging.INFO, __file__, 1, message, None, None)
+    record.correlation_id = correlation_id
+    record.event_type = "analysis_start"
+    return record
+
+
+class BlockingStream(io.StringIO):
+    """Stream whose first write blocks until released."""
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, data):
+        self.release.wait(timeout=5)
+        return super().write(data)
+
+
+def test_records_written_as_json_in_order():
+    stream = io.StringIO()
+    handler = AsyncJsonHandler(stream=stream, batch_size=4, flush_interval=0.01)
+    handler.setFormatter(JsonFormatter())
+
+    for i in range(10):
+        handler.handle(make_record(f"record {i}"))
+    handler.flush()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["message"] for line in lines] == [f"record {i}" for i in range(10)]
+    assert all(line["correlation_id"] == "OBS-001" for line in lines)
+    assert handler.stats()["written"] == 10
+    handler.close()
+
+
+def test_full_queue_drops_and_counts_instead_of_blocking():
+    stream = BlockingStream()
+    handler = AsyncJsonHandler(stream=stream, capacity=5, batch_size=1, flush_interval=0.01)
+    handler.setFormatter(JsonFormatter())
+
+    # Writer holds one record while blocked; the queue takes five more
+    for i in range(20):
+        handler.handle(make_record(f"record {i}"))
+
+    stats = handler.stats()
+    assert stats["dropped"] > 0
+    assert stats["queued"] <= stats["capacity"]
+
+    stream.release.set()
+    handler.close()
+    assert handler.written + handler.dropped == 20
+
+
+def test_close_drains_queued_records():
+    stream = io.StringIO()
+    handler = AsyncJsonHandler(stream=stream, batch_size=1000, flush_interval=10.0)
+    handler.setFormatter(JsonFormatter())
+
+    for i in range(50):
+        handler.handle(make_record(f"record {i}"))
+    handler.close()
+
+    assert len(stream.getvalue().splitlines()) == 50
+
+    # Records arriving after shutdown are counted, not silently lost
+    handler.handle(make_record("late"))
+    assert handler.dropped == 1
+
+
+def test_record_frozen_at_emit_time():
+    stream = BlockingStream()
+    handler = AsyncJsonHandler(stream=stream, batch_size=1, flush_interval=0.01)
+    handler.setFormatter(JsonFormatter())
+    # The writer is held in its first write, so the next record waits queued
+    handler.handle(make_record("first"))
+
+    hits = ["kill"]
+    details = {"keywords": hits, "score": 0.2}
+    record = logging.LogRecord("app.engine", logging.INFO, __file__, 1, "hits=%s", (hits,), None)
+    record.details = details
+    handler.handle(record)
+    # The caller keeps using its objects before the writer formats the line
+    hits.append("scam")
+    details["score"] = 1.0
+    stream.release.set()
+    handler.close()
+
+    line = json.loads(stream.getvalue().splitlines()[1])
+    assert line["message"] == "hits=['kill']"
+    assert line["details"] == {"keywords": ["kill"], "score": 0.2}
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_forked_child_gets_working_writer(tmp_path):
+    path = tmp_path / "child.log"
+    with open(path, "w") as stream:
+        handler = AsyncJsonHandler(stream=stream, flush_interval=0.01)
+        handler.setFormatter(JsonFormatter())
+
+        pid = os.fork()
+        if pid == 0:
+            handler.handle(make_record("from child", correlation_id="CHILD"))
+            handler.flush()
+            os._exit(0)
+        os.waitpid(pid, 0)
+        handler.close()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["correlation_id"] for line in lines] == ["CHILD"]
@@ -0,0 +1,184 @@
+"""
+Policy Scoring Tests
+Policy-weighted scoring, promotion through the versioned registry and replay
+"""
+import asyncio
+import json
+import logging
+
+import pytest
+
+from app import engine
+from app.batch_kernel import score_texts
+from app.engine import KEYWORD_WEIGHT, RISK_KEYWORDS, analyze_document, analyze_text, analyze_texts, get_active_policy, get_active_policy_state, promote_policy
+from app.policy import BASELINE_POLICY_VERSION, PolicyConflict, PolicyRegistry, baseline_policy, policy_state_from_dict
+from app.scoring_executor import ScoringExecutor
+from app.session import ChatSession, SessionStateError
+from app.tenant_index import TenantIndexCache
+from policy_engine.learning_loop import learning_step
+from policy_engine.policy_state import PolicyState
+
+TEXTS = ["hello world", "kill", "kill attack bomb shoot", "scam and kill", "phishing scam fraud money laundering"]
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(engine, "POLICY_REGISTRY", PolicyRegistry(baseline_policy(RISK_KEYWORDS, KEYWORD_WEIGHT)))
+
+
+def state(version, weights, multiplier=1.0):
+    return PolicyState(policy_version=version, category_weights=weights, confidence_multiplier=multiplier, update_count=version)
+
+
+def test_baseline_policy_scores_like_keyword_weight():
+    baseline = [analyze_text(text) for text in TEXTS]
+    promote_policy(state(1, {"violence": KEYWORD_WEIGHT, "fraud": KEYWORD_WEIGHT}))
+    assert [analyze_text(text) for text in TEXTS] == baseline
+
+
+def test_category_weights_and_confidence_multiplier_applied():
+    promote_policy(state(1, {"violence": 0.5}, multiplier=0.5))
+
+    violence = analyze_text("kill")
+    assert violence["risk_score"] == 0.5
+    assert violence["risk_category"] == "MEDIUM"
+    assert violence["confidence_score"] == 0.25
+    # Categories the policy does not name keep the default weight
+    assert analyze_text("scam")["risk_score"] == 0.2
+
+
+def test_weight_accumulates_per_hit_and_respects_cap():
+    promote_policy(state(1, {"violence": 0.25}))
+    assert analyze_text("kill attack")["risk_score"] == 0.5
+    assert analyze_text("kill attack shoot stab")["risk_score"] == 0.6
+
+
+def test_promotion_rules():
+    promote_policy(state(1, {"violence": 0.3}))
+    with pytest.raises(ValueError):
+        promote_policy(state(1, {"violence": 0.4}))
+    with pytest.raises(PolicyConflict):
+        promote_policy(state(2, {"violence": 0.4}), expected_version=0)
+    assert promote_policy(state(2, {"violence": 0.4}), expected_version=1).version == 2
+    assert engine.POLICY_REGISTRY.get(1).weights == {"violence": 0.3}
+
+
+@pytest.mark.parametrize("bad", [
+    state(-1, {}),
+    state(1, {"violence": -0.1}),
+    state(1, {"violence": float("nan")}),
+    state(1, {"violence": "high"}),
+    state(1, [], multiplier=1.0),
+    state(1, {}, multiplier=-1.0),
+    state(1, {"violence": 1.01}),
+    state(1, {"violence": 1e9}),
+    state(1, {"no_such_category": 0.5}),
+])
+def test_invalid_policy_rejected(bad):
+    with pytest.raises(ValueError):
+        promote_policy(bad)
+    assert get_active_policy().version == BASELINE_POLICY_VERSION
+
+
+def test_tenant_categories_may_be_weighted(monkeypatch):
+    monkeypatch.setattr(engine, "_tenant_indexes", TenantIndexCache({"acme": {"pharma": ["pill mill"]}}))
+    assert promote_policy(state(1, {"pharma": 1.0})).weight("pharma") == 1.0
+
+
+def test_policy_state_from_dict():
+    policy = policy_state_from_dict({"policy_version": 3, "category_weights": {"fraud": 0.4}})
+    assert policy == PolicyState(policy_version=3, category_weights={"fraud": 0.4}, confidence_multiplier=1.0, update_count=0)
+    with pytest.raises(ValueError):
+        policy_state_from_dict({"category_weights": {}})
+
+
+def test_baseline_state_names_every_category_at_keyword_weight():
+    exported = get_active_policy_state().category_weights
+    assert exported == {category: KEYWORD_WEIGHT for category in RISK_KEYWORDS}
+
+
+@pytest.mark.parametrize("predicted, actual, weight", [
+    ("HIGH", "RISK_CONFIRMED", 0.25),  # positive reward: one step up from 0.2
+    ("HIGH", "SAFE", 0.15),            # negative reward: one step down
+])
+def test_learning_step_result_promoted(predicted, actual, weight):
+    current = get_active_policy_state()
+    new_policy, reward = learning_step(current, predicted, actual, "fraud")
+    promoted = promote_policy(new_policy, expected_version=current.policy_version)
+
+    assert promoted.version == current.policy_version + 1
+    assert promoted.weight("fraud") == pytest.approx(weight)
+    assert promoted.weight("violence") == KEYWORD_WEIGHT
+    assert analyze_text("scam")["risk_score"] == weight
+    assert analyze_text("scam fraud")["risk_score"] == round(2 * weight, 2)
+
+
+def test_request_scored_with_policy_it_started_with():
+    pinned = get_active_policy()
+    promote_policy(state(1, {"violence": 0.5}))
+    assert analyze_text("kill", policy=pinned)["risk_score"] == 0.2
+    assert analyze_texts(["kill"], policy=pinned)[0]["risk_score"] == 0.2
+    assert analyze_document("kill", policy=pinned)["risk_score"] == 0.2
+
+
+def test_batch_kernel_and_document_follow_policy():
+    promote_policy(state(1, {"violence": 0.15, "fraud": 0.35}, multiplier=0.9))
+    assert score_texts(TEXTS) == analyze_texts(TEXTS)
+    for text in TEXTS:
+        document = analyze_document(text)
+        scored = analyze_text(text)
+        assert (document["risk_score"], document["confidence_score"]) == (scored["risk_score"], scored["confidence_score"])
+
+
+def test_session_pinned_to_policy():
+    session = ChatSession()
+    promote_policy(state(1, {"violence": 0.5}))
+    assert session.append("kill")["risk_score"] == 0.2
+
+    resumed = ChatSession.from_dict(session.to_dict())
+    assert resumed.result()["risk_score"] == 0.2
+    assert ChatSession().append("kill")["risk_score"] == 0.5
+
+    stale = dict(session.to_dict(), policy_version=99)
+    del stale["policy"]
+    with pytest.raises(SessionStateError):
+        ChatSession.from_dict(stale)
+
+
+def test_session_resumes_after_registry_loses_its_policy(monkeypatch):
+    promote_policy(state(1, {"violence": 0.5}, multiplier=0.5))
+    session = ChatSession()
+    session.append("kill")
+    saved = json.loads(json.dumps(session.to_dict()))
+
+    # Another worker, or a restart: only the baseline is registered
+    monkeypatch.setattr(engine, "POLICY_REGISTRY", PolicyRegistry(baseline_policy(RISK_KEYWORDS, KEYWORD_WEIGHT)))
+    resumed = ChatSession.from_dict(saved)
+    assert resumed.policy.version == 1
+    # violence 0.5 + fraud 0.2, where the baseline would give 0.4
+    result = resumed.append(" and scam")
+    assert result["risk_score"] == 0.7
+    assert result == session.append(" and scam")
+    assert ChatSession().append("kill and scam")["risk_score"] == 0.4
+
+
+def test_logs_record_policy_for_replay(caplog):
+    promote_policy(state(1, {"violence": 0.5}))
+    with caplog.at_level(logging.INFO, logger="app.engine"):
+        response = analyze_text("kill", "POLICY-001")
+
+    complete = [r for r in caplog.records if getattr(r, "event_type", None) == "analysis_complete"]
+    version = complete[-1].details["policy_version"]
+    assert version == 1
+    # Replaying with the logged version reproduces the response
+    assert analyze_text("kill", "POLICY-001", policy=engine.POLICY_REGISTRY.get(version)) == response
+
+
+def test_process_workers_score_with_passed_policy():
+    policy = promote_policy(state(1, {"violence": 0.5}))
+    executor = ScoringExecutor(kind="process", workers=1)
+    try:
+        response = asyncio.run(executor.run(analyze_text, "kill", "POLICY-002", None, policy))
+    finally:
+        executor.shutdown()
+    assert response["risk_score"] == 0.5
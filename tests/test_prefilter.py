@@ -0,0 +1,65 @@
+"""
+Prefilter Tests
+The clean-text prefilter may only reject texts the full scan finds nothing in
+"""
+import random
+
+from app.engine import analyze_text, analyze_bytes, RISK_KEYWORDS, KEYWORD_INDEX
+from app.keyword_index import KeywordIndex
+from app.metrics import PREFILTER_TOTAL
+
+
+def generated_corpus(seed: int, size: int):
+    """Mostly clean text plus near misses (substrings, prefixes, glued words)."""
+    keywords = [kw for kws in RISK_KEYWORDS.values() for kw in kws]
+    near_misses = ["skill", "killer", "scams", "hacker", "gunner", "selfie", "nope", "iwill"]
+    partial_phrases = ["al", "i", "go", "no", "you", "will", "self", "shut"]
+    clean = ["hello", "meeting", "weather", "thanks", "é", "İ", "_", "42", "café"]
+    separators = [" ", "", ".", "\n", "-", "_"]
+    rng = random.Random(seed)
+    for _ in range(size):
+        pool = clean + near_misses
+        if rng.random() < 0.2:
+            pool = pool + partial_phrases
+        if rng.random() < 0.2:
+            pool = pool + keywords
+        words = [rng.choice(pool) for _ in range(rng.randint(0, 30))]
+        yield "".join(word + rng.choice(separators) for word in words)
+
+
+def test_prefilter_never_drops_a_match():
+    rejected = 0
+    for text in generated_corpus(20260316, 20000):
+        text = text.lower()
+        if not KEYWORD_INDEX.may_match(text):
+            rejected += 1
+            assert KEYWORD_INDEX.find(text) == [], text
+    # The corpus must actually exercise the reject path
+    assert rejected > 5000
+
+
+def test_ascii_prefilter_never_drops_a_match():
+    for text in generated_corpus(20260317, 5000):
+        data = text.upper().encode("utf-8")
+        if data.isascii() and not KEYWORD_INDEX.may_match_ascii(data):
+            assert KEYWORD_INDEX.find_ascii(data) == [], text
+
+
+def test_unanchored_keywords_always_pass():
+    index = KeywordIndex.from_table({"odd": ["-x-"], "plain": ["scam"]})
+    assert index.may_match("nothing here")
+    assert index.may_match_ascii(b"nothing here")
+
+
+def test_prefilter_counters():
+    rejected = PREFILTER_TOTAL.value("rejected")
+    passed = PREFILTER_TOTAL.value("passed")
+
+    assert analyze_text("see them at the meeting")["trigger_reasons"] == []
+    assert analyze_bytes(b"SEE THEM AT THE MEETING")["trigger_reasons"] == []
+    assert analyze_text("skill issue")["trigger_reasons"] == []
+    assert analyze_text("this is a scam")["risk_score"] == 0.2
+
+    # Only the scam text reaches the full scan
+    assert PREFILTER_TOTAL.value("rejected") == rejected + 3
+    assert PREFILTER_TOTAL.value("passed") == passed + 1
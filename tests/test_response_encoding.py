@@ -0,0 +1,86 @@
+"""
+Response Encoding Tests
+The single-validation fast path must emit the bytes the response_model path did
+"""
+import json
+
+import pytest
+
+from app import response_encoding
+from app.contract_enforcement import contract_error_response, document_contract_error_response, validate_output_contract
+from app.engine import analyze_document, analyze_text, analyze_texts
+from app.response_encoding import (
+    BATCH_OUTPUT_LAYOUT, DOCUMENT_OUTPUT_LAYOUT, OUTPUT_LAYOUT, dumps, encode_response, project
+)
+
+# Same inputs as replay_harness.py
+REPLAY_CASES = [
+    "This is perfectly safe content.", "kill", "scam", "kill murder attack scam",
+    "A" * 5000, "A" * 6000, "", "   \t\n   ", "SCAM KILL ATTACK", "café résumé naïve",
+    "kill " * 30, "!@#$% ^&*() kill <script>", None, 42, "kill\nmurder\nattack",
+]
+
+
+def stdlib_render(content):
+    # starlette JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def test_replay_corpus_byte_identical_to_response_model_path():
+    schemas = pytest.importorskip("app.schemas")
+    for text in REPLAY_CASES:
+        response = analyze_text(text)
+        validate_output_contract(response)
+        assert encode_response(response) == stdlib_render(schemas.OutputSchema(**response).dict())
+
+    document = analyze_document("kill " * 2000)
+    assert encode_response(document, DOCUMENT_OUTPUT_LAYOUT) == stdlib_render(schemas.DocumentOutputSchema(**document).dict())
+    batch = {"results": analyze_texts(["kill", "scam", ""]), "errors": None}
+    assert encode_response(batch, BATCH_OUTPUT_LAYOUT) == stdlib_render(schemas.BatchOutputSchema(**batch).dict())
+
+
+def test_layouts_follow_schema_field_order():
+    schemas = pytest.importorskip("app.schemas")
+    for layout, model in ((OUTPUT_LAYOUT, schemas.OutputSchema), (DOCUMENT_OUTPUT_LAYOUT, schemas.DocumentOutputSchema),
+                          (BATCH_OUTPUT_LAYOUT, schemas.BatchOutputSchema)):
+        assert [field for field, _ in layout] == list(model.__fields__)
+
+
+def test_body_in_schema_order_with_coercions():
+    response = analyze_text("kill")
+    response["risk_score"] = 1
+    response["unexpected"] = "dropped"
+    body = json.loads(encode_response(response))
+    assert list(body) == [field for field, _ in OUTPUT_LAYOUT]
+    assert body["risk_score"] == 1.0 and isinstance(body["risk_score"], float)
+    assert b'"risk_score":1.0' in encode_response(response)
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    """Runs a test once with orjson (the fast path) and once with the stdlib fallback."""
+    if request.param == "orjson":
+        assert response_encoding.orjson is pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(response_encoding, "orjson", None)
+    return request.param
+
+
+@pytest.mark.parametrize("response", [
+    contract_error_response("INVALID_TYPE", "Input must be a string"),
+    contract_error_response("INTERNAL_ERROR", 'quote " backslash \\ control \x00\x1f\x7f sep   emoji 😀 é'),
+])
+def test_encoder_matches_stdlib_json(encoder, response):
+    projected = project(response, OUTPUT_LAYOUT)
+    assert dumps(projected) == stdlib_render(projected)
+    assert encode_response(response) == stdlib_render(projected)
+
+
+def test_replay_corpus_encoder_matches_stdlib_json(encoder):
+    for text in REPLAY_CASES:
+        projected = project(analyze_text(text), OUTPUT_LAYOUT)
+        assert dumps(projected) == stdlib_render(projected)
+    document = project(analyze_document("scam " * 3000), DOCUMENT_OUTPUT_LAYOUT)
+    assert dumps(document) == stdlib_render(document)
+    error = project(document_contract_error_response("EMPTY_INPUT", "Text is empty"), DOCUMENT_OUTPUT_LAYOUT)
+    assert dumps(error) == stdlib_render(error)
@@ -0,0 +1,99 @@
+"""
+Result Cache Tests
+The cache must be invisible in engine output and bounded in size
+"""
+import hashlib
+import json
+
+import pytest
+
+from app.engine import analyze_text, configure_result_cache, KEYWORD_INDEX
+from app.result_cache import ResultCache
+
+# Same inputs and semantic hash as replay_harness.py
+REPLAY_CASES = [
+    "This is perfectly safe content.", "kill", "scam", "kill murder attack scam",
+    "A" * 5000, "A" * 6000, "", "   \t\n   ", "SCAM KILL ATTACK", "café résumé naïve",
+    "kill " * 30, "!@#$% ^&*() kill <script>", None, 42, "kill\nmurder\nattack",
+]
+
+
+def semantic_hash(response):
+    if response.get("errors"):
+        core = {"risk_score": response["risk_score"], "risk_category": response["risk_category"],
+                "error_code": response["errors"].get("error_code")}
+    else:
+        core = {f: response[f] for f in ["risk_score", "confidence_score", "risk_category",
+                                          "trigger_reasons", "processed_length"]}
+        core["trigger_reasons"] = sorted(core["trigger_reasons"])
+    return hashlib.sha256(json.dumps(core, sort_keys=True).encode()).hexdigest()
+
+
+@pytest.fixture
+def cache():
+    cache = ResultCache(max_entries=64)
+    configure_result_cache(cache)
+    yield cache
+    configure_result_cache(None)
+
+
+def test_cache_does_not_change_replay_hashes(cache):
+    configure_result_cache(None)
+    uncached = [analyze_text(text) for text in REPLAY_CASES]
+    configure_result_cache(cache)
+
+    for _ in range(3):
+        cached = [analyze_text(text) for text in REPLAY_CASES]
+        assert cached == uncached
+        assert [semantic_hash(r) for r in cached] == [semantic_hash(r) for r in uncached]
+    assert cache.stats()["hits"] > 0
+
+
+def test_normalized_text_shares_entry(cache):
+    analyze_text("Kill")
+    analyze_text("  KILL  ")
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_responses_are_independent_copies(cache):
+    first = analyze_text("kill scam")
+    first["trigger_reasons"].append("tampered")
+    assert "tampered" not in analyze_text("kill scam")["trigger_reasons"]
+
+
+def test_lru_eviction():
+    cache = ResultCache(max_entries=2)
+    a, b, c = (ResultCache.key(t, "v1") for t in ("a", "b", "c"))
+    cache.put(a, (1,))
+    cache.put(b, (2,))
+    assert cache.get(a) == (1,)      # a becomes most recently used
+    cache.put(c, (3,))               # evicts b
+    assert cache.get(b) is None
+    assert cache.get(a) == (1,)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.result_cache.time.monotonic", lambda: now[0])
+    cache = ResultCache(max_entries=8, ttl_seconds=5.0)
+    key = ResultCache.key("kill", "v1")
+    cache.put(key, (1,))
+    now[0] += 4.0
+    assert cache.get(key) == (1,)
+    now[0] += 2.0
+    assert cache.get(key) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_oversized_entries_not_stored():
+    cache = ResultCache(max_entries=8, max_entry_bytes=64)
+    key = ResultCache.key("many hits", "v1")
+    assert cache.put(key, tuple(range(100))) is False
+    assert cache.get(key) is None
+    assert cache.stats()["oversized"] == 1
+
+
+def test_key_includes_table_version():
+    assert ResultCache.key("kill", KEYWORD_INDEX.version) != ResultCache.key("kill", "other-version")
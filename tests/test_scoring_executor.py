@@ -0,0 +1,129 @@
+"""
+Scoring Executor Tests
+Offloaded scoring, admission control and wait-time metrics
+"""
+import asyncio
+import os
+import signal
+import threading
+
+import pytest
+
+from app.engine import analyze_text, configure_result_cache
+from app.metrics import CATEGORY_MATCHES_TOTAL, PREFILTER_TOTAL
+from app.result_cache import ResultCache
+from app.scoring_executor import ExecutorOverloaded, ScoringExecutor
+
+
+def test_thread_executor_returns_engine_result():
+    executor = ScoringExecutor(kind="thread", workers=2)
+    try:
+        result = asyncio.run(executor.run(analyze_text, "kill and scam", "EXEC-001"))
+        assert result == analyze_text("kill and scam")
+        assert executor.stats()["completed"] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_process_executor_returns_engine_result():
+    executor = ScoringExecutor(kind="process", workers=1)
+    try:
+        result = asyncio.run(executor.run(analyze_text, "scam", "EXEC-002"))
+        assert result == analyze_text("scam")
+    finally:
+        executor.shutdown()
+
+
+def worker_pid():
+    return os.getpid()
+
+
+def test_process_pool_replaced_after_worker_dies():
+    executor = ScoringExecutor(kind="process", workers=1)
+
+    async def scenario():
+        pid = await executor.run(worker_pid)
+        os.kill(pid, signal.SIGKILL)
+        result = await executor.run(analyze_text, "scam", "EXEC-003")
+        return pid, result, await executor.run(worker_pid)
+
+    try:
+        dead, result, pid = asyncio.run(scenario())
+        assert result == analyze_text("scam")
+        assert pid != dead
+        assert executor.stats()["restarts"] == 1
+        assert executor.stats()["completed"] == 3
+        assert list(executor.worker_index_versions) == [str(pid)]
+    finally:
+        executor.shutdown()
+
+
+def test_process_worker_counters_reach_parent():
+    configure_result_cache(ResultCache(max_entries=16))
+    executor = ScoringExecutor(kind="process", workers=1)
+    before = {result: PREFILTER_TOTAL.value(result) for result in ("passed", "rejected")}
+    violence = CATEGORY_MATCHES_TOTAL.value("violence")
+
+    async def scenario():
+        for text in ("kill", "kill", "hello"):
+            await executor.run(analyze_text, text, "EXEC-004")
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+        configure_result_cache(None)
+
+    # Scans ran in the worker; the parent only saw their deltas
+    assert PREFILTER_TOTAL.value("passed") - before["passed"] == 1
+    assert PREFILTER_TOTAL.value("rejected") - before["rejected"] == 1
+    assert CATEGORY_MATCHES_TOTAL.value("violence") - violence == 2
+    assert executor.worker_stats("result_cache") == {"hits": 1, "misses": 2}
+    assert executor.worker_stats("single_flight") == {"leaders": 2}
+
+
+def test_thread_executor_reports_no_worker_counters():
+    executor = ScoringExecutor(kind="thread", workers=1)
+    try:
+        asyncio.run(executor.run(analyze_text, "kill", "EXEC-005"))
+        assert executor.worker_stats("single_flight") is None
+    finally:
+        executor.shutdown()
+
+
+def test_admission_limit_rejects_fast():
+    executor = ScoringExecutor(kind="thread", workers=1, max_pending=2)
+    release = threading.Event()
+
+    def blocked(text):
+        release.wait(timeout=5)
+        return analyze_text(text)
+
+    async def scenario():
+        admitted = [asyncio.ensure_future(executor.run(blocked, "kill")) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert executor.stats()["in_flight"] == 2
+        assert executor.stats()["queue_depth"] == 1
+
+        with pytest.raises(ExecutorOverloaded):
+            await executor.run(blocked, "kill")
+
+        release.set()
+        return await asyncio.gather(*admitted)
+
+    try:
+        results = asyncio.run(scenario())
+        assert all(r["risk_category"] == "LOW" for r in results)
+        stats = executor.stats()
+        assert stats["rejected"] == 1
+        assert stats["completed"] == 2
+        assert stats["in_flight"] == 0
+        # The second call waited behind the first for the single worker
+        assert stats["wait_ms_max"] > 0
+    finally:
+        executor.shutdown()
+
+
+def test_invalid_kind_rejected():
+    with pytest.raises(ValueError):
+        ScoringExecutor(kind="fiber")
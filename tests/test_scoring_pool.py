@@ -0,0 +1,60 @@
+"""
+Scoring Pool Tests
+Parallel scoring must return exactly what the engine returns, in order
+"""
+import os
+
+import pytest
+
+from app.engine import analyze_text, analyze_texts
+from app.scoring_pool import ScoringPool
+
+POISON = "__crash_worker__"
+
+
+def crash_on_poison(texts):
+    """Scorer that kills its worker process when it sees the poison text."""
+    if POISON in texts:
+        os._exit(1)
+    return analyze_texts(texts)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with ScoringPool(processes=2, chunk_size=7, max_pending_chunks=3) as pool:
+        yield pool
+
+
+def test_results_match_engine_in_input_order(pool):
+    texts = [f"message {i} scam" if i % 3 == 0 else f"kill {i}" for i in range(100)]
+    texts += ["", None, 42, "A" * 6000]
+    assert pool.map(texts) == [analyze_text(text) for text in texts]
+
+
+def test_imap_consumes_input_lazily(pool):
+    consumed = []
+
+    def source():
+        for i in range(1000):
+            consumed.append(i)
+            yield "scam"
+
+    results = pool.imap(source())
+    next(results)
+    # Only the bounded window of chunks has been pulled from the source
+    assert len(consumed) <= pool.chunk_size * pool.max_pending_chunks
+
+
+def test_worker_crash_yields_internal_error_for_affected_item_only():
+    texts = ["kill", "scam", POISON, "hello"] * 3
+    with ScoringPool(processes=2, chunk_size=3, scorer=crash_on_poison) as pool:
+        results = pool.map(texts)
+        assert pool.restarts > 0
+
+    assert len(results) == len(texts)
+    for text, result in zip(texts, results):
+        if text == POISON:
+            assert result["errors"]["error_code"] == "INTERNAL_ERROR"
+            assert result["safety_metadata"]["authority"] == "NONE"
+        else:
+            assert result == analyze_text(text)
@@ -0,0 +1,79 @@
+"""
+Service Error Tests
+Overload and unknown tenants are reported outside the sealed v3 body
+"""
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.binary_protocol import MSGPACK_MEDIA_TYPE, packb, unpackb
+from app.contract_enforcement import VALID_BATCH_ERROR_CODES, VALID_ERROR_CODES
+from app.scoring_executor import ExecutorOverloaded
+
+UNKNOWN_TENANT = {"errors": {"error_code": "UNKNOWN_TENANT", "message": "Unknown tenant"}}
+OVERLOADED = {"errors": {"error_code": "SERVICE_OVERLOADED", "message": "Scoring capacity exhausted; retry later"}}
+
+
+@pytest.fixture
+def overloaded(monkeypatch):
+    async def run(*args, **kwargs):
+        raise ExecutorOverloaded(4)
+
+    monkeypatch.setattr(main.scoring_executor, "run", run)
+    return TestClient(main.app)
+
+
+REQUESTS = [
+    ("/analyze", {"text": "kill"}),
+    ("/analyze/batch", {"items": [{"text": "kill"}]}),
+    ("/analyze/document", {"text": "kill"}),
+]
+
+
+def test_service_errors_are_not_v3_error_codes():
+    assert {"SERVICE_OVERLOADED", "UNKNOWN_TENANT"}.isdisjoint(VALID_ERROR_CODES | VALID_BATCH_ERROR_CODES)
+
+
+@pytest.mark.parametrize("path, body", REQUESTS)
+def test_overload_returns_503_service_error(overloaded, path, body):
+    response = overloaded.post(path, json=body)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json() == OVERLOADED
+
+
+def test_overload_over_msgpack(overloaded):
+    response = overloaded.post("/analyze/msgpack", content=packb({"text": "kill"}), headers={"Content-Type": MSGPACK_MEDIA_TYPE})
+    assert response.status_code == 503
+    assert response.headers["Content-Type"] == MSGPACK_MEDIA_TYPE
+    assert unpackb(response.content) == OVERLOADED
+
+
+@pytest.mark.parametrize("path, body", REQUESTS + [("/analyze/text", "kill")])
+def test_unknown_tenant_returns_404_service_error(path, body):
+    client = TestClient(main.app)
+    headers = {"X-Tenant-Id": "initech"}
+    if isinstance(body, str):
+        response = client.post(path, content=body, headers=dict(headers, **{"Content-Type": "text/plain"}))
+    else:
+        response = client.post(path, json=body, headers=headers)
+    assert response.status_code == 404
+    assert response.json() == UNKNOWN_TENANT
+
+
+def test_unknown_tenant_over_msgpack():
+    client = TestClient(main.app)
+    response = client.post("/analyze/msgpack", content=packb({"text": "kill"}),
+                           headers={"Content-Type": MSGPACK_MEDIA_TYPE, "X-Tenant-Id": "initech"})
+    assert response.status_code == 404
+    assert unpackb(response.content) == UNKNOWN_TENANT
+    assert client.get("/analyze/msgpack/keywords", headers={"X-Tenant-Id": "initech"}).status_code == 404
+
+
+def test_unknown_tenant_stream_closed():
+    with TestClient(main.app).websocket_connect("/analyze/stream", headers={"X-Tenant-Id": "initech"}) as websocket:
+        assert websocket.receive_json() == dict(UNKNOWN_TENANT, type="rejected", id=None)
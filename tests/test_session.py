@@ -0,0 +1,126 @@
+"""
+Chat Session Tests
+Incremental scoring must equal analyze_text of the whole thread
+"""
+import json
+import random
+
+import pytest
+
+from app.engine import analyze_text, RISK_KEYWORDS, MAX_TEXT_LENGTH
+from app.session import ChatSession, SessionStateError
+
+
+def split_randomly(text, rng):
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text), rng.randint(1, 12))))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+def assert_matches_full_rescore(deltas):
+    session = ChatSession("S-TEST")
+    full = ""
+    for delta in deltas:
+        full += delta
+        result = session.append(delta)
+        assert result == analyze_text(full, "S-TEST"), (deltas, full)
+
+
+def test_single_delta_equals_analyze_text():
+    assert_matches_full_rescore(["I will kill you, scam artist"])
+
+
+def test_keyword_split_across_deltas():
+    assert_matches_full_rescore(["money laun", "dering and ki", "ll"])
+
+
+def test_match_withdrawn_when_word_continues():
+    # "kill" matches until the next delta turns it into "killer"
+    session = ChatSession()
+    assert session.append("kill")["risk_score"] == 0.2
+    assert session.append("er")["trigger_reasons"] == []
+
+
+def test_whitespace_handling_matches_engine():
+    assert_matches_full_rescore(["   ", "  scam  ", "\n", " ", "fraud "])
+    assert ChatSession().append("   ")["errors"]["error_code"] == "EMPTY_INPUT"
+
+
+def test_context_sensitive_lowercase():
+    # Final sigma lowercases differently once the word continues
+    assert_matches_full_rescore(["ΟΔΟΣ", "ΑΒ kill", "İ SCAM"])
+
+
+def test_truncation_matches_engine():
+    assert_matches_full_rescore(["a " * (MAX_TEXT_LENGTH // 2 - 2), "kill ", "      ", "scam"])
+    assert_matches_full_rescore(["x" * (MAX_TEXT_LENGTH - 3), "kill", " bomb"])
+
+
+def test_differential_random_threads():
+    keywords = [kw for kws in RISK_KEYWORDS.values() for kw in kws]
+    filler = ["the", "skill", "killer", "Σ", "İ", "MYSELF", "over", "al"]
+    rng = random.Random(20260313)
+    for _ in range(300):
+        words = [rng.choice(keywords + filler) for _ in range(rng.randint(0, 40))]
+        text = "".join(word + rng.choice([" ", "", ".", "\n", "  "]) for word in words)
+        assert_matches_full_rescore(split_randomly(text, rng))
+
+
+def test_serialized_session_resumes():
+    rng = random.Random(7)
+    text = "you are dead. I will kill you, scammer. money laundering and crypto scam " * 3
+    deltas = split_randomly(text, rng)
+
+    session = ChatSession("S-RESUME")
+    full = ""
+    for delta in deltas:
+        full += delta
+        state = json.loads(json.dumps(session.to_dict()))
+        session = ChatSession.from_dict(state)
+        assert session.append(delta) == analyze_text(full)
+
+
+def test_resume_refuses_other_index_version():
+    state = ChatSession().to_dict()
+    state["index_version"] = "0" * 16
+    with pytest.raises(SessionStateError):
+        ChatSession.from_dict(state)
+
+
+def test_tail_stays_bounded():
+    session = ChatSession()
+    for _ in range(100):
+        session.append("just chatting about the weather today ")
+    assert len(session.to_dict()["tail"]) < 100
+
+
+def test_trailing_whitespace_across_deltas():
+    assert_matches_full_rescore(["ʰ", "   "])
+    assert_matches_full_rescore(["kill" + " " * 20, " " * 30])
+    assert_matches_full_rescore(["." + " " * 21])
+
+
+def test_carry_stays_bounded_without_whitespace():
+    # Each append must not rework the whole unbroken word
+    session = ChatSession()
+    for _ in range(2000):
+        session.append("a" * 100)
+    assert len(session.to_dict()["carry"]) == 1
+
+    # A run of case-ignorable characters cannot settle, so it is clipped at the limit
+    session = ChatSession()
+    full = ""
+    for _ in range(200):
+        full += "Σ" + "'" * 99
+        session.append("Σ" + "'" * 99)
+    assert len(session.to_dict()["carry"]) <= MAX_TEXT_LENGTH + 1
+    assert session.append("kill") == analyze_text(full + "kill")
+
+
+def test_differential_case_ignorable_runs():
+    atoms = ["Σ", "'", "́", "ʰ", ":", "a", "A", "kill", "İ", " ", ".", "ΑΣ", "-"]
+    rng = random.Random(20261017)
+    for _ in range(150):
+        text = "".join(rng.choice(atoms) * rng.choice([1, 1, 3, 50]) for _ in range(rng.randint(1, 40)))
+        if rng.random() < 0.3:
+            text = "x" * (MAX_TEXT_LENGTH - rng.randint(0, 40)) + text
+        assert_matches_full_rescore(split_randomly(text, rng))
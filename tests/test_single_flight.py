@@ -0,0 +1,162 @@
+"""
+Single Flight Tests
+Concurrent identical requests share one keyword scan, never a response or
+a correlation_id
+"""
+import logging
+import threading
+import time
+
+import pytest
+
+from app import engine
+from app.engine import analyze_text, configure_single_flight
+from app.single_flight import SingleFlight
+
+THREADS = 8
+
+
+class RecordCapture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        with self._lock:
+            self.records.append((getattr(record, "correlation_id", "UNKNOWN"), getattr(record, "event_type", None),
+                                 record.thread))
+
+
+@pytest.fixture
+def flights():
+    flights = SingleFlight()
+    configure_single_flight(flights)
+    yield flights
+    configure_single_flight(SingleFlight())
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def run_together(target, count=THREADS):
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_waiters_share_one_computation():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls, results = [], {}
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return (1, 2, 3)
+
+    threads = run_together(lambda i: results.__setitem__(i, flights.do("k", compute)))
+    wait_until(lambda: flights.coalesced == THREADS - 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert {value for value, _ in results.values()} == {(1, 2, 3)}
+    assert sorted(shared for _, shared in results.values()) == [False] + [True] * (THREADS - 1)
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "coalesced": THREADS - 1, "failures": 0,
+                               "coalescing_ratio": round((THREADS - 1) / THREADS, 4)}
+
+
+def test_error_reaches_every_waiter_and_key_is_forgotten():
+    flights = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def compute():
+        release.wait(5)
+        raise RuntimeError("scan failed")
+
+    def call(i):
+        try:
+            flights.do("k", compute)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = run_together(call, 3)
+    wait_until(lambda: flights.coalesced == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == ["scan failed"] * 3
+    assert flights.do("k", lambda: "fresh") == ("fresh", False)
+    assert flights.stats()["failures"] == 1 and flights.stats()["in_flight"] == 0
+
+
+def test_concurrent_identical_texts_scanned_once_without_id_bleed(flights, monkeypatch):
+    release = threading.Event()
+    scans = []
+    find_matches = engine._find_matches
+
+    def slow_find_matches(text, index):
+        scans.append(text)
+        release.wait(5)
+        return find_matches(text, index)
+
+    monkeypatch.setattr(engine, "_find_matches", slow_find_matches)
+    capture = RecordCapture()
+    root_logger = logging.getLogger()
+    root_logger.addHandler(capture)
+    root_logger.setLevel(logging.INFO)
+    results = {}
+    try:
+        # Same normalized text, written differently by each sender
+        texts = ["KILL murder scam", "  kill murder SCAM\n"]
+        threads = run_together(lambda i: results.__setitem__(
+            i, analyze_text(texts[i % 2], correlation_id=f"SPAM-{i}")))
+        wait_until(lambda: flights.coalesced == THREADS - 1)
+        release.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        root_logger.removeHandler(capture)
+
+    assert scans == ["kill murder scam"]
+    monkeypatch.undo()
+    expected = analyze_text("kill murder scam")
+    assert all(result == expected for result in results.values())
+    # Own copies: nothing is shared between responses
+    assert len({id(result["trigger_reasons"]) for result in results.values()}) == THREADS
+    results[0]["trigger_reasons"].clear()
+    assert results[1] == expected
+
+    # Every request logged its full sequence, on its own thread, under its own id only
+    records = [record for record in capture.records if record[0].startswith("SPAM-")]
+    for i in range(THREADS):
+        mine = [(event, thread) for cid, event, thread in records if cid == f"SPAM-{i}"]
+        events = [event for event, _ in mine]
+        assert events[:2] == ["analysis_start", "input_received"] and events[-1] == "analysis_complete"
+        assert events.count("keyword_detected") == 3
+        assert len({thread for _, thread in mine}) == 1
+    threads_by_id = {cid: thread for cid, _, thread in records}
+    assert len(set(threads_by_id.values())) == THREADS
+    assert {cid for cid, _, _ in capture.records} <= {f"SPAM-{i}" for i in range(THREADS)} | {"UNKNOWN"}
+
+
+def test_distinct_texts_not_coalesced(flights):
+    analyze_text("kill")
+    analyze_text("scam")
+    assert flights.stats()["coalesced"] == 0
+    assert flights.stats()["leaders"] == 2
+
+
+def test_disabled_coalescing_matches(flights):
+    coalesced = [analyze_text(text) for text in ["kill", "", None, "A" * 6000, "café kill"]]
+    configure_single_flight(None)
+    assert [analyze_text(text) for text in ["kill", "", None, "A" * 6000, "café kill"]] == coalesced
@@ -0,0 +1,232 @@
+"""
+Stream Tests
+Credit-based flow control, per-connection limits and result invariants of
+the streaming scoring channel
+"""
+import asyncio
+
+import pytest
+
+from app.contract_enforcement import ContractViolation, contract_error_response, validate_input_contract
+from app.engine import analyze_text
+from app.response_encoding import OUTPUT_LAYOUT, project
+from app.scoring_executor import ExecutorOverloaded
+from app.stream import StreamSession, stream_stats
+
+
+class Client:
+    """A connection driven from the test: feed() messages, read sent ones."""
+    def __init__(self):
+        self.inbox = asyncio.Queue()
+        self.sent = []
+        self.arrived = asyncio.Event()
+
+    async def send(self, message):
+        self.sent.append(message)
+        self.arrived.set()
+
+    async def messages(self):
+        while True:
+            message = await self.inbox.get()
+            if message is StopAsyncIteration:
+                return
+            yield message
+
+    def feed(self, *messages):
+        for message in messages:
+            self.inbox.put_nowait(message)
+
+    async def wait_for(self, count, kind="result"):
+        while len(self.of(kind)) < count:
+            self.arrived.clear()
+            await asyncio.wait_for(self.arrived.wait(), 5)
+
+    def of(self, kind):
+        return [message for message in self.sent if message["type"] == kind]
+
+
+async def score(request, correlation_id):
+    # Input violations become responses, as in app.main.score_request
+    try:
+        return analyze_text(validate_input_contract(request), correlation_id)
+    except ContractViolation as e:
+        return contract_error_response(e.code, e.message)
+
+
+def run_session(scenario, scorer=score, **limits):
+    async def main():
+        client = Client()
+        session = StreamSession(client.send, scorer, "TEST", **limits)
+        served = asyncio.ensure_future(session.run(client.messages()))
+        try:
+            await scenario(client, session)
+        finally:
+            client.feed(StopAsyncIteration)
+            await served
+        return client, session
+    return asyncio.run(main())
+
+
+def score_message(client_id, text="kill"):
+    return {"type": "score", "id": client_id, "text": text}
+
+
+def test_results_tagged_and_equal_to_analyze():
+    texts = {"a": "kill", "b": "hello world", "c": "scam fraud", "d": 42}
+
+    async def scenario(client, session):
+        client.feed(*(score_message(client_id, text) for client_id, text in texts.items()))
+        await client.wait_for(len(texts))
+
+    client, _ = run_session(scenario, credits=10)
+    results = {message["id"]: message["result"] for message in client.of("result")}
+    assert set(results) == set(texts)
+    for client_id, text in texts.items():
+        if isinstance(text, str):
+            assert results[client_id] == project(analyze_text(text), OUTPUT_LAYOUT)
+        assert results[client_id]["safety_metadata"] == {"is_decision": False, "authority": "NONE", "actionable": False}
+    assert results["d"]["errors"]["error_code"] == "INVALID_TYPE"
+
+
+def test_results_wait_for_credit():
+    async def scenario(client, session):
+        client.feed(*(score_message(str(i)) for i in range(5)))
+        await client.wait_for(2)
+        await asyncio.sleep(0.05)
+        assert len(client.of("result")) == 2 and session.credits == 0
+        client.feed({"type": "credit", "n": 3})
+        await client.wait_for(5)
+
+    client, session = run_session(scenario, credits=2)
+    assert sorted(message["id"] for message in client.of("result")) == ["0", "1", "2", "3", "4"]
+    assert session.snapshot()["pending"] == 0
+
+
+def test_slow_consumer_cannot_grow_buffer():
+    async def scenario(client, session):
+        client.feed(*(score_message(str(i)) for i in range(10)))
+        await client.wait_for(2, "rejected")
+        assert session.snapshot()["pending"] == 8
+        client.feed({"type": "credit", "n": 8})
+        await client.wait_for(8)
+        # The window frees up as results are delivered
+        client.feed(score_message("late"), {"type": "credit", "n": 1})
+        await client.wait_for(9)
+
+    client, _ = run_session(scenario, credits=0, max_in_flight=2, max_pending=8)
+    rejected = client.of("rejected")
+    assert [message["id"] for message in rejected] == ["8", "9"]
+    assert {message["errors"]["error_code"] for message in rejected} == {"STREAM_WINDOW_FULL"}
+    assert client.of("result")[-1]["id"] == "late"
+
+
+def test_concurrency_limit_per_connection():
+    peak = {"now": 0, "max": 0}
+
+    async def slow_score(request, correlation_id):
+        peak["now"] += 1
+        peak["max"] = max(peak["max"], peak["now"])
+        await asyncio.sleep(0.01)
+        peak["now"] -= 1
+        return await score(request, correlation_id)
+
+    async def scenario(client, session):
+        client.feed(*(score_message(str(i)) for i in range(12)))
+        await client.wait_for(12)
+
+    run_session(scenario, slow_score, credits=100, max_in_flight=3, max_pending=20)
+    assert peak["max"] == 3
+
+
+@pytest.mark.parametrize("message, code", [
+    ("not an object", "INVALID_MESSAGE"),
+    ({"type": "score", "text": "kill"}, "INVALID_MESSAGE"),
+    ({"type": "score", "id": "x" * 129, "text": "kill"}, "INVALID_MESSAGE"),
+    ({"type": "credit", "n": 0}, "INVALID_MESSAGE"),
+    ({"type": "credit", "n": True}, "INVALID_MESSAGE"),
+    ({"type": "cancel", "id": "a"}, "INVALID_MESSAGE"),
+])
+def test_malformed_messages_rejected(message, code):
+    async def scenario(client, session):
+        client.feed(message)
+        await client.wait_for(1, "rejected")
+
+    client, session = run_session(scenario)
+    assert client.of("rejected")[0]["errors"]["error_code"] == code
+    assert session.credits == 16
+
+
+def test_duplicate_pending_id_rejected():
+    async def scenario(client, session):
+        client.feed(score_message("same"), score_message("same"))
+        await client.wait_for(1, "rejected")
+        client.feed({"type": "credit", "n": 1})
+        await client.wait_for(1)
+        client.feed(score_message("same"), {"type": "credit", "n": 1})
+        await client.wait_for(2)
+
+    client, _ = run_session(scenario, credits=0)
+    assert client.of("rejected")[0] == {"type": "rejected", "id": "same", "errors": {
+        "error_code": "DUPLICATE_ID", "message": "A message with this id is still pending"}}
+
+
+def test_invariant_breaking_result_never_streamed():
+    async def rogue_score(request, correlation_id):
+        response = analyze_text(request["text"], correlation_id)
+        response["safety_metadata"] = dict(response["safety_metadata"], is_decision=True)
+        return response
+
+    async def failing_score(request, correlation_id):
+        raise RuntimeError("boom")
+
+    for scorer in (rogue_score, failing_score):
+        async def scenario(client, session):
+            client.feed(score_message("a"))
+            await client.wait_for(1)
+
+        client, _ = run_session(scenario, scorer)
+        result = client.of("result")[0]["result"]
+        assert result["errors"]["error_code"] == "INTERNAL_ERROR"
+        assert result["safety_metadata"]["is_decision"] is False
+
+
+def test_overload_rejected_outside_v3_result():
+    async def overloaded_score(request, correlation_id):
+        raise ExecutorOverloaded(4)
+
+    async def scenario(client, session):
+        client.feed(score_message("a"))
+        await client.wait_for(1, "rejected")
+        # The id is free again
+        client.feed(score_message("a"))
+        await client.wait_for(2, "rejected")
+
+    client, session = run_session(scenario, overloaded_score)
+    assert client.of("result") == []
+    assert {message["errors"]["error_code"] for message in client.of("rejected")} == {"SERVICE_OVERLOADED"}
+    assert session.snapshot()["pending"] == 0
+
+
+def test_disconnect_cancels_scoring_and_updates_stats():
+    cancelled = []
+
+    async def hanging_score(request, correlation_id):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(correlation_id)
+            raise
+
+    before = stream_stats()
+
+    async def scenario(client, session):
+        client.feed(score_message("a"), score_message("b"))
+        while session.in_flight < 2:
+            await asyncio.sleep(0.001)
+        assert stream_stats()["open"] == before["open"] + 1
+
+    run_session(scenario, hanging_score)
+    assert sorted(cancelled) == ["TEST-1", "TEST-2"]
+    after = stream_stats()
+    assert after["open"] == before["open"]
+    assert after["received"] == before["received"] + 2
@@ -0,0 +1,145 @@
+"""
+Tenant Index Tests
+Overlay parity with a merged table, LRU memory budget and engine wiring
+"""
+import json
+import random
+import time
+
+import pytest
+
+from app import engine
+from app.contract_enforcement import VALID_ERROR_CODES
+from app.engine import RISK_KEYWORDS, analyze_text, analyze_bytes, analyze_document, analyze_texts, configure_tenant_indexes
+from app.keyword_index import KeywordIndex
+from app.tenant_index import OverlayIndex, TenantIndexCache, UnknownTenantError
+
+EXTRAS = {
+    "fraud": ["gift card", "scam", "crypto doubler"],
+    "aaa_first": ["zebra"],
+    "zzz_last": ["-x-", "quux"]
+}
+
+
+def merged_table(base, extras):
+    table = {category: list(keywords) for category, keywords in base.items()}
+    for category, keywords in extras.items():
+        existing = table.setdefault(category, [])
+        existing.extend(keyword for keyword in dict.fromkeys(keywords) if keyword not in existing)
+    return table
+
+
+@pytest.fixture
+def tenants():
+    cache = TenantIndexCache({"acme": EXTRAS, "globex": {"drugs": ["lean"]}})
+    configure_tenant_indexes(cache)
+    yield cache
+    configure_tenant_indexes(None)
+
+
+@pytest.mark.parametrize("extras", [EXTRAS, {"fraud": ["gift card"], "aaa_first": ["zebra"]}])
+def test_overlay_matches_merged_table(extras):
+    overlay = OverlayIndex(engine.KEYWORD_INDEX, extras)
+    merged = KeywordIndex.from_table(merged_table(RISK_KEYWORDS, extras))
+    assert overlay.entries == merged.entries
+    assert overlay.reasons == merged.reasons
+
+    words = ["gift", "card", "scam", "kill", "zebra", "quux", "crypto", "doubler", "a-x-b", "hello", "lean", "bomb"]
+    rng = random.Random(18)
+    for _ in range(2000):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 12)))
+        assert overlay.find(text) == merged.find(text), text
+        data = text.upper().encode("ascii")
+        assert overlay.find_ascii(data) == merged.find_ascii(data), text
+        pos = rng.randint(0, len(text))
+        assert overlay.find(text, pos, pos + 7) == merged.find(text, pos, pos + 7), text
+
+
+def test_overlay_shares_base_index():
+    overlay = OverlayIndex(engine.KEYWORD_INDEX, EXTRAS)
+    assert overlay.base is engine.KEYWORD_INDEX
+    # "scam" is already a base fraud keyword; only the new extras are compiled
+    assert len(overlay.delta) == 5
+    assert len(overlay) == len(engine.KEYWORD_INDEX) + 5
+
+
+def test_tenant_request_scores_with_overlay(tenants):
+    response = analyze_text("Buy a GIFT CARD, zebra", "T-001", "acme")
+    assert response["trigger_reasons"] == ["Detected aaa_first keyword: zebra", "Detected fraud keyword: gift card"]
+    assert analyze_bytes(b"Buy a GIFT CARD, zebra", "T-002", "acme") == response
+    assert analyze_text("Buy a GIFT CARD, zebra", "T-003")["trigger_reasons"] == []
+    assert analyze_document("gift card " * 3000, "T-004", tenant="acme")["trigger_reasons"] == ["Detected fraud keyword: gift card"]
+    assert engine.get_index_version("acme") == tenants.get("acme", engine.KEYWORD_INDEX).version != engine.get_index_version()
+
+
+def test_unknown_tenant_is_an_error(tenants):
+    # Not a v3 response: the v3 error codes do not include it
+    with pytest.raises(UnknownTenantError):
+        analyze_text("scam", "T-005", "initech")
+    with pytest.raises(UnknownTenantError):
+        analyze_bytes(b"scam", "T-006", "initech")
+    with pytest.raises(UnknownTenantError):
+        analyze_document("scam", "T-007", tenant="initech")
+    with pytest.raises(UnknownTenantError):
+        analyze_texts(["scam", 42], tenant="initech")
+    configure_tenant_indexes(None)
+    with pytest.raises(UnknownTenantError):
+        analyze_text("scam", "T-008", "acme")
+    assert "UNKNOWN_TENANT" not in VALID_ERROR_CODES
+
+
+def test_lru_respects_memory_budget():
+    tables = {f"tenant-{i}": {"fraud": [f"extra{i}"]} for i in range(3)}
+    size = OverlayIndex(engine.KEYWORD_INDEX, tables["tenant-0"]).approximate_size()
+    cache = TenantIndexCache(tables, budget_bytes=size * 2 + size // 2)
+
+    for tenant in tables:
+        cache.get(tenant, engine.KEYWORD_INDEX)
+    cache.get("tenant-1", engine.KEYWORD_INDEX)
+
+    stats = cache.stats()
+    assert stats["compiled"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 1
+    assert stats["bytes"] <= stats["budget_bytes"]
+    assert list(cache._overlays) == ["tenant-2", "tenant-1"]
+
+
+def test_overlay_recompiled_after_base_changes():
+    cache = TenantIndexCache({"acme": {"fraud": ["gift card"]}})
+    first = cache.get("acme", engine.KEYWORD_INDEX)
+    other_base = KeywordIndex.from_table({"fraud": ["scam"]})
+    second = cache.get("acme", other_base)
+    assert second is not first and second.base is other_base
+    assert second.find("scam gift card") == [0, 1]
+    assert cache.stats()["compiled"] == 1
+
+
+def test_tenant_file_validated(tmp_path):
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps({"tenants": {"acme": {"fraud": ["Gift Card"]}}}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        TenantIndexCache.from_file(str(path))
+
+    path.write_text(json.dumps({"tenants": {"acme": {"fraud": ["gift card"]}}}), encoding="utf-8")
+    assert "acme" in TenantIndexCache.from_file(str(path))
+
+
+@pytest.mark.parametrize("extras", [{"fraud": ["gift card"]}, {"fraud": [f"word{i} card" for i in range(40)]}])
+def test_ranged_scans_of_long_text_stay_linear(extras):
+    # analyze_document scans a long text one window at a time; the delta
+    # prefilter must read each window, not the whole text
+    overlay = OverlayIndex(engine.KEYWORD_INDEX, extras)
+
+    def scan(windows, size=500):
+        text = "the quick brown fox jumps " * (windows * size // 26)
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            for start in range(0, len(text), size):
+                overlay.find(text, start, start + size)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    # 16x the text: about 16x the time when linear, 256x when quadratic
+    assert scan(800) / scan(50) < 48
@@ -0,0 +1,61 @@
+"""
+Version Header Tests
+X-Keyword-Index-Version names the index that scored the response
+"""
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from app import engine, main
+
+REQUESTS = [
+    ("/analyze", {"text": "kill with a gift card"}, "validate_input_contract"),
+    ("/analyze/batch", {"items": [{"text": "kill"}, {"text": "gift card"}]}, "validate_batch_input_contract"),
+    ("/analyze/document", {"text": "kill with a gift card"}, "validate_document_input_contract"),
+]
+
+
+@pytest.fixture
+def old_index(tmp_path, monkeypatch):
+    path = tmp_path / "keywords.json"
+    path.write_text(json.dumps({"version": "v2", "categories": {"fraud": ["gift card"]}}), encoding="utf-8")
+    monkeypatch.setenv("RISK_KEYWORD_TABLE", str(path))
+    old, label = engine.KEYWORD_INDEX, engine.get_table_version()
+    yield old
+    old.__dict__.pop("find", None)
+    engine.publish_keyword_index(old, label)
+
+
+@pytest.mark.parametrize("path, body, validator", REQUESTS)
+def test_reload_before_scoring_reports_new_index(old_index, monkeypatch, path, body, validator):
+    # The request arrives on the old index; the reload lands before the scan
+    validate = getattr(main, validator)
+
+    def reload_then_validate(data):
+        engine.reload_keyword_table()
+        return validate(data)
+
+    monkeypatch.setattr(main, validator, reload_then_validate)
+    response = TestClient(main.app).post(path, json=body)
+    assert response.status_code == 200
+    assert response.headers["X-Keyword-Index-Version"] == engine.get_index_version() != old_index.version
+
+
+@pytest.mark.parametrize("path, body, validator", REQUESTS)
+def test_reload_mid_scan_reports_old_index(old_index, path, body, validator):
+    find = old_index.find
+
+    def find_then_reload(text, *args):
+        if engine.KEYWORD_INDEX is old_index:
+            engine.reload_keyword_table()
+        return find(text, *args)
+
+    old_index.find = find_then_reload
+    response = TestClient(main.app).post(path, json=body)
+    assert response.status_code == 200
+    assert response.headers["X-Keyword-Index-Version"] == old_index.version != engine.get_index_version()
@@ -115,8 +115,9 @@ def verify_trace(cid: str, capture: ThreadCapture, expected_category: str) -> li
     except ValueError:
         pass  # Already caught as missing above
 
-    # c) Log replay: reconstruct score from log entries
-    KEYWORD_WEIGHT     = 0.2
+    # c) Log replay: reconstruct score from log entries. Weights come from
+    #    the records (per-hit `weight`, or the trace's `keyword_weights`),
+    #    so the replay holds for whatever policy scored the request.
     MAX_CATEGORY_SCORE = 0.6
     cat_scores: dict[str, float] = {}
 
@@ -126,11 +127,17 @@ def verify_trace(cid: str, capture: ThreadCapture, expected_category: str) -> li
         if et == "keyword_detected":
             cat = d.get("category")
             if cat:
-                cat_scores[cat] = cat_scores.get(cat, 0.0) + KEYWORD_WEIGHT
+                cat_scores[cat] = cat_scores.get(cat, 0.0) + d["weight"]
         elif et == "category_capped":
             cat = d.get("category")
             if cat:
-                cat_scores[cat] = MAX_CATEGORY_SCORE
+                cat_scores[cat] = d.get("cap", MAX_CATEGORY_SCORE)
+        elif et == "decision_trace":
+            weights = d.get("keyword_weights") or {}
+            for cat, keywords in (d.get("keywords") or {}).items():
+                cat_scores[cat] = cat_scores.get(cat, 0.0) + weights[cat] * len(keywords)
+            for cat in d.get("capped") or []:
+                cat_scores[cat] = d.get("category_cap", MAX_CATEGORY_SCORE)
 
     replayed_score = round(min(sum(cat_scores.values()), 1.0), 2)
 